@@ -1,9 +1,40 @@
-from typing import Generator
+from typing import Generator, Optional
+from fastapi import Header, Query, Request
 from app.db.session import SessionLocal
+from app.services import deadline, telemetry
+from app.services import prism_service
 
 def get_db() -> Generator:
     try:
         db = SessionLocal()
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_prism_scorer() -> prism_service.PRISMScorer:
+    return prism_service.get_prism_scorer()
+
+async def tag_llm_endpoint(request: Request) -> None:
+    """Label LLM calls made while serving this request with its route template"""
+    path = request.url.path
+    template = getattr(request.scope.get("route"), "path", None)
+    if not template:
+        telemetry.set_endpoint(path)
+        return
+    # Depending on the FastAPI version the route template may or may not
+    # include the router prefix; take the prefix from the request path
+    segments = path.rstrip("/").split("/")
+    template_segments = template.rstrip("/").split("/")
+    prefix = "/".join(segments[:max(len(segments) - len(template_segments) + 1, 1)])
+    telemetry.set_endpoint(prefix + template)
+
+async def get_deadline(
+    x_deadline_ms: Optional[int] = Header(None, ge=1),
+    deadline_ms: Optional[int] = Query(None, ge=1, description="Latency budget in milliseconds")
+) -> Optional[deadline.Deadline]:
+    """
+    Start the request's deadline budget from the X-Deadline-Ms header or the
+    deadline_ms parameter (the smaller wins); None means no deadline.
+    """
+    budgets = [value for value in (x_deadline_ms, deadline_ms) if value]
+    return deadline.start(min(budgets) if budgets else None)
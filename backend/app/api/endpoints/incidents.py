@@ -1,7 +1,9 @@
 from typing import List, Optional, Dict
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.core.config import settings
 from app.crud import incident as incident_crud
 from app.crud import product as product_crud
 from app.schemas.incident import (
@@ -10,19 +12,17 @@ from app.schemas.incident import (
     IncidentWithScores,
     IncidentRetrievalResponse
 )
+from app.services import deadline, explanation_service
 from app.services.prism_service import PRISMScorer
 from app.services.retrieval_service import (
     find_similar_incidents,
-    generate_explanation,
     optimize_retrieval
 )
 from datetime import datetime
+import json
 
 router = APIRouter()
 
-# Initialize PRISM scorer
-prism_scorer = PRISMScorer()
-
 # Incident endpoints
 @router.post("/", response_model=Incident)
 def create_incident(
@@ -42,7 +42,8 @@ def read_incidents(
     skip: int = 0,
     limit: int = 100,
     risk_domain: Optional[str] = None,
-    risk_level: Optional[str] = None
+    risk_level: Optional[str] = None,
+    technology: Optional[str] = None
 ) -> List[Incident]:
     """
     Retrieve incidents with optional filtering.
@@ -52,7 +53,8 @@ def read_incidents(
         skip=skip,
         limit=limit,
         domain=risk_domain,
-        # Note: risk_level is not supported by the CRUD function yet
+        technology=technology,
+        risk_level=risk_level
     )
 
 @router.get("/{incident_id}", response_model=Incident)
@@ -188,10 +190,13 @@ async def get_similar_incidents(
     sort_by: str = Query("similarity", regex="^(similarity|risk|relevance)$"),
     risk_domain: Optional[str] = None,
     min_similarity: float = Query(0.0, ge=0.0, le=1.0),
-    min_risk_score: float = Query(0.0, ge=0.0, le=1.0)
+    min_risk_score: float = Query(0.0, ge=0.0, le=1.0),
+    budget: Optional[deadline.Deadline] = Depends(deps.get_deadline)
 ):
     """
     Get similar incidents for a product with ranking and filtering options.
+    With a deadline (X-Deadline-Ms or deadline_ms), the incidents ranked by
+    then are returned and `partial` is set.
     """
     product = product_crud.get_product(db, product_id)
     if not product:
@@ -213,7 +218,8 @@ async def get_similar_incidents(
         page=1,
         page_size=limit,
         sort_by=sort_by,
-        risk_domain=risk_domain
+        risk_domain=risk_domain,
+        partial=budget is not None and budget.partial
     )
 
 @router.get("/explanation/{product_id}/{incident_id}")
@@ -235,13 +241,63 @@ async def get_incident_explanation(
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     
-    explanation = await generate_explanation(
-        product=product,
-        incident=incident,
-        mode=mode
-    )
+    explanation, cached = await explanation_service.get_explanation(db, product, incident, mode)
+    
+    return {"explanation": explanation, "cached": cached}
+
+@router.get("/explanation/{product_id}/{incident_id}/stream")
+async def stream_incident_explanation(
+    *,
+    db: Session = Depends(deps.get_db),
+    product_id: int,
+    incident_id: int,
+    mode: str = Query("generic", regex="^(generic|full_prism|none)$")
+):
+    """
+    Stream the explanation as server-sent events while the model writes it.
+    Each `data:` event holds {"delta": "..."}; the stream ends with a `done`
+    event ({"cached": bool}) or an `error` event.
+    """
+    product = product_crud.get_product(db, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    incident = incident_crud.get_incident(db, incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    stored = explanation_service.get_stored_explanation(db, product, incident, mode) if mode != "none" else None
+    
+    async def events():
+        async for event in explanation_service.stream_explanation(product, incident, mode, stored):
+            if 'delta' in event:
+                yield f"data: {json.dumps({'delta': event['delta']})}\n\n"
+            elif 'error' in event:
+                yield f"event: error\ndata: {json.dumps({'error': event['error']})}\n\n"
+            else:
+                yield f"event: done\ndata: {json.dumps({'cached': event['cached']})}\n\n"
     
-    return {"explanation": explanation}
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # No proxy buffering of the token stream
+    )
+
+@router.post("/explanation/precompute")
+def precompute_explanations(
+    *,
+    db: Session = Depends(deps.get_db),
+    product_ids: Optional[List[int]] = Query(None),
+    top_n: Optional[int] = Query(None, ge=1, le=100)
+):
+    """
+    Generate explanations for each product's top-N incidents in the background
+    (all products when none are given). Returns how many products were queued.
+    """
+    if not product_ids:
+        product_ids = [product.id for product in product_crud.get_products(db, limit=10000)]
+    scheduled = explanation_service.explanation_precomputer.schedule(product_ids, top_n=top_n)
+    return {"scheduled": scheduled, "top_n": top_n or settings.EXPLANATION_PRECOMPUTE_TOP_N}
 
 @router.post("/optimize/{product_id}", response_model=IncidentRetrievalResponse)
 async def optimize_incident_retrieval(
@@ -279,6 +335,7 @@ async def optimize_incident_retrieval(
 async def calculate_prism_scores(
     *,
     db: Session = Depends(deps.get_db),
+    prism_scorer: PRISMScorer = Depends(deps.get_prism_scorer),
     incident_id: int,
     product_id: int
 ):
@@ -336,6 +393,7 @@ async def calculate_prism_scores(
 async def get_prism_scores_batch(
     *,
     db: Session = Depends(deps.get_db),
+    prism_scorer: PRISMScorer = Depends(deps.get_prism_scorer),
     product_id: int,
     limit: int = Query(10, ge=1, le=50)
 ):
@@ -0,0 +1,86 @@
+"""
+Metrics API Endpoints
+"""
+
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from app.api import deps
+from app.services import telemetry
+from app.services.circuit_breaker import llm_circuit_breaker
+
+router = APIRouter()
+
+class LLMCallRecord(BaseModel):
+    id: int
+    endpoint: Optional[str] = None
+    agent: Optional[str] = None
+    model: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    latency_ms: Optional[float] = None
+    retries: Optional[int] = None
+    success: Optional[bool] = None
+    parse_ok: Optional[bool] = None
+    cost_usd: Optional[float] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    """
+    LLM call metrics of this process in Prometheus text format.
+    """
+    circuit = llm_circuit_breaker.snapshot()
+    circuit_lines = [
+        "# HELP prism_llm_circuit_open Whether the LLM gateway circuit breaker is open (failing fast)",
+        "# TYPE prism_llm_circuit_open gauge",
+        f'prism_llm_circuit_open{{name="{circuit["name"]}"}} {1 if circuit["state"] == "open" else 0}',
+        "",
+    ]
+    return PlainTextResponse(
+        telemetry.llm_telemetry.render_prometheus() + "\n".join(circuit_lines),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@router.get("/api/metrics/llm-circuit")
+def get_llm_circuit():
+    """
+    Current state of the LLM gateway circuit breaker.
+    """
+    return llm_circuit_breaker.snapshot()
+
+@router.get("/api/metrics/llm-calls", response_model=List[LLMCallRecord])
+def get_llm_calls(
+    db: Session = Depends(deps.get_db),
+    endpoint: Optional[str] = None,
+    agent: Optional[str] = None,
+    since_hours: Optional[float] = Query(None, gt=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Most recent recorded LLM calls, filterable by endpoint and agent.
+    """
+    return telemetry.query_llm_calls(
+        db,
+        endpoint=endpoint,
+        agent=agent,
+        since_hours=since_hours,
+        limit=limit
+    )
+
+@router.get("/api/metrics/llm-calls/summary")
+def get_llm_call_summary(
+    db: Session = Depends(deps.get_db),
+    since_hours: Optional[float] = Query(None, gt=0)
+):
+    """
+    Call counts, latency, tokens and cost per endpoint, agent and model.
+    """
+    return {"summary": telemetry.summarize_llm_calls(db, since_hours=since_hours)}
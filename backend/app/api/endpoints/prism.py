@@ -2,25 +2,37 @@
 PRISM Scoring API Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.core.config import settings
+from app.core.log import get_logger
 from app.services.prism_service import PRISMScorer
+from app.services import cascade_service, ensemble_service, job_service, weight_profiles
+from app.services import deadline, score_store
+from app.services.score_store import score_matrix
+from app.services.job_service import ScoringJobRunner
 from pydantic import BaseModel
-from typing import List
-import logging
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-# Initialize PRISM scorer
-prism_scorer = PRISMScorer()
+# Background job runner for large scoring runs (uses the shared app-lifetime scorer)
+job_runner = ScoringJobRunner()
 
 class PRISMScoreRequest(BaseModel):
     product_name: str
     product_description: str
     incident_description: str
     context: str = ""
-    mode: str = "prism"  # Add mode parameter: "prism" or "generic"
+    mode: str = "prism"  # Add mode parameter: "prism", "generic", "cascade" or "ensemble"
+    cascade_threshold: Optional[float] = None  # Screen score (1-100) that triggers full PRISM
+    personas: Optional[List[str]] = None  # Ensemble mode reviewers (defaults to the first ENSEMBLE_MAX_PERSONAS)
 
 class PRISMScoreResponse(BaseModel):
     logical_coherence: float
@@ -31,6 +43,11 @@ class PRISMScoreResponse(BaseModel):
     exploitability: float
     overall_score: float
     reasoning: str
+    tier: Optional[str] = None  # Cascade mode: "screen" or "full"
+    screen_score: Optional[float] = None
+    reviewers: Optional[List[dict]] = None  # Ensemble mode: per-persona scores
+    agreement: Optional[Dict[str, float]] = None  # Ensemble mode: per-dimension score spread
+    status: Optional[str] = None  # "scored", "degraded" (LLM gateway down), "error" or "timeout" (deadline reached)
 
 class BatchPRISMRequest(BaseModel):
     requests: List[PRISMScoreRequest]
@@ -40,12 +57,15 @@ class BulkPRISMRequest(BaseModel):
     product_description: str
     incidents: List[dict]  # List of incidents with id, title, description, technologies
     context: str = ""
-    mode: str = "prism"
+    mode: str = "prism"  # "prism", "generic", "dual" (generic + PRISM in one call) or "cascade"
+    product_id: Optional[int] = None  # Serve/store pre-computed scores for this product (prism, generic and dual modes)
+    cascade_threshold: Optional[float] = None  # Defaults to CASCADE_THRESHOLD
+    cascade_top_k: Optional[int] = None  # Defaults to CASCADE_TOP_K
 
 class IncidentScore(BaseModel):
     incident_id: int
-    confidence_score: float = None  # For generic mode
-    logical_coherence: float = None  # For PRISM mode
+    confidence_score: float = None  # For generic and dual modes
+    logical_coherence: float = None  # For PRISM and dual modes
     factual_accuracy: float = None
     practical_implementability: float = None
     contextual_relevance: float = None
@@ -53,20 +73,173 @@ class IncidentScore(BaseModel):
     exploitability: float = None
     overall_score: float = None
     reasoning: str
+    tier: Optional[str] = None  # Cascade mode: "screen" or "full"
+    screen_score: Optional[float] = None
+    status: Optional[str] = None  # "scored", "cached", "degraded" (LLM gateway down), "error" or "timeout" (deadline reached)
 
 class BulkPRISMResponse(BaseModel):
     incident_scores: List[IncidentScore]
+    partial: bool = False  # True when the deadline cut scoring short
+
+class ScoringJobRequest(BaseModel):
+    product_ids: Optional[List[int]] = None  # None scores every product
+    top_k: int = 30  # Top retrieved incidents scored per product
+    mode: str = "prism"
+    context: str = ""
+
+class ScoringJobResponse(BaseModel):
+    job_id: int
+    status: str
+    mode: str
+    top_k: int
+    total_items: int
+    completed_items: int
+    failed_items: int
+    progress: float
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class JobIncidentScore(IncidentScore):
+    product_id: int
+
+class ScoringJobResultsResponse(BaseModel):
+    job_id: int
+    items: List[JobIncidentScore]
+    total: int
+    page: int
+    limit: int
+    total_pages: int
+
+class WeightProfileRequest(BaseModel):
+    weights: Dict[str, float]  # One weight per PRISM dimension
+
+class WeightProfileResponse(BaseModel):
+    name: str
+    weights: Dict[str, float]
+    builtin: bool = False
+    active: bool = False  # Overall scores are served under this profile
+
+class RankedPair(BaseModel):
+    product_id: int
+    incident_id: int
+    overall_score: float
+
+class RecomputeResponse(BaseModel):
+    profile: str
+    active: bool
+    pairs: int
+    compute_ms: float
+    elapsed_ms: float
+    results: List[RankedPair]
+
+def convert_job_to_response(job) -> ScoringJobResponse:
+    """Convert a persisted scoring job to its status response"""
+    total = job.total_items or 0
+    finished = (job.completed_items or 0) + (job.failed_items or 0)
+    return ScoringJobResponse(
+        job_id=job.id,
+        status=job.status,
+        mode=job.mode,
+        top_k=job.top_k,
+        total_items=total,
+        completed_items=job.completed_items or 0,
+        failed_items=job.failed_items or 0,
+        progress=finished / total if total else 1.0,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+def default_score_response(reasoning: str, status: str) -> PRISMScoreResponse:
+    """Neutral 3.0 scores for a pair that could not be scored"""
+    return PRISMScoreResponse(
+        logical_coherence=3.0,
+        factual_accuracy=3.0,
+        practical_implementability=3.0,
+        contextual_relevance=3.0,
+        impact=3.0,
+        exploitability=3.0,
+        overall_score=3.0,
+        reasoning=reasoning,
+        status=status
+    )
+
+def failure_status() -> str:
+    """Failures after the request deadline has passed are reported as timeouts"""
+    return "timeout" if deadline.expired() else "error"
+
+def label_bulk_scores(scores: List[dict]) -> List[dict]:
+    """Copy bulk results with a per-item status; placeholder scores count as failures"""
+    labelled = []
+    for score in scores:
+        if score.get('degraded'):
+            labelled.append({**score, 'status': "degraded"})
+        elif score.get('status'):
+            labelled.append(score)
+        elif score.get('reasoning') in score_store.FALLBACK_REASONS:
+            labelled.append({**score, 'status': failure_status()})
+        else:
+            labelled.append({**score, 'status': "scored"})
+    return labelled
+
+def build_generic_response(result: dict, **extra) -> PRISMScoreResponse:
+    """Single-pair response for a generic confidence result"""
+    # For generic mode, only the overall score is meaningful
+    confidence_score = result.get('confidence_score', 3.0)
+    
+    return PRISMScoreResponse(
+        logical_coherence=confidence_score,  # Use confidence score for all dimensions in generic mode
+        factual_accuracy=confidence_score,
+        practical_implementability=confidence_score,
+        contextual_relevance=confidence_score,
+        impact=confidence_score,
+        exploitability=confidence_score,
+        overall_score=confidence_score,
+        reasoning=f"Generic Analysis: {result.get('reasoning', 'Generic confidence assessment')}",
+        **({'status': "degraded"} if result.get('degraded') else {}),
+        **extra
+    )
+
+def build_prism_response(result: dict, **extra) -> PRISMScoreResponse:
+    """Single-pair response for an authentic 6-dimension PRISM result"""
+    scores = result.get('prism_scores', {})
+    rationales = result.get('prism_rationales', {})
+    
+    # Create combined reasoning
+    reasoning_parts = []
+    for dimension, rationale in rationales.items():
+        reasoning_parts.append(f"{dimension.replace('_', ' ').title()}: {rationale}")
+    
+    return PRISMScoreResponse(
+        logical_coherence=scores.get('logical_coherence', 3.0),
+        factual_accuracy=scores.get('factual_accuracy', 3.0),
+        practical_implementability=scores.get('practical_implementability', 3.0),
+        contextual_relevance=scores.get('contextual_relevance', 3.0),
+        impact=scores.get('impact', 3.0),
+        exploitability=scores.get('exploitability', 3.0),
+        overall_score=result.get('transferability_score', 3.0),
+        reasoning="; ".join(reasoning_parts),
+        **({'status': "degraded"} if result.get('degraded') else {}),
+        **extra
+    )
 
 @router.post("/score", response_model=PRISMScoreResponse)
-async def calculate_prism_score(request: PRISMScoreRequest):
+async def calculate_prism_score(
+    request: PRISMScoreRequest,
+    prism_scorer: PRISMScorer = Depends(deps.get_prism_scorer)
+):
     """
     Calculate PRISM scores for a product-incident pair using the 6-dimension methodology,
     or generic confidence scores based on the mode parameter.
     """
+    if request.mode == "ensemble" and request.personas:
+        unknown = [p for p in request.personas if p not in prism_scorer.reviewer_persona]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown reviewer personas: {', '.join(unknown)}")
+    
     try:
-        print(f"=== PRISM API Called ===")
-        print(f"Mode: {request.mode}")
-        print(f"Product: {request.product_name}")
+        logger.debug("PRISM score request: mode=%s, product=%s", request.mode, request.product_name)
         
         # Prepare data for scorer
         incident_data = {
@@ -81,109 +254,87 @@ async def calculate_prism_score(request: PRISMScoreRequest):
         }
         
         # Choose scoring method based on mode
-        if request.mode == "generic":
-            print(">>> Taking GENERIC path")
-            # Use generic confidence scoring
-            result = prism_scorer.calculate_generic_confidence_score(incident_data, product_data)
-            print(f"Generic result: {result}")
-            
-            # For generic mode, only the overall score is meaningful
-            # Set other dimensions to indicate they're not applicable
-            confidence_score = result.get('confidence_score', 3.0)
-            
-            return PRISMScoreResponse(
-                logical_coherence=confidence_score,  # Use confidence score for all dimensions in generic mode
-                factual_accuracy=confidence_score,
-                practical_implementability=confidence_score,
-                contextual_relevance=confidence_score,
-                impact=confidence_score,
-                exploitability=confidence_score,
-                overall_score=confidence_score,
-                reasoning=f"Generic Analysis: {result.get('reasoning', 'Generic confidence assessment')}"
+        if request.mode == "cascade":
+            result = await run_in_threadpool(
+                cascade_service.cascade_pair_score, prism_scorer, incident_data, product_data, request.cascade_threshold
+            )
+            logger.debug("Cascade tier: %s (screen score %s)", result['tier'], result['screen_score'])
+            if result['tier'] == "full":
+                return build_prism_response(result, tier="full", screen_score=result['screen_score'])
+            return build_generic_response(result, tier="screen", screen_score=result['screen_score'])
+        elif request.mode == "ensemble":
+            result = await run_in_threadpool(
+                ensemble_service.ensemble_scores, prism_scorer, incident_data, product_data, request.personas
             )
+            return build_prism_response(result, reviewers=result.get('reviewers'), agreement=result.get('agreement'))
+        elif request.mode == "generic":
+            # Use generic confidence scoring (off the event loop so identical
+            # concurrent requests can be coalesced by the scorer)
+            result = await run_in_threadpool(prism_scorer.calculate_generic_confidence_score, incident_data, product_data)
+            return build_generic_response(result)
         else:
-            print(">>> Taking PRISM path")
             # Use authentic PRISM methodology
-            result = prism_scorer.calculate_authentic_prism_scores(incident_data, product_data)
-            print(f"PRISM result transferability: {result.get('transferability_score', 'N/A')}")
-            
-            # Extract scores
-            scores = result.get('prism_scores', {})
-            rationales = result.get('prism_rationales', {})
-            
-            # Create combined reasoning
-            reasoning_parts = []
-            for dimension, rationale in rationales.items():
-                reasoning_parts.append(f"{dimension.replace('_', ' ').title()}: {rationale}")
-            
-            reasoning = "; ".join(reasoning_parts)
-            
-            # Calculate overall score
-            overall_score = result.get('transferability_score', 3.0)
-            
-            return PRISMScoreResponse(
-                logical_coherence=scores.get('logical_coherence', 3.0),
-                factual_accuracy=scores.get('factual_accuracy', 3.0),
-                practical_implementability=scores.get('practical_implementability', 3.0),
-                contextual_relevance=scores.get('contextual_relevance', 3.0),
-                impact=scores.get('impact', 3.0),
-                exploitability=scores.get('exploitability', 3.0),
-                overall_score=overall_score,
-                reasoning=reasoning
-            )
+            result = await run_in_threadpool(prism_scorer.calculate_authentic_prism_scores, incident_data, product_data)
+            return build_prism_response(result)
         
     except Exception as e:
-        logging.error(f"Error calculating score: {e}")
+        logger.error("Error calculating score: %s", e)
         # Return default scores on error
-        return PRISMScoreResponse(
-            logical_coherence=3.0,
-            factual_accuracy=3.0,
-            practical_implementability=3.0,
-            contextual_relevance=3.0,
-            impact=3.0,
-            exploitability=3.0,
-            overall_score=3.0,
-            reasoning=f"Error in calculation: {str(e)}"
-        )
+        return default_score_response(f"Error in calculation: {str(e)}", failure_status())
 
 @router.post("/score/batch", response_model=List[PRISMScoreResponse])
-async def batch_calculate_prism_score(batch_request: BatchPRISMRequest):
+async def batch_calculate_prism_score(
+    batch_request: BatchPRISMRequest,
+    prism_scorer: PRISMScorer = Depends(deps.get_prism_scorer),
+    budget: Optional[deadline.Deadline] = Depends(deps.get_deadline)
+):
     """
     Calculate PRISM scores for multiple product-incident pairs.
+    With a deadline (X-Deadline-Ms or deadline_ms), pairs not scored in time
+    come back with default scores and status "timeout".
     """
     results = []
     
     for request in batch_request.requests:
+        if budget is not None and budget.expired():
+            results.append(default_score_response("Deadline exceeded before scoring", "timeout"))
+            continue
         try:
-            score_response = await calculate_prism_score(request)
+            if budget is None:
+                score_response = await calculate_prism_score(request, prism_scorer)
+            else:
+                score_response = await asyncio.wait_for(calculate_prism_score(request, prism_scorer), timeout=budget.remaining())
+            if score_response.status is None:
+                score_response.status = "scored"
             results.append(score_response)
+        except asyncio.TimeoutError:
+            results.append(default_score_response("Deadline exceeded while scoring", "timeout"))
         except Exception as e:
-            logging.error(f"Error in batch calculation: {e}")
+            logger.error("Error in batch calculation: %s", e)
             # Add default score for failed calculation
-            results.append(PRISMScoreResponse(
-                logical_coherence=3.0,
-                factual_accuracy=3.0,
-                practical_implementability=3.0,
-                contextual_relevance=3.0,
-                impact=3.0,
-                exploitability=3.0,
-                overall_score=3.0,
-                reasoning=f"Error in calculation: {str(e)}"
-            ))
+            results.append(default_score_response(f"Error in calculation: {str(e)}", failure_status()))
     
     return results
 
 @router.post("/score/bulk", response_model=BulkPRISMResponse)
-async def bulk_calculate_prism_score(bulk_request: BulkPRISMRequest):
+async def bulk_calculate_prism_score(
+    bulk_request: BulkPRISMRequest,
+    db: Session = Depends(deps.get_db),
+    prism_scorer: PRISMScorer = Depends(deps.get_prism_scorer),
+    budget: Optional[deadline.Deadline] = Depends(deps.get_deadline)
+):
     """
     Calculate scores for all incidents in ONE API call with structured output.
     Uses 1-100 scoring scale and proper PRISM weights.
+    With a deadline (X-Deadline-Ms or deadline_ms), incidents are scored in
+    concurrent chunks and whatever is finished at the deadline is returned;
+    each score carries a status and `partial` flags a cut-short response.
     """
     try:
-        print(f"=== BULK PRISM API Called ===")
-        print(f"Mode: {bulk_request.mode}")
-        print(f"Product: {bulk_request.product_name}")
-        print(f"Processing {len(bulk_request.incidents)} incidents in one call")
+        logger.debug(
+            "Bulk score request: mode=%s, product=%s, %d incidents",
+            bulk_request.mode, bulk_request.product_name, len(bulk_request.incidents)
+        )
         
         # Prepare data for scorer
         product_data = {
@@ -192,17 +343,59 @@ async def bulk_calculate_prism_score(bulk_request: BulkPRISMRequest):
         }
         
         # Process ALL incidents in one call
-        if bulk_request.mode == "generic":
-            print(">>> Taking BULK GENERIC path")
-            result = prism_scorer.bulk_calculate_generic_scores(bulk_request.incidents, product_data, bulk_request.context)
+        if bulk_request.mode == "cascade":
+            result = await run_in_threadpool(
+                cascade_service.cascade_bulk_scores,
+                prism_scorer,
+                bulk_request.incidents,
+                product_data,
+                bulk_request.context,
+                bulk_request.cascade_threshold,
+                bulk_request.cascade_top_k
+            )
         else:
-            print(">>> Taking BULK PRISM path")
-            result = prism_scorer.bulk_calculate_prism_scores(bulk_request.incidents, product_data, bulk_request.context)
+            if bulk_request.mode == "generic":
+                bulk_score = prism_scorer.bulk_calculate_generic_scores
+            elif bulk_request.mode == "dual":
+                bulk_score = prism_scorer.bulk_calculate_dual_scores
+            else:
+                bulk_score = prism_scorer.bulk_calculate_prism_scores
+            
+            def score(incidents: List[dict]) -> List[dict]:
+                if budget is None:
+                    return bulk_score(incidents, product_data, bulk_request.context)
+                # Small concurrent chunks so finished ones survive the deadline
+                scores = []
+                for chunk, chunk_scores in deadline.map_chunks(
+                    lambda chunk: bulk_score(chunk, product_data, bulk_request.context),
+                    incidents,
+                    settings.DEADLINE_CHUNK_SIZE,
+                    settings.DEADLINE_MAX_WORKERS
+                ):
+                    if chunk_scores is None:
+                        chunk_scores = [
+                            {'incident_id': incident['id'], 'reasoning': "Deadline exceeded", 'status': "timeout"}
+                            for incident in chunk
+                        ]
+                    scores.extend(chunk_scores)
+                return scores
+            
+            if bulk_request.product_id is not None:
+                # Pre-scored pairs (e.g. from the nightly warmup) come back without an LLM call
+                result = await run_in_threadpool(
+                    score_store.score_through_store, db, bulk_request.product_id, bulk_request.incidents, bulk_request.mode, score
+                )
+            else:
+                result = await run_in_threadpool(score, bulk_request.incidents)
         
-        return BulkPRISMResponse(incident_scores=result)
+        scores = label_bulk_scores(result)
+        return BulkPRISMResponse(
+            incident_scores=scores,
+            partial=any(score['status'] == "timeout" for score in scores)
+        )
         
     except Exception as e:
-        logging.error(f"Error in bulk calculation: {e}")
+        logger.error("Error in bulk calculation: %s", e)
         # Return default scores for all incidents
         default_scores = []
         for incident in bulk_request.incidents:
@@ -210,7 +403,8 @@ async def bulk_calculate_prism_score(bulk_request: BulkPRISMRequest):
                 default_scores.append(IncidentScore(
                     incident_id=incident['id'],
                     confidence_score=50.0,  # 1-100 scale
-                    reasoning="Error in calculation"
+                    reasoning="Error in calculation",
+                    status=failure_status()
                 ))
             else:
                 default_scores.append(IncidentScore(
@@ -222,7 +416,129 @@ async def bulk_calculate_prism_score(bulk_request: BulkPRISMRequest):
                     impact=50.0,
                     exploitability=50.0,
                     overall_score=50.0,
-                    reasoning="Error in calculation"
+                    confidence_score=50.0 if bulk_request.mode == "dual" else None,
+                    reasoning="Error in calculation",
+                    status=failure_status()
                 ))
         
-        return BulkPRISMResponse(incident_scores=default_scores) 
\ No newline at end of file
+        return BulkPRISMResponse(incident_scores=default_scores, partial=budget is not None and budget.expired())
+
+@router.post("/jobs", response_model=ScoringJobResponse)
+def create_scoring_job(
+    job_request: ScoringJobRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Queue a background scoring run, e.g. the top 30 incidents for every product.
+    Progress is checkpointed per product and the job resumes after a restart.
+    """
+    if job_request.mode not in job_service.JOB_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {job_request.mode}")
+    if job_request.top_k < 1 or job_request.top_k > 100:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 100")
+
+    job = job_runner.create_job(
+        db,
+        mode=job_request.mode,
+        top_k=job_request.top_k,
+        context=job_request.context,
+        product_ids=job_request.product_ids
+    )
+    job_runner.submit(job.id)
+
+    return convert_job_to_response(job)
+
+@router.get("/jobs/{job_id}", response_model=ScoringJobResponse)
+def get_scoring_job(
+    job_id: int,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Get status and progress of a scoring job.
+    """
+    job = job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return convert_job_to_response(job)
+
+@router.get("/jobs/{job_id}/results", response_model=ScoringJobResultsResponse)
+def get_scoring_job_results(
+    job_id: int,
+    db: Session = Depends(deps.get_db),
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    product_id: Optional[int] = Query(None)
+):
+    """
+    Get scored incidents of a job with pagination, optionally for one product.
+    """
+    job = job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    results, total, total_pages = job_service.get_job_results(
+        db, job_id, page=page, limit=limit, product_id=product_id
+    )
+
+    items = [
+        JobIncidentScore(
+            product_id=result.product_id,
+            incident_id=result.incident_id,
+            reasoning=result.reasoning or "",
+            # Only the fields of the job's mode are populated
+            **{
+                field: getattr(result, field)
+                for field in job_service.RESULT_FIELDS
+                if getattr(result, field) is not None
+            }
+        )
+        for result in results
+    ]
+
+    return ScoringJobResultsResponse(
+        job_id=job_id,
+        items=items,
+        total=total,
+        page=page,
+        limit=limit,
+        total_pages=total_pages
+    )
+
+
+@router.get("/weights", response_model=List[WeightProfileResponse])
+def list_weight_profiles(db: Session = Depends(deps.get_db)):
+    """Built-in and custom dimension weight profiles"""
+    return weight_profiles.list_profiles(db)
+
+@router.put("/weights/{name}", response_model=WeightProfileResponse)
+def save_weight_profile(
+    name: str,
+    profile_request: WeightProfileRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """Create or replace a custom weight profile"""
+    try:
+        weights = weight_profiles.save_profile(db, name, profile_request.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return WeightProfileResponse(name=name, weights=weights)
+
+@router.post("/weights/{name}/apply", response_model=RecomputeResponse)
+def apply_weight_profile(
+    name: str,
+    product_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=500),
+    activate: bool = False,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Recompute the overall score of every stored pair under a profile, without
+    LLM calls, and return the re-ranked top pairs (optionally for one product).
+    Only previews by default; with `activate` the profile becomes the one all
+    overall scores are served under.
+    """
+    weights = weight_profiles.get_profile(db, name)
+    if weights is None:
+        raise HTTPException(status_code=404, detail="Weight profile not found")
+    return score_matrix.apply_profile(db, name, weights, activate=activate, product_id=product_id, limit=limit)
@@ -5,15 +5,20 @@ Products API Endpoints
 from typing import List, Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from app.api import deps
+from app.core.log import get_logger
+from app.crud import product as product_crud
 from app.models.product import Product
+from app.services import deadline
+from app.services.llm_service import predict_indices
 from app.services.retrieval_service import find_similar_incidents
 from pydantic import BaseModel
 import json
 import math
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 class ApiProduct(BaseModel):
     id: int
@@ -38,58 +43,29 @@ class PaginatedResponse(BaseModel):
     page: int
     limit: int
     total_pages: int
+    next_cursor: Optional[str] = None  # Pass as `after` to fetch the next page by keyset
 
-def parse_json_field(field_value, default_list=None):
-    """Parse JSON field, handling both string and list formats including nested strings"""
-    if default_list is None:
-        default_list = []
-    
-    if not field_value:
-        return default_list
-    
-    if isinstance(field_value, list):
-        return field_value
-    
-    if isinstance(field_value, str):
-        try:
-            # First try to parse as JSON
-            parsed = json.loads(field_value)
-            if isinstance(parsed, list):
-                # Check if it's a list with string representation inside
-                if len(parsed) == 1 and isinstance(parsed[0], str):
-                    # Try to parse the inner string as a list
-                    try:
-                        inner_parsed = json.loads(parsed[0])
-                        if isinstance(inner_parsed, list):
-                            return inner_parsed
-                    except:
-                        # If inner parsing fails, check if it looks like a Python list
-                        inner_str = parsed[0]
-                        if inner_str.startswith('[') and inner_str.endswith(']'):
-                            try:
-                                # Use eval for Python list string format (like "['url1', 'url2']")
-                                inner_list = eval(inner_str)
-                                if isinstance(inner_list, list):
-                                    return inner_list
-                            except:
-                                pass
-                        return [inner_str]  # Return as single item if can't parse
-                return parsed
-            return default_list
-        except (json.JSONDecodeError, TypeError):
-            return default_list
-    
-    return default_list
+class IndexPredictionRequest(BaseModel):
+    description: str
+
+class IndexPredictionResponse(BaseModel):
+    technology: List[str]
+    purpose: List[str]
+    ethical_issues: Optional[List[str]] = None  # None when not predicted (only the LLM predicts them)
+    source: str  # "classifier", "llm", "cache" or "none"
+    confidence: Optional[float] = None  # Classifier confidence (lowest field's best tag probability)
 
 def convert_db_product_to_api(db_product) -> ApiProduct:
     """Convert database product to API product format"""
+    # Decoded once per product version
+    fields = product_crud.decoded_fields(db_product)
     return ApiProduct(
         id=db_product.id,
         name=db_product.name or "",
         description=db_product.description or "",
-        technology=parse_json_field(db_product.technology),
-        purpose=parse_json_field(db_product.purpose),
-        image_urls=parse_json_field(db_product.image_urls),
+        technology=fields['technology'],
+        purpose=fields['purpose'],
+        image_urls=fields['image_urls'],
         product_url=db_product.product_url or ""
     )
 
@@ -98,34 +74,29 @@ def get_products(
     db: Session = Depends(deps.get_db),
     page: int = Query(1, ge=1),
     limit: int = Query(12, ge=1, le=100),
-    search: Optional[str] = Query(None)
+    search: Optional[str] = Query(None),
+    after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    technology: Optional[List[str]] = Query(None, description="Products with any of these technologies"),
+    purpose: Optional[List[str]] = Query(None, description="Products with any of these purposes")
 ):
     """
     Get products with pagination and search functionality.
+    Search is full-text (bm25 ranked); technology/purpose filters match tags
+    case-insensitively. With `after`, the page is fetched by
+    keyset instead of offset; `page` then only labels the response. Without
+    it, `page` is found by OFFSET, which grows with the page number.
     """
-    # Build query
-    query = db.query(Product)
-    
-    # Apply search filter if provided
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term)
-            )
+    try:
+        db_products, next_cursor = product_crud.list_products(
+            db, search=search, skip=(page - 1) * limit, limit=limit, after=after,
+            technology=technology, purpose=purpose
         )
-    
-    # Get total count
-    total = query.count()
-    
-    # Calculate pagination
-    offset = (page - 1) * limit
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Cached until the products table changes
+    total = product_crud.count_products(db, search, technology=technology, purpose=purpose)
     total_pages = math.ceil(total / limit)
     
-    # Get products for current page
-    db_products = query.offset(offset).limit(limit).all()
-    
     # Convert to API format
     products = [convert_db_product_to_api(db_product) for db_product in db_products]
     
@@ -134,9 +105,20 @@ def get_products(
         total=total,
         page=page,
         limit=limit,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor
     )
 
+@router.post("/predict-indices", response_model=IndexPredictionResponse)
+async def predict_product_indices(request: IndexPredictionRequest):
+    """
+    Suggest technology and purpose tags (and, from the LLM, ethical issues) for a
+    product description. A local classifier answers in milliseconds; the LLM is
+    only asked when the classifier is unsure. Classifier answers leave
+    `ethical_issues` null: not predicted rather than none found.
+    """
+    return await predict_indices(request.description)
+
 @router.get("/{product_id}", response_model=ApiProduct)
 def get_product(
     product_id: int,
@@ -227,10 +209,13 @@ async def get_product_incidents(
     sort_by: str = Query("similarity", regex="^(similarity|risk|relevance)$"),
     risk_domain: Optional[str] = None,
     min_similarity: float = Query(0.0, ge=0.0, le=1.0),
-    min_risk_score: float = Query(0.0, ge=0.0, le=1.0)
+    min_risk_score: float = Query(0.0, ge=0.0, le=1.0),
+    budget: Optional[deadline.Deadline] = Depends(deps.get_deadline)
 ):
     """
-    Get incidents for a specific product using REAL similarity matching with PRISM analysis
+    Get incidents for a specific product using REAL similarity matching with PRISM analysis.
+    With a deadline (X-Deadline-Ms or deadline_ms), the incidents ranked by
+    then are returned and `partial` is set.
     """
     # Check if product exists
     db_product = db.query(Product).filter(Product.id == product_id).first()
@@ -242,8 +227,9 @@ async def get_product_incidents(
         from app.models.product import Product as ProductModel
         
         # Parse JSON fields from database
-        technology = parse_json_field(db_product.technology)
-        purpose = parse_json_field(db_product.purpose)
+        fields = product_crud.decoded_fields(db_product)
+        technology = fields['technology']
+        purpose = fields['purpose']
         
         # Create a product object for the similarity service
         # Note: We'll create a mock object with the necessary attributes
@@ -312,11 +298,10 @@ async def get_product_incidents(
             "total_incidents": len(incidents_data),
             "incidents": incidents_data,
             "sort_by": sort_by,
-            "risk_domain": risk_domain
+            "risk_domain": risk_domain,
+            "partial": budget is not None and budget.partial
         }
         
     except Exception as e:
-        print(f"Error in get_product_incidents: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_product_incidents: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving incidents: {str(e)}") 
\ No newline at end of file
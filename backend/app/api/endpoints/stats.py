@@ -2,45 +2,30 @@
 System Statistics API Endpoints
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.api import deps
-from app.models.product import Product
-from app.models.incident import Incident
-from app.models.models import IncidentProductMapping
+from app.db.migrations import SYSTEM_STAT_COUNTS, recount_system_stats
 
 router = APIRouter()
 
 @router.get("/stats")
-def get_system_stats(db: Session = Depends(deps.get_db)):
+def get_system_stats(
+    db: Session = Depends(deps.get_db),
+    fresh: bool = Query(False, description="Recount every table instead of reading the stored counters")
+):
     """
-    Get comprehensive system statistics
+    Get comprehensive system statistics.
+    Served from the `system_stats` counters, which triggers keep current on
+    every insert, update and delete; `fresh=true` recounts and stores the result.
     """
-    # Count products
-    total_products = db.query(Product).count()
-    
-    # Count incidents  
-    total_incidents = db.query(Incident).count()
-    
-    # Count mappings
-    total_mappings = db.query(IncidentProductMapping).count()
-    
-    # Count products with images (non-empty image_urls)
-    products_with_images = db.query(Product).filter(
-        Product.image_urls != "[]"
-    ).filter(
-        Product.image_urls != ""
-    ).count()
-    
-    # Count human-validated mappings
-    human_validated_mappings = db.query(IncidentProductMapping).filter(
-        IncidentProductMapping.is_human_validated == True
-    ).count()
-    
-    return {
-        "total_products": total_products,
-        "total_incidents": total_incidents,
-        "total_mappings": total_mappings,
-        "products_with_images": products_with_images,
-        "human_validated_mappings": human_validated_mappings
-    } 
\ No newline at end of file
+    if db.get_bind().dialect.name != "sqlite":
+        # No trigger-maintained counters
+        return {name: db.execute(text(count)).scalar() for name, count in SYSTEM_STAT_COUNTS.items()}
+
+    if fresh:
+        recount_system_stats(db.connection())
+        db.commit()
+    stats = dict(db.execute(text("SELECT name, value FROM system_stats")).all())
+    return {name: stats.get(name, 0) for name in SYSTEM_STAT_COUNTS}
@@ -6,8 +6,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct
 from app.api import deps
-from app.models.product import Product
-import json
+from app.models.product import Product, ProductPurpose
 from typing import List
 
 router = APIRouter()
@@ -57,25 +56,12 @@ def get_purpose_suggestions(db: Session = Depends(deps.get_db)):
     Get purpose suggestions from existing products with better parsing
     """
     try:
-        # Get all purpose arrays from products
-        products = db.query(Product.purpose).all()
-        
-        purposes = set()
-        for product in products:
-            if product.purpose:
-                try:
-                    # Parse JSON array
-                    purpose_list = json.loads(product.purpose) if isinstance(product.purpose, str) else product.purpose
-                    if isinstance(purpose_list, list):
-                        purposes.update(purpose_list)
-                except (json.JSONDecodeError, TypeError):
-                    # Handle case where purpose is a simple string
-                    if isinstance(product.purpose, str) and product.purpose.strip():
-                        purposes.add(product.purpose.strip())
+        # Distinct purpose tags (case-insensitive) from the product_purpose index
+        purposes = [row.tag for row in db.query(ProductPurpose.tag).distinct().order_by(ProductPurpose.tag).all()]
         
         # If we get real purposes from database, use them
-        if purposes and len(purposes) > 1:
-            return sorted(list(purposes))
+        if len(purposes) > 1:
+            return purposes
         
         # Otherwise provide comprehensive purpose categories
         return [
@@ -30,7 +30,7 @@ class IndexPredictionRequest(BaseModel):
 class IndexPredictionResponse(BaseModel):
     technology: List[str]
     purpose: List[str]
-    ethical_issues: List[str]
+    ethical_issues: Optional[List[str]] = None
 
 # Temporary in-memory storage (replace with database later)
 products_db = []
@@ -18,10 +18,77 @@ class Settings(BaseSettings):
     # OpenAI settings
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_BASE_URL: Optional[str] = None
+    OPENAI_MODEL: str = "gpt-4o-mini"
     
+    # LLM pricing (USD per 1K tokens) used for cost telemetry
+    LLM_PROMPT_PRICE_PER_1K: float = 0.00015
+    LLM_COMPLETION_PRICE_PER_1K: float = 0.0006
+
+    # LLM gateway rate limiting (0 disables a limit)
+    LLM_MAX_ATTEMPTS: int = 4                         # Attempts per LLM call, including 429 retries
+    LLM_RATE_LIMIT_RPM: int = 500                     # Requests per minute
+    LLM_RATE_LIMIT_TPM: int = 200000                  # Prompt + completion tokens per minute
+    LLM_RATE_LIMIT_MAX_WAIT_S: float = 30.0           # Longest a call queues for capacity
+    LLM_RATE_LIMIT_DEFAULT_PAUSE_S: float = 2.0       # Pause after a 429 without Retry-After
+    LLM_RATE_LIMIT_STATE_PATH: Optional[str] = None   # SQLite file to share limits across workers
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5            # Consecutive gateway failures that open the circuit (0 disables)
+    LLM_CIRCUIT_COOLDOWN_S: float = 30.0              # Time between recovery probes while open
+    LLM_CIRCUIT_PROBE_TIMEOUT_S: float = 5.0
+
+    # Shared LLM HTTP connection pool
+    LLM_HTTP_MAX_CONNECTIONS: int = 50
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY_S: float = 120.0
+    LLM_HTTP_TIMEOUT_S: float = 120.0
+    LLM_HTTP_CONNECT_TIMEOUT_S: float = 10.0
+
+    # Cascade scoring: cheap screen first, full PRISM only where it matters
+    CASCADE_THRESHOLD: float = 60.0         # Screen score (1-100) that escalates an incident
+    CASCADE_TOP_K: int = 5                  # Top screened incidents always escalated
+    CASCADE_SIMILARITY_WEIGHT: float = 0.2  # Share of local similarity in the screen score
+    CASCADE_MAX_WORKERS: int = 4            # Concurrent full PRISM scorings per request
+
+    # Reviewer ensemble scoring
+    ENSEMBLE_MAX_PERSONAS: int = 6    # Reviewers consulted at most
+    ENSEMBLE_WAVE_SIZE: int = 3       # Reviewers run concurrently per wave
+    ENSEMBLE_TOLERANCE: float = 1.0   # Max per-dimension spread (1-5) to stop early
+
+    # Request deadlines (X-Deadline-Ms / deadline_ms)
+    DEADLINE_CHUNK_SIZE: int = 5      # Incidents per bulk sub-call when a deadline is set
+    DEADLINE_MAX_WORKERS: int = 4     # Concurrent bulk sub-calls per request
+
+    # Logging
+    LOG_LEVEL: str = "INFO"                # Level of the app.* loggers; DEBUG adds per-step and payload lines
+    LOG_FORMAT: str = "json"               # "json" (one object per line) or "text"
+    LOG_PAYLOAD_MAX_CHARS: int = 500       # LLM responses and parsed outputs are truncated to this
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.1   # Share of payloads logged at DEBUG level
+
     # Database settings
     DATABASE_URL: str = "sqlite:///./app.db"
     
+    # Background scoring job settings
+    SCORING_JOB_WORKERS: int = 4      # Products scored concurrently
+    SCORING_JOB_CHUNK_SIZE: int = 15  # Incidents per bulk LLM call
+    SCORING_JOB_MAX_ATTEMPTS: int = 3 # Failed products are retried on resume until this many attempts
+    PAIR_SCORE_MAX_AGE_HOURS: float = 36.0  # Stored pair scores served by /score/bulk while fresher than this
+    
+    # /predict-indices: local tag classifier with LLM fallback
+    PREDICT_INDICES_MIN_CONFIDENCE: float = 0.5       # Below this (lowest field's best tag probability) the LLM is asked
+    PREDICT_INDICES_LABEL_THRESHOLD: float = 0.35     # Tag probability needed to be included
+    PREDICT_INDICES_MAX_TAGS: int = 5                 # Tags returned per field at most
+    PREDICT_INDICES_MIN_TAG_SUPPORT: int = 5          # Products a tag needs to be learned
+    PREDICT_INDICES_MIN_TRAINING_PRODUCTS: int = 50
+    PREDICT_INDICES_CACHE_SIZE: int = 2048            # Predictions kept by description hash
+    
+    # Product listing
+    PRODUCT_COUNT_CACHE_SIZE: int = 256    # Listing/search totals kept per products table version
+    PRODUCT_DECODE_CACHE_SIZE: int = 4096  # Products whose decoded list fields are kept
+    
+    # Stored incident explanations
+    EXPLANATION_PRECOMPUTE_TOP_N: int = 15         # Explanations generated per product after it is scored (0 disables)
+    EXPLANATION_PRECOMPUTE_MODES: str = "generic"  # Comma-separated: generic, full_prism
+    EXPLANATION_PRECOMPUTE_WORKERS: int = 2        # Products precomputed concurrently
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,48 @@
+"""
+JSON List Fields
+Tag and URL lists are stored as JSON arrays in TEXT columns. Rows from early
+imports may instead hold a list with one nested JSON or Python-literal list
+string; `decode_list` reads both, and the 0004 migration rewrites them with
+`canonical_list` so that plain `json.loads` is enough afterwards.
+"""
+
+import ast
+import json
+from typing import Any, List, Optional
+
+def _literal_list(text: str) -> Optional[list]:
+    """List parsed from a JSON or Python-literal list string (never evaluated as code)"""
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(text)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, list):
+            return value
+    return None
+
+def decode_list(value: Any, default: Optional[list] = None) -> list:
+    """List held by a JSON TEXT column value; `default` (or []) when it holds none"""
+    if default is None:
+        default = []
+    if not value:
+        return default
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str):
+        return default
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return default
+    if not isinstance(parsed, list):
+        return default
+    if len(parsed) == 1 and isinstance(parsed[0], str) and parsed[0].startswith('['):
+        inner = _literal_list(parsed[0])
+        if inner is not None:
+            return inner
+    return parsed
+
+def canonical_list(value: Any) -> str:
+    """Stored form of a list column: a plain JSON array"""
+    return json.dumps(decode_list(value))
@@ -0,0 +1,109 @@
+"""
+Structured Logging
+Records from the app.* loggers go onto an in-memory queue and are formatted
+and written by a background listener thread, so request threads only pay for
+the level check and the enqueue. Each record carries the current trace id
+(one per HTTP request or scoring job item). Large payloads such as raw LLM
+responses are logged only at DEBUG, sampled, and truncated.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from app.core.config import settings
+
+# Set per request by the trace-id middleware, per item by the job runner
+current_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+
+_listener: Optional[QueueListener] = None
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+def set_trace_id(trace_id: Optional[str]) -> None:
+    current_trace_id.set(trace_id)
+
+def get_trace_id() -> Optional[str]:
+    return current_trace_id.get()
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+class Payload:
+    """Large value rendered (and truncated) only if the record is actually emitted"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        limit = settings.LOG_PAYLOAD_MAX_CHARS
+        if limit and len(text) > limit:
+            return f"{text[:limit]}... [{len(text) - limit} more chars]"
+        return text
+
+def log_payload(logger: logging.Logger, label: str, value: Any) -> None:
+    """DEBUG-level, sampled log of a large value such as a raw LLM response"""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < settings.LOG_PAYLOAD_SAMPLE_RATE:
+        logger.debug("%s: %s", label, Payload(value))
+
+class _TraceQueueHandler(QueueHandler):
+    """Stamps the trace id and renders the message; formatting is left to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.trace_id = current_trace_id.get()
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            'level': record.levelname,
+            'logger': record.name,
+            'trace_id': getattr(record, 'trace_id', None),
+            'msg': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'trace_id'):
+            record.trace_id = None
+        return super().format(record)
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """Attach the queue handler to the app.* loggers and start the writer thread (idempotent)"""
+    global _listener
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel((level or settings.LOG_LEVEL).upper())
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # Flush what is still queued on exit
+
+    app_logger.addHandler(_TraceQueueHandler(log_queue))
+    app_logger.propagate = False
@@ -1,6 +1,7 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from app.models.incident import Incident, Evaluation
+from app.models.incident import Incident, Evaluation, IncidentTechnology
 from app.schemas.incident import IncidentCreate, IncidentUpdate, EvaluationCreate, EvaluationUpdate
 
 # Incident CRUD operations
@@ -13,19 +14,52 @@ def get_incidents(
     limit: int = 100,
     domain: Optional[str] = None,
     technology: Optional[str] = None,
-    purpose: Optional[str] = None
+    risk_level: Optional[str] = None
 ) -> List[Incident]:
     query = db.query(Incident)
     
     if domain:
-        query = query.filter(Incident.domain == domain)
+        query = query.filter(Incident.risk_domain == domain)
+    if risk_level:
+        query = query.filter(Incident.risk_level == risk_level)
     if technology:
-        query = query.filter(Incident.technologies.contains([technology]))
-    if purpose:
-        query = query.filter(Incident.purposes.contains([purpose]))
+        # Index lookup on incident_technology (case-insensitive)
+        query = query.filter(Incident.id.in_(
+            select(IncidentTechnology.incident_id).where(IncidentTechnology.tag == technology.strip())
+        ))
     
     return query.offset(skip).limit(limit).all()
 
+def technology_overlaps(db: Session, technologies: List[str]) -> Dict[int, float]:
+    """
+    Jaccard overlap (case-insensitive) between `technologies` and each incident's
+    technologies, computed on incident_technology. Incidents sharing no
+    technology are absent (overlap 0).
+    """
+    tags = {tag.strip().lower() for tag in technologies if isinstance(tag, str) and tag.strip()}
+    if not tags:
+        return {}
+    shared = dict(
+        db.query(IncidentTechnology.incident_id, func.count())
+        .filter(IncidentTechnology.tag.in_(tags))
+        .group_by(IncidentTechnology.incident_id)
+        .all()
+    )
+    if not shared:
+        return {}
+    sizes = dict(
+        db.query(IncidentTechnology.incident_id, func.count())
+        .filter(IncidentTechnology.incident_id.in_(
+            select(IncidentTechnology.incident_id).where(IncidentTechnology.tag.in_(tags))
+        ))
+        .group_by(IncidentTechnology.incident_id)
+        .all()
+    )
+    return {
+        incident_id: count / (len(tags) + sizes[incident_id] - count)
+        for incident_id, count in shared.items()
+    }
+
 def create_incident(db: Session, incident: IncidentCreate) -> Incident:
     db_incident = Incident(**incident.model_dump())
     db.add(db_incident)
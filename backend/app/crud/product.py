@@ -1,6 +1,12 @@
-from typing import List, Optional
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, or_, select, text
 from sqlalchemy.orm import Session
-from app.models.product import Product
+from app.core.config import settings
+from app.core.json_fields import decode_list
+from app.models.product import Product, ProductPurpose, ProductTechnology
 from app.schemas.product import ProductCreate, ProductUpdate
 
 def get_product(db: Session, product_id: int) -> Optional[Product]:
@@ -9,6 +15,184 @@ def get_product(db: Session, product_id: int) -> Optional[Product]:
 def get_products(db: Session, skip: int = 0, limit: int = 100) -> List[Product]:
     return db.query(Product).offset(skip).limit(limit).all()
 
+# bm25 column weights for products_fts(name, description): a name hit outranks a description hit
+SEARCH_NAME_WEIGHT = 10.0
+SEARCH_DESCRIPTION_WEIGHT = 1.0
+
+# Listing totals by (search, tag filters, products table version) (most recently used last)
+_count_cache: "OrderedDict[Tuple[Any, ...], int]" = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+# Decoded list fields by (id, updated_at) (most recently used last)
+_decoded_cache: "OrderedDict[Tuple[int, Any], Dict[str, list]]" = OrderedDict()
+_decoded_cache_lock = threading.Lock()
+LIST_FIELDS = ('technology', 'purpose', 'image_urls')
+
+def decoded_fields(product: Product) -> Dict[str, list]:
+    """technology, purpose and image_urls as lists, decoded once per product version (do not mutate)"""
+    key = (product.id, product.updated_at)
+    with _decoded_cache_lock:
+        fields = _decoded_cache.get(key)
+        if fields is not None:
+            _decoded_cache.move_to_end(key)
+            return fields
+    fields = {field: decode_list(getattr(product, field)) for field in LIST_FIELDS}
+    with _decoded_cache_lock:
+        _decoded_cache[key] = fields
+        _decoded_cache.move_to_end(key)
+        while len(_decoded_cache) > settings.PRODUCT_DECODE_CACHE_SIZE:
+            _decoded_cache.popitem(last=False)
+    return fields
+
+def fts_query(search: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every word of `search` as a prefix; None when it has no words"""
+    terms = re.findall(r"\w+", search.lower())
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+def _fts_match(db: Session, search: str) -> Optional[str]:
+    # No indexable words (or no FTS5): callers fall back to a substring scan
+    return fts_query(search) if db.get_bind().dialect.name == "sqlite" else None
+
+def _substring_filter(search: str):
+    return or_(Product.name.ilike(f"%{search}%"), Product.description.ilike(f"%{search}%"))
+
+def _tag_filters(technology: Optional[List[str]], purpose: Optional[List[str]]) -> List[Tuple[Any, List[str]]]:
+    """(tag table, tags) per requested field; a product matches a field if it has any of the tags"""
+    filters = []
+    for model, tags in ((ProductTechnology, technology), (ProductPurpose, purpose)):
+        tags = sorted({tag.strip() for tag in tags or [] if tag.strip()})
+        if tags:
+            filters.append((model, tags))
+    return filters
+
+def _filtered_query(db: Session, search: str, filters: List[Tuple[Any, List[str]]], *entities):
+    query = db.query(*entities) if entities else db.query(Product)
+    if search:
+        query = query.filter(_substring_filter(search))
+    for model, tags in filters:
+        # Index lookup on the tag table (case-insensitive)
+        query = query.filter(Product.id.in_(select(model.product_id).where(model.tag.in_(tags))))
+    return query
+
+def _fts_select(match: str, filters: List[Tuple[Any, List[str]]], columns: str) -> Tuple[str, Dict[str, Any], List[Any]]:
+    """SELECT over products_fts matches restricted by the tag filters: (sql, params, expanding bind params)"""
+    sql = f"SELECT {columns} FROM products_fts WHERE products_fts MATCH :match"
+    params: Dict[str, Any] = {'match': match}
+    expanding = []
+    for i, (model, tags) in enumerate(filters):
+        sql += f" AND rowid IN (SELECT product_id FROM {model.__tablename__} WHERE tag IN :tags_{i})"
+        params[f"tags_{i}"] = tags
+        expanding.append(bindparam(f"tags_{i}", expanding=True))
+    return sql, params, expanding
+
+def table_version(db: Session, name: str) -> Optional[int]:
+    """Change counter of a table, bumped by triggers on every insert, update and delete"""
+    if db.get_bind().dialect.name != "sqlite":
+        return None
+    return db.execute(text("SELECT version FROM table_versions WHERE name = :name"), {'name': name}).scalar()
+
+def count_products(
+    db: Session,
+    search: Optional[str] = None,
+    technology: Optional[List[str]] = None,
+    purpose: Optional[List[str]] = None
+) -> int:
+    """Number of products matching the search and tag filters, cached until the products table changes"""
+    search = search or ""
+    filters = _tag_filters(technology, purpose)
+    version = table_version(db, "products")
+    key = (search, tuple((model.__tablename__, tuple(tags)) for model, tags in filters), version)
+    if version is not None:
+        with _count_cache_lock:
+            total = _count_cache.get(key)
+            if total is not None:
+                _count_cache.move_to_end(key)
+                return total
+
+    match = _fts_match(db, search) if search else None
+    if match is not None:
+        sql, params, expanding = _fts_select(match, filters, "count(*)")
+        total = db.execute(text(sql).bindparams(*expanding), params).scalar()
+    else:
+        total = _filtered_query(db, search, filters, func.count(Product.id)).scalar()
+
+    if version is not None:
+        with _count_cache_lock:
+            _count_cache[key] = total
+            _count_cache.move_to_end(key)
+            while len(_count_cache) > settings.PRODUCT_COUNT_CACHE_SIZE:
+                _count_cache.popitem(last=False)
+    return total
+
+def list_products(
+    db: Session,
+    search: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    technology: Optional[List[str]] = None,
+    purpose: Optional[List[str]] = None
+) -> Tuple[List[Product], Optional[str]]:
+    """
+    One page of products (by id, or best match first when searching) and the
+    cursor of the next page, None on the last one. Given `after`, a previous
+    page's cursor, the page is found by seeking past it instead of skipping
+    `skip` rows, so deep pages cost the same as the first. Without `after`
+    the page still starts `skip` rows in: the OFFSET walks only the id index
+    (or the ranked matches when searching), but a jump to a deep page number
+    costs O(skip). Walk with the returned cursors to avoid that. Raises
+    ValueError for a malformed cursor.
+    """
+    filters = _tag_filters(technology, purpose)
+    match = _fts_match(db, search) if search else None
+    if match is not None:
+        return _search_page(db, match, filters, skip, limit, after)
+
+    query = _filtered_query(db, search or "", filters)
+    if after is not None:
+        query = query.filter(Product.id > int(after))
+    elif skip:
+        # Walk the id index alone to the page start and load only the page's rows
+        first_id = query.with_entities(Product.id).order_by(Product.id).offset(skip).limit(1).scalar_subquery()
+        query = query.filter(Product.id >= first_id)
+    products = query.order_by(Product.id).limit(limit + 1).all()
+    if len(products) <= limit:
+        return products, None
+    return products[:limit], str(products[limit - 1].id)
+
+def _search_page(
+    db: Session,
+    match: str,
+    filters: List[Tuple[Any, List[str]]],
+    skip: int,
+    limit: int,
+    after: Optional[str]
+) -> Tuple[List[Product], Optional[str]]:
+    """Full-text page ordered by (bm25 score, id); its cursor is "score:id" of the last row"""
+    sql, params, expanding = _fts_select(
+        match, filters, "rowid, bm25(products_fts, :name_weight, :description_weight) AS score"
+    )
+    params.update({
+        'name_weight': SEARCH_NAME_WEIGHT,
+        'description_weight': SEARCH_DESCRIPTION_WEIGHT,
+        'limit': limit + 1,
+        'skip': skip
+    })
+    if after is not None:
+        after_score, after_id = after.rsplit(":", 1)
+        params.update({'after_score': float(after_score), 'after_id': int(after_id), 'skip': 0})
+        sql = (
+            f"SELECT rowid, score FROM ({sql}) "
+            "WHERE score > :after_score OR (score = :after_score AND rowid > :after_id)"
+        )
+    statement = text(f"{sql} ORDER BY score, rowid LIMIT :limit OFFSET :skip").bindparams(*expanding)
+    rows = db.execute(statement, params).all()
+
+    next_cursor = f"{rows[limit - 1][1]!r}:{rows[limit - 1][0]}" if len(rows) > limit else None
+    ids = [row[0] for row in rows[:limit]]
+    products = {product.id: product for product in db.query(Product).filter(Product.id.in_(ids)).all()} if ids else {}
+    return [products[product_id] for product_id in ids if product_id in products], next_cursor
+
 def create_product(db: Session, product: ProductCreate) -> Product:
     db_product = Product(
         name=product.name,
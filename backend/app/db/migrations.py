@@ -0,0 +1,228 @@
+"""
+Schema Migrations
+SQLite objects that create_all cannot express (virtual tables, triggers) and
+changes to tables that already exist.
+Each migration runs once, in order, and is recorded in `schema_migrations`;
+init_db applies the pending ones after creating the tables.
+"""
+
+from datetime import datetime
+from typing import Callable, List, Tuple, Union
+
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.json_fields import canonical_list
+from app.core.log import get_logger
+from app.models.score import PairScore
+
+logger = get_logger(__name__)
+
+def _tag_table(tag_table: str, source_table: str, key: str, column: str) -> List[str]:
+    """Backfill and sync triggers copying a JSON-array TEXT column into a (key, tag) table"""
+    def tags_of(row: str, scan: str = "") -> str:
+        # Tags of a row's column; values that are not valid JSON contribute none
+        return (
+            f"SELECT {row}.id, trim(tag.value) FROM {scan}json_each("
+            f"CASE WHEN json_valid({row}.{column}) THEN {row}.{column} ELSE '[]' END) AS tag "
+            "WHERE tag.type = 'text' AND trim(tag.value) != ''"
+        )
+
+    insert = f"INSERT OR IGNORE INTO {tag_table} ({key}, tag) "
+    return [
+        f"DELETE FROM {tag_table}",
+        insert + tags_of(source_table, scan=f"{source_table}, "),
+        f"CREATE TRIGGER IF NOT EXISTS {tag_table}_ai AFTER INSERT ON {source_table} BEGIN "
+        f"{insert}{tags_of('new')}; "
+        "END",
+        f"CREATE TRIGGER IF NOT EXISTS {tag_table}_au AFTER UPDATE OF {column} ON {source_table} BEGIN "
+        f"DELETE FROM {tag_table} WHERE {key} = old.id; "
+        f"{insert}{tags_of('new')}; "
+        "END",
+        f"CREATE TRIGGER IF NOT EXISTS {tag_table}_ad AFTER DELETE ON {source_table} BEGIN "
+        f"DELETE FROM {tag_table} WHERE {key} = old.id; "
+        "END",
+    ]
+
+def _canonicalize_product_lists(conn: Connection) -> None:
+    """Rewrite technology, purpose and image_urls of legacy rows as plain JSON arrays"""
+    updates = []
+    for product_id, *values in conn.exec_driver_sql("SELECT id, technology, purpose, image_urls FROM products"):
+        canonical = [canonical_list(value) for value in values]
+        if canonical != values:
+            updates.append((*canonical, product_id))
+    if updates:
+        # Leaves updated_at alone: the content is unchanged, only its encoding
+        conn.exec_driver_sql("UPDATE products SET technology = ?, purpose = ?, image_urls = ? WHERE id = ?", updates)
+    logger.info("Canonicalized list fields of %d products", len(updates))
+
+def _rebuild_pair_scores(conn: Connection) -> None:
+    """
+    Bring a pair_scores table created before generic scores were stored up to
+    the current schema: the dimensions become nullable and the generic and
+    per-mode timestamp columns are added. Existing rows are PRISM scores.
+    """
+    columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(pair_scores)")}
+    if not columns or 'generic_scored_at' in columns:
+        return  # Created by create_all with the current schema
+    conn.exec_driver_sql("ALTER TABLE pair_scores RENAME TO pair_scores_old")
+    # Index names stay taken by the renamed table
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_pair_scores_id")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_pair_scores_product_id")
+    PairScore.__table__.create(conn)
+    copied = (
+        "id, product_id, incident_id, logical_coherence, factual_accuracy, practical_implementability, "
+        "contextual_relevance, impact, exploitability, overall_score, weight_profile, reasoning, source, updated_at"
+    )
+    conn.exec_driver_sql(
+        f"INSERT INTO pair_scores ({copied}, prism_scored_at) SELECT {copied}, updated_at FROM pair_scores_old"
+    )
+    conn.exec_driver_sql("DROP TABLE pair_scores_old")
+    logger.info("Rebuilt pair_scores with the generic score columns")
+
+# /api/stats counters: name -> SQL counting it from scratch
+SYSTEM_STAT_COUNTS = {
+    'total_products': "SELECT count(*) FROM products",
+    'total_incidents': "SELECT count(*) FROM incidents",
+    'total_mappings': "SELECT count(*) FROM incident_product_mappings",
+    'products_with_images': "SELECT count(*) FROM products WHERE image_urls != '[]' AND image_urls != ''",
+    'human_validated_mappings': "SELECT count(*) FROM incident_product_mappings WHERE is_human_validated = 1",
+}
+
+def recount_system_stats(conn: Connection) -> None:
+    """Reset the system_stats counters from full counts (caller commits)"""
+    for name, count in SYSTEM_STAT_COUNTS.items():
+        conn.exec_driver_sql(
+            f"INSERT OR REPLACE INTO system_stats (name, value) VALUES (?, ({count}))",
+            (name,)
+        )
+
+def _stat_delta(name: str, delta: str) -> str:
+    return f"UPDATE system_stats SET value = value + ({delta}) WHERE name = '{name}'; "
+
+# Row flags matching the conditional counts above (NULL counts as not matching)
+_HAS_IMAGES = "coalesce({row}.image_urls != '[]' AND {row}.image_urls != '', 0)"
+_VALIDATED = "coalesce({row}.is_human_validated = 1, 0)"
+
+# (name, steps); a step is an SQL statement or a function of the connection.
+# Append new migrations, never edit applied ones
+MIGRATIONS: List[Tuple[str, List[Union[str, Callable[[Connection], None]]]]] = [
+    ("0001_products_fts", [
+        # External-content index over products(name, description), searched with bm25 ranking
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, description, content='products', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); "
+        "END",
+        # Index the products that existed before the triggers
+        "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+    ]),
+    ("0002_table_versions", [
+        # Per-table change counters; cached aggregates are keyed on them
+        "CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)",
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('products', 0)",
+        "CREATE TRIGGER IF NOT EXISTS products_version_ai AFTER INSERT ON products BEGIN "
+        "UPDATE table_versions SET version = version + 1 WHERE name = 'products'; "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS products_version_ad AFTER DELETE ON products BEGIN "
+        "UPDATE table_versions SET version = version + 1 WHERE name = 'products'; "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS products_version_au AFTER UPDATE ON products BEGIN "
+        "UPDATE table_versions SET version = version + 1 WHERE name = 'products'; "
+        "END",
+    ]),
+    # Normalized tag tables (created by create_all) so tag filters and overlaps run on indexes
+    ("0003_tag_tables",
+        _tag_table("product_technology", "products", "product_id", "technology")
+        + _tag_table("product_purpose", "products", "product_id", "purpose")
+        + _tag_table("incident_technology", "incidents", "incident_id", "technologies")),
+    # Tag tables are resynced by their update triggers
+    ("0004_canonical_product_lists", [_canonicalize_product_lists]),
+    ("0005_mapping_indexes", [
+        # Same definition as comprehensive_migration.create_tables (not an ORM table), so a
+        # fresh database has it and the import script's CREATE TABLE IF NOT EXISTS keeps it
+        "CREATE TABLE IF NOT EXISTS incident_product_mappings ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, incident_id INTEGER, product_id INTEGER, "
+        "mapping_confidence REAL, transferability_score REAL, is_human_validated BOOLEAN, "
+        "created_at TEXT NOT NULL, "
+        "FOREIGN KEY (incident_id) REFERENCES incidents (id), "
+        "FOREIGN KEY (product_id) REFERENCES products (id))",
+        # A product's mappings, best first; covers the incident ids
+        "CREATE INDEX IF NOT EXISTS ix_mappings_product_score "
+        "ON incident_product_mappings (product_id, transferability_score, incident_id)",
+        # An incident's mappings; covers the product ids
+        "CREATE INDEX IF NOT EXISTS ix_mappings_incident_product "
+        "ON incident_product_mappings (incident_id, product_id)",
+        # Validated counts and listings
+        "CREATE INDEX IF NOT EXISTS ix_mappings_validated "
+        "ON incident_product_mappings (is_human_validated, product_id)",
+    ]),
+    ("0006_system_stats", [
+        # Counters kept current by triggers so /api/stats is one small read
+        "CREATE TABLE IF NOT EXISTS system_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_products_ai AFTER INSERT ON products BEGIN "
+        + _stat_delta('total_products', "1")
+        + _stat_delta('products_with_images', _HAS_IMAGES.format(row="new"))
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_products_ad AFTER DELETE ON products BEGIN "
+        + _stat_delta('total_products', "-1")
+        + _stat_delta('products_with_images', "-" + _HAS_IMAGES.format(row="old"))
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_products_au AFTER UPDATE OF image_urls ON products BEGIN "
+        + _stat_delta('products_with_images', f"{_HAS_IMAGES.format(row='new')} - {_HAS_IMAGES.format(row='old')}")
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_incidents_ai AFTER INSERT ON incidents BEGIN "
+        + _stat_delta('total_incidents', "1")
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_incidents_ad AFTER DELETE ON incidents BEGIN "
+        + _stat_delta('total_incidents', "-1")
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_mappings_ai AFTER INSERT ON incident_product_mappings BEGIN "
+        + _stat_delta('total_mappings', "1")
+        + _stat_delta('human_validated_mappings', _VALIDATED.format(row="new"))
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_mappings_ad AFTER DELETE ON incident_product_mappings BEGIN "
+        + _stat_delta('total_mappings', "-1")
+        + _stat_delta('human_validated_mappings', "-" + _VALIDATED.format(row="old"))
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS system_stats_mappings_au AFTER UPDATE OF is_human_validated ON incident_product_mappings BEGIN "
+        + _stat_delta('human_validated_mappings', f"{_VALIDATED.format(row='new')} - {_VALIDATED.format(row='old')}")
+        + "END",
+        recount_system_stats,
+    ]),
+    ("0007_pair_scores_generic_columns", [_rebuild_pair_scores]),
+]
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations; returns the names applied"""
+    if engine.dialect.name != "sqlite":
+        return []
+    applied_now = []
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)"
+        )
+        applied = {row[0] for row in conn.exec_driver_sql("SELECT name FROM schema_migrations")}
+        for name, steps in MIGRATIONS:
+            if name in applied:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.exec_driver_sql(step)
+            conn.exec_driver_sql(
+                "INSERT INTO schema_migrations (name, applied_at) VALUES (?, ?)",
+                (name, datetime.utcnow().isoformat())
+            )
+            applied_now.append(name)
+    if applied_now:
+        logger.info("Applied schema migrations: %s", ", ".join(applied_now))
+    return applied_now
@@ -1,8 +1,17 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import products, incidents, stats, suggestions, prism
+from app.api import deps
+from app.api.endpoints import products, incidents, stats, suggestions, prism, metrics
+from app.core import log
 from app.core.config import settings
 from app.db.init_db import init_db
+from app.services import llm_client
+from app.services.explanation_service import explanation_precomputer
+from app.services.index_classifier import index_classifier
+
+log.setup_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -18,18 +27,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag every log line of a request with its trace id (echoed back as X-Request-ID)
+@app.middleware("http")
+async def trace_id_middleware(request: Request, call_next):
+    trace_id = request.headers.get("X-Request-ID") or log.new_trace_id()
+    log.set_trace_id(trace_id)
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = trace_id
+    return response
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    # Pick up scoring jobs interrupted by the last shutdown
+    prism.job_runner.resume_pending_jobs()
+    # Train the /predict-indices classifier in the background
+    index_classifier.refresh()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Running job items and precomputes finish before their clients are closed;
+    # queued ones are dropped (jobs resume from their checkpoints on restart)
+    await asyncio.to_thread(prism.job_runner.shutdown, wait=True)
+    await asyncio.to_thread(explanation_precomputer.shutdown, wait=True, cancel_queued=True)
+    await llm_client.close_clients()
 
 # Include routers with correct prefix structure
 # The frontend expects /api/* endpoints, not /api/v1/*
-app.include_router(products.router, prefix="/api/products", tags=["products"])
-app.include_router(incidents.router, prefix="/api/incidents", tags=["incidents"])
+# Routers that call the LLM tag their calls with the route for telemetry
+llm_endpoint = [Depends(deps.tag_llm_endpoint)]
+app.include_router(products.router, prefix="/api/products", tags=["products"], dependencies=llm_endpoint)
+app.include_router(incidents.router, prefix="/api/incidents", tags=["incidents"], dependencies=llm_endpoint)
 app.include_router(stats.router, prefix="/api", tags=["stats"])
 app.include_router(suggestions.router, prefix="/api", tags=["suggestions"])
-app.include_router(prism.router, prefix="/api/prism", tags=["prism"])
+app.include_router(prism.router, prefix="/api/prism", tags=["prism"], dependencies=llm_endpoint)
+app.include_router(metrics.router, tags=["metrics"])
 
 @app.get("/")
 def root():
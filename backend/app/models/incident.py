@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, JSON, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -22,6 +22,16 @@ class Incident(Base):
     # Relationships
     evaluations = relationship("Evaluation", back_populates="incident")
 
+class IncidentTechnology(Base):
+    """One technology tag of an incident (case-insensitive); rows are maintained by triggers on incidents"""
+    __tablename__ = "incident_technology"
+    __table_args__ = (
+        Index("ix_incident_technology_tag", "tag", "incident_id"),
+    )
+
+    incident_id = Column(Integer, ForeignKey("incidents.id"), primary_key=True)
+    tag = Column(String(collation="NOCASE"), primary_key=True)
+
 class Evaluation(Base):
     __tablename__ = "evaluations"
 
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
+from app.db.base_class import Base
+from datetime import datetime
+
+class ScoringJob(Base):
+    __tablename__ = "scoring_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued/running/completed/failed
+    mode = Column(String, nullable=False, default="prism")     # prism/generic
+    top_k = Column(Integer, nullable=False, default=30)        # Incidents scored per product
+    context = Column(Text, default="")
+    product_ids = Column(Text)        # JSON array of product ids, NULL means all products
+    total_items = Column(Integer, default=0)
+    completed_items = Column(Integer, default=0)
+    failed_items = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ScoringJobItem(Base):
+    """One product of a scoring job - the unit of work and of checkpointing"""
+    __tablename__ = "scoring_job_items"
+    __table_args__ = (
+        Index("ix_scoring_job_items_job_status", "job_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("scoring_jobs.id"), nullable=False)
+    product_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending/running/done/failed
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ScoringJobResult(Base):
+    __tablename__ = "scoring_job_results"
+    __table_args__ = (
+        Index("ix_scoring_job_results_job_product", "job_id", "product_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("scoring_jobs.id"), nullable=False)
+    product_id = Column(Integer, nullable=False)
+    incident_id = Column(Integer, nullable=False)
+    confidence_score = Column(Float)           # Generic mode (1-100)
+    logical_coherence = Column(Float)          # PRISM mode (1-100)
+    factual_accuracy = Column(Float)
+    practical_implementability = Column(Float)
+    contextual_relevance = Column(Float)
+    impact = Column(Float)
+    exploitability = Column(Float)
+    overall_score = Column(Float)
+    reasoning = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
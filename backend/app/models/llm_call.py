@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index
+from app.db.base_class import Base
+from datetime import datetime
+
+class LLMCall(Base):
+    """One LLM request as seen by the scorer, including its retries"""
+    __tablename__ = "llm_calls"
+    __table_args__ = (
+        Index("ix_llm_calls_endpoint_agent", "endpoint", "agent"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    endpoint = Column(String)          # API route (or background job) that made the call
+    agent = Column(String)             # router/scorer/generic/bulk_generic/bulk_prism/...
+    model = Column(String)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    latency_ms = Column(Float)         # Wall time across all attempts
+    retries = Column(Integer)          # Attempts beyond the first
+    success = Column(Boolean)
+    parse_ok = Column(Boolean)         # NULL for free-text calls
+    cost_usd = Column(Float)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
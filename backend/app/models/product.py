@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, Text
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -18,4 +18,24 @@ class Product(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    evaluations = relationship("Evaluation", back_populates="product") 
\ No newline at end of file
+    evaluations = relationship("Evaluation", back_populates="product") 
+
+class ProductTechnology(Base):
+    """One technology tag of a product (case-insensitive); rows are maintained by triggers on products"""
+    __tablename__ = "product_technology"
+    __table_args__ = (
+        Index("ix_product_technology_tag", "tag", "product_id"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    tag = Column(String(collation="NOCASE"), primary_key=True)
+
+class ProductPurpose(Base):
+    """One purpose tag of a product (case-insensitive); rows are maintained by triggers on products"""
+    __tablename__ = "product_purpose"
+    __table_args__ = (
+        Index("ix_product_purpose_tag", "tag", "product_id"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    tag = Column(String(collation="NOCASE"), primary_key=True)
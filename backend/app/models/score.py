@@ -0,0 +1,67 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, UniqueConstraint
+from app.db.base_class import Base
+from datetime import datetime
+
+class PairScore(Base):
+    """Latest stored PRISM and generic scores (1-100 scale) for one product-incident pair"""
+    __tablename__ = "pair_scores"
+    __table_args__ = (
+        UniqueConstraint("product_id", "incident_id", name="uq_pair_scores_product_incident"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, nullable=False, index=True)
+    incident_id = Column(Integer, nullable=False)
+    # PRISM dimensions (NULL until the pair is PRISM-scored)
+    logical_coherence = Column(Float)
+    factual_accuracy = Column(Float)
+    practical_implementability = Column(Float)
+    contextual_relevance = Column(Float)
+    impact = Column(Float)
+    exploitability = Column(Float)
+    overall_score = Column(Float)
+    weight_profile = Column(String)   # Profile the overall score was computed with
+    reasoning = Column(Text)
+    prism_scored_at = Column(DateTime)
+    # Generic confidence (NULL until the pair is generic-scored)
+    confidence_score = Column(Float)
+    generic_reasoning = Column(Text)
+    generic_scored_at = Column(DateTime)
+    source = Column(String)           # job/bulk/...
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class WeightProfile(Base):
+    """Analyst-defined dimension weights; built-in profiles live in code"""
+    __tablename__ = "weight_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
+    weights = Column(Text, nullable=False)  # JSON object of dimension -> weight
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ActiveWeightProfile(Base):
+    """Single row naming the profile stored and served overall scores are computed with"""
+    __tablename__ = "active_weight_profile"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PairExplanation(Base):
+    """Stored LLM explanation for one product-incident pair and explanation mode"""
+    __tablename__ = "pair_explanations"
+    __table_args__ = (
+        UniqueConstraint("product_id", "incident_id", "mode", name="uq_pair_explanations_pair_mode"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, nullable=False, index=True)
+    incident_id = Column(Integer, nullable=False)
+    mode = Column(String, nullable=False)              # generic/full_prism
+    # updated_at of the product and incident it was generated from; a mismatch means stale
+    product_version = Column(String, nullable=False)
+    incident_version = Column(String, nullable=False)
+    explanation = Column(Text, nullable=False)
+    source = Column(String)                            # request/precompute
+    created_at = Column(DateTime, default=datetime.utcnow)
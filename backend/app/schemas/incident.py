@@ -74,4 +74,5 @@ class IncidentRetrievalResponse(BaseModel):
     page: int
     page_size: int
     sort_by: str
-    risk_domain: Optional[str] = None 
\ No newline at end of file
+    risk_domain: Optional[str] = None
+    partial: bool = False  # True when the deadline stopped ranking early 
\ No newline at end of file
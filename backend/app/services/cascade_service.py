@@ -0,0 +1,152 @@
+"""
+Cascade (Tiered) Scoring
+Screens every candidate cheaply with local text similarity plus one bulk
+generic LLM call, then runs the expensive router + scorer PRISM path only for
+incidents above the screen threshold or in the top-K. Everything else keeps
+its screen score, marked with tier "screen".
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.services.retrieval_service import calculate_text_similarity, calculate_technology_overlap
+
+logger = get_logger(__name__)
+
+PRISM_DIMENSIONS = [
+    'logical_coherence',
+    'factual_accuracy',
+    'practical_implementability',
+    'contextual_relevance',
+    'impact',
+    'exploitability',
+]
+
+def to_percent_scale(score: float) -> float:
+    """Map a 1-5 PRISM score onto the 1-100 scale of the bulk endpoints"""
+    return round((float(score) - 1) * 99 / 4 + 1, 1)
+
+def screen_similarity(product_data: Dict[str, Any], incident: Dict[str, Any]) -> float:
+    """Local 0-1 similarity; technology overlap is used only when both sides list technologies"""
+    product_text = f"{product_data.get('name', '')} {product_data.get('description', '')}"
+    incident_text = f"{incident.get('title', '')} {incident.get('description', '')}"
+    text_similarity = calculate_text_similarity(product_text, incident_text)
+
+    product_tech = product_data.get('technology') or []
+    incident_tech = incident.get('technologies') or []
+    if product_tech and incident_tech:
+        return text_similarity * 0.4 + calculate_technology_overlap(product_tech, incident_tech) * 0.6
+    return text_similarity
+
+def screen_score(generic_score: float, similarity: float) -> float:
+    """Blend the 1-100 generic LLM score with the 0-1 local similarity"""
+    weight = settings.CASCADE_SIMILARITY_WEIGHT
+    return round(generic_score * (1 - weight) + similarity * 100 * weight, 1)
+
+def cascade_bulk_scores(
+    scorer,
+    incidents: List[Dict[str, Any]],
+    product_data: Dict[str, Any],
+    context: str,
+    threshold: Optional[float] = None,
+    top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Score incidents in two tiers; results keep the input order and are on the 1-100 scale.
+    Escalated incidents carry the full six PRISM dimensions (tier "full").
+    """
+    threshold = settings.CASCADE_THRESHOLD if threshold is None else threshold
+    top_k = settings.CASCADE_TOP_K if top_k is None else top_k
+
+    generic_scores = {
+        str(score['incident_id']): score
+        for score in scorer.bulk_calculate_generic_scores(incidents, product_data, context)
+    }
+
+    screened = []
+    for incident in incidents:
+        generic = generic_scores.get(str(incident['id']), {})
+        generic_score = float(generic.get('confidence_score', 50))
+        screened.append({
+            'incident_id': incident['id'],
+            'confidence_score': generic_score,
+            'screen_score': screen_score(generic_score, screen_similarity(product_data, incident)),
+            'reasoning': generic.get('reasoning', 'Generic analysis'),
+            **({'degraded': True} if generic.get('degraded') else {})
+        })
+
+    ranked = sorted(range(len(screened)), key=lambda i: screened[i]['screen_score'], reverse=True)
+    if any(screen.get('degraded') for screen in screened):
+        # The LLM gateway is unavailable, so there is no full tier to escalate to
+        escalate = set()
+    else:
+        escalate = {i for rank, i in enumerate(ranked) if rank < top_k or screened[i]['screen_score'] >= threshold}
+    logger.info("Cascade: %d of %d incidents escalated to full PRISM scoring", len(escalate), len(incidents))
+
+    full_results = _score_full(scorer, [incidents[i] for i in sorted(escalate)], product_data, context)
+
+    results = []
+    for i, screen in enumerate(screened):
+        full = full_results.get(str(screen['incident_id'])) if i in escalate else None
+        if full is None:
+            results.append({**screen, 'overall_score': screen['screen_score'], 'tier': 'screen'})
+        else:
+            results.append({**screen, **full, 'tier': 'full'})
+    return results
+
+def _score_full(scorer, incidents: List[Dict[str, Any]], product_data: Dict[str, Any], context: str) -> Dict[str, Dict[str, Any]]:
+    """Run the router + scorer path for each escalated incident concurrently"""
+    if not incidents:
+        return {}
+
+    def score(incident: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            result = scorer.calculate_authentic_prism_scores(
+                {'system_name': incident.get('title', 'Incident Analysis'),
+                 'description': incident.get('description', ''),
+                 'context': context},
+                product_data
+            )
+        except Exception as e:
+            logger.warning("Cascade: full PRISM scoring failed for incident %s: %s", incident['id'], e)
+            return None
+        if result.get('degraded'):
+            return None
+        scores = result.get('prism_scores', {})
+        rationales = result.get('prism_rationales', {})
+        full = {dimension: to_percent_scale(scores.get(dimension, 3)) for dimension in PRISM_DIMENSIONS}
+        full['overall_score'] = to_percent_scale(result.get('transferability_score', 3.0))
+        full['reasoning'] = "; ".join(
+            f"{dimension.replace('_', ' ').title()}: {rationale}" for dimension, rationale in rationales.items()
+        ) or 'PRISM analysis'
+        return full
+
+    # Worker threads inherit the request context so telemetry keeps the endpoint label
+    with ThreadPoolExecutor(max_workers=settings.CASCADE_MAX_WORKERS) as executor:
+        futures = {
+            str(incident['id']): executor.submit(contextvars.copy_context().run, score, incident)
+            for incident in incidents
+        }
+        results = {incident_id: future.result() for incident_id, future in futures.items()}
+    return {incident_id: result for incident_id, result in results.items() if result is not None}
+
+def cascade_pair_score(scorer, incident_data: Dict[str, Any], product_data: Dict[str, Any], threshold: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Single-pair cascade: one generic call first, the two-agent PRISM path only
+    when the screen score reaches the threshold. Scores stay on the 1-5 scale.
+    """
+    threshold = settings.CASCADE_THRESHOLD if threshold is None else threshold
+
+    generic = scorer.calculate_generic_confidence_score(incident_data, product_data)
+    generic_score = float(generic.get('confidence_score', 3.0))
+    similarity = screen_similarity(product_data, {'description': incident_data.get('description', '')})
+    screened = screen_score(to_percent_scale(generic_score), similarity)
+
+    if screened < threshold or generic.get('degraded'):
+        return {**generic, 'screen_score': screened, 'tier': 'screen'}
+
+    result = scorer.calculate_authentic_prism_scores(incident_data, product_data)
+    return {**result, 'screen_score': screened, 'tier': 'full'}
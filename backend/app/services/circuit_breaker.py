@@ -0,0 +1,129 @@
+"""
+LLM Gateway Circuit Breaker
+After repeated gateway failures (connection errors, timeouts, 5xx) the circuit
+opens and LLM calls fail immediately with CircuitOpenError, so requests fall
+back to degraded scores instead of waiting out the retry schedule. While open,
+a background thread probes the gateway once per cooldown and closes the
+circuit on the first success.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import openai
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.services.llm_client import get_openai_client
+
+logger = get_logger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the gateway while the circuit is open"""
+
+def is_gateway_failure(error: Exception) -> bool:
+    """Outage-type errors; 429s, bad requests and parse errors do not count"""
+    if isinstance(error, openai.APIConnectionError):  # Includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a background recovery probe"""
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        cooldown_s: float,
+        probe: Optional[Callable[[], Any]] = None,
+        name: str = "llm_gateway"
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.probe = probe
+        self.name = name
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._probe_thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        """Fail fast while the circuit is open"""
+        opened_at = self._opened_at
+        if opened_at is not None:
+            raise CircuitOpenError(
+                f"LLM gateway circuit open for {time.time() - opened_at:.0f}s after repeated failures"
+                f" ({self._last_error}); failing fast until a recovery probe succeeds"
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self, error: Exception) -> None:
+        if not self.enabled or not is_gateway_failure(error):
+            return
+        with self._lock:
+            self._failures += 1
+            self._last_error = f"{type(error).__name__}: {error}"
+            if self._opened_at is not None or self._failures < self.failure_threshold:
+                return
+            self._opened_at = time.time()
+            logger.warning("Circuit breaker '%s' opened after %d consecutive failures: %s", self.name, self._failures, self._last_error)
+            self._probe_thread = threading.Thread(target=self._probe_until_recovered, name=f"{self.name}-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_until_recovered(self) -> None:
+        while True:
+            time.sleep(self.cooldown_s)
+            try:
+                if self.probe is not None:
+                    self.probe()
+            except Exception as e:
+                logger.warning("Circuit breaker '%s' probe failed, staying open: %s", self.name, e)
+                with self._lock:
+                    self._last_error = f"{type(e).__name__}: {e}"
+                continue
+            with self._lock:
+                open_for = time.time() - (self._opened_at or time.time())
+                self._failures = 0
+                self._opened_at = None
+            logger.info("Circuit breaker '%s' closed after %.0fs: recovery probe succeeded", self.name, open_for)
+            return
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': "open" if self._opened_at is not None else "closed",
+                'consecutive_failures': self._failures,
+                'open_for_s': round(time.time() - self._opened_at, 1) if self._opened_at is not None else 0.0,
+                'last_error': self._last_error,
+            }
+
+def probe_gateway() -> None:
+    """Smallest possible chat completion, with a short timeout"""
+    get_openai_client().chat.completions.create(
+        model=settings.OPENAI_MODEL,
+        messages=[{"role": "user", "content": "ping"}],
+        max_tokens=1,
+        timeout=settings.LLM_CIRCUIT_PROBE_TIMEOUT_S
+    )
+
+# Process-wide breaker shared by every PRISMScorer instance
+llm_circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+    cooldown_s=settings.LLM_CIRCUIT_COOLDOWN_S,
+    probe=probe_gateway
+)
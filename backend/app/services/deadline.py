@@ -0,0 +1,99 @@
+"""
+Request Deadline Budgets
+A caller-supplied latency budget (X-Deadline-Ms header or deadline_ms
+parameter) is kept in a context variable for the request. LLM calls, their
+retries, rate-limit queueing and chunked sub-calls all read the remaining time
+from it, so an endpoint can stop at the deadline and return partial results.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting work that cannot finish before the deadline"""
+
+class Deadline:
+    """Absolute monotonic deadline; `partial` records that some work was cut short"""
+
+    def __init__(self, timeout_ms: float):
+        self.timeout_ms = timeout_ms
+        self.expires_at = time.monotonic() + timeout_ms / 1000
+        self.partial = False
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+# Set per request by deps.get_deadline and inherited by threadpool calls.
+# The Deadline object is shared, so worker threads can mark the request partial.
+current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline", default=None)
+
+def start(timeout_ms: Optional[float]) -> Optional[Deadline]:
+    """Begin a deadline for the current context (None clears it)"""
+    budget = Deadline(timeout_ms) if timeout_ms else None
+    current_deadline.set(budget)
+    return budget
+
+def current() -> Optional[Deadline]:
+    return current_deadline.get()
+
+def remaining() -> Optional[float]:
+    """Seconds left, or None when the request has no deadline"""
+    budget = current_deadline.get()
+    return budget.remaining() if budget else None
+
+def expired() -> bool:
+    budget = current_deadline.get()
+    return budget is not None and budget.expired()
+
+def check() -> None:
+    """Raise DeadlineExceeded (and mark the request partial) once the deadline has passed"""
+    budget = current_deadline.get()
+    if budget is not None and budget.expired():
+        budget.partial = True
+        raise DeadlineExceeded(f"Deadline of {budget.timeout_ms:.0f}ms exceeded")
+
+def mark_partial() -> None:
+    budget = current_deadline.get()
+    if budget is not None:
+        budget.partial = True
+
+def stop_at_deadline(retry_state) -> bool:
+    """Tenacity stop: give up when the next backoff would end past the deadline"""
+    left = remaining()
+    if left is None:
+        return False
+    return (retry_state.upcoming_sleep or 0) >= left
+
+def map_chunks(
+    fn: Callable[[List[T]], R],
+    items: Sequence[T],
+    chunk_size: int,
+    max_workers: int
+) -> List[Tuple[List[T], Optional[R]]]:
+    """
+    Run `fn` over chunks of `items` concurrently and return (chunk, result) pairs.
+    Without a deadline every chunk is awaited; with one, chunks still running
+    at the deadline get a None result and are left to finish in the background
+    (their own LLM calls stop at the same deadline).
+    """
+    chunks = [list(items[start:start + chunk_size]) for start in range(0, len(items), chunk_size)]
+    if not chunks:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))), thread_name_prefix="deadline-chunk")
+    try:
+        futures = [executor.submit(contextvars.copy_context().run, fn, chunk) for chunk in chunks]
+        done, not_done = wait(futures, timeout=remaining())
+        if not_done:
+            mark_partial()
+        return [(chunk, future.result() if future in done else None) for chunk, future in zip(chunks, futures)]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
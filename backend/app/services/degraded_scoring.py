@@ -0,0 +1,60 @@
+"""
+Degraded Scoring
+Local estimates served while the LLM gateway circuit is open. Scores come
+from the same text/technology similarity used for retrieval and cascade
+screening, in the layouts the scorer normally returns, and carry
+`degraded: True` so callers can label them and never store them.
+"""
+
+from typing import Any, Dict, List
+
+from app.services.cascade_service import PRISM_DIMENSIONS, screen_similarity
+
+DEGRADED_REASONING = "Degraded: LLM gateway unavailable; estimate from retrieval similarity"
+
+def percent_estimate(product_data: Dict[str, Any], incident: Dict[str, Any]) -> float:
+    """1-100 estimate from the 0-1 local similarity"""
+    return round(1 + screen_similarity(product_data, incident) * 99, 1)
+
+def bulk_scores(incidents: List[Dict[str, Any]], product_data: Dict[str, Any], mode: str) -> List[Dict[str, Any]]:
+    """Bulk-endpoint results (1-100); PRISM and dual modes use the estimate for every dimension"""
+    results = []
+    for incident in incidents:
+        estimate = percent_estimate(product_data, incident)
+        entry = {'incident_id': incident['id']}
+        if mode in ("generic", "dual"):
+            entry['confidence_score'] = estimate
+        if mode != "generic":
+            entry.update({dimension: estimate for dimension in PRISM_DIMENSIONS})
+            entry['overall_score'] = estimate
+        entry.update({'reasoning': DEGRADED_REASONING, 'degraded': True})
+        results.append(entry)
+    return results
+
+def generic_result(incident_data: Dict[str, Any], product_data: Dict[str, Any]) -> Dict[str, Any]:
+    """calculate_generic_confidence_score layout (1-5)"""
+    similarity = screen_similarity(product_data, {'description': incident_data.get('description', '')})
+    score = round(1 + similarity * 4, 2)
+    return {
+        'transferability_score': score,
+        'confidence_score': score,
+        'reasoning': DEGRADED_REASONING,
+        'scoring_method': 'degraded_similarity',
+        'degraded': True
+    }
+
+def prism_result(incident_data: Dict[str, Any], product_data: Dict[str, Any]) -> Dict[str, Any]:
+    """calculate_authentic_prism_scores layout (1-5)"""
+    similarity = screen_similarity(product_data, {'description': incident_data.get('description', '')})
+    score = round(1 + similarity * 4, 2)
+    return {
+        'prism_scores': {dimension: score for dimension in PRISM_DIMENSIONS},
+        'prism_rationales': {dimension: DEGRADED_REASONING for dimension in PRISM_DIMENSIONS},
+        'transferability_score': score,
+        'application_domain': 'General AI',
+        'risk_type': 'Unclassified',
+        'risk_justification': DEGRADED_REASONING,
+        'confidence_score': 0.3,  # Low confidence for a similarity-only estimate
+        'scoring_method': 'degraded_similarity',
+        'degraded': True
+    }
@@ -0,0 +1,127 @@
+"""
+Reviewer Ensemble Scoring
+Scores one product-incident pair with several reviewer personas in concurrent
+waves and aggregates their 1-5 dimension scores by median. Once every
+dimension's spread across reviewers is within the tolerance, no further
+persona calls are issued.
+"""
+
+import contextvars
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.services import degraded_scoring
+from app.services.circuit_breaker import llm_circuit_breaker
+
+logger = get_logger(__name__)
+
+SCORER_DIMENSIONS = {
+    'Logical Coherence': 'logical_coherence',
+    'Factual Accuracy': 'factual_accuracy',
+    'Practical Implementability': 'practical_implementability',
+    'Contextual Relevance': 'contextual_relevance',
+    'Impact': 'impact',
+    'Exploitability': 'exploitability',
+}
+
+def parse_review(output: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Dimension scores and rationales from a scorer-format reply; None if any score is missing"""
+    scores = {}
+    rationales = {}
+    for dimension, mapped_name in SCORER_DIMENSIONS.items():
+        value = output.get(dimension)
+        if not isinstance(value, list) or not value:
+            return None
+        try:
+            scores[mapped_name] = min(5.0, max(1.0, float(value[0])))
+        except (TypeError, ValueError):
+            return None
+        rationales[mapped_name] = value[1] if len(value) > 1 else ""
+    return {'scores': scores, 'rationales': rationales}
+
+def score_spread(reviews: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Max minus min of each dimension across reviewers"""
+    return {
+        dimension: max(r['scores'][dimension] for r in reviews) - min(r['scores'][dimension] for r in reviews)
+        for dimension in SCORER_DIMENSIONS.values()
+    }
+
+def ensemble_scores(
+    scorer,
+    incident_data: Dict[str, Any],
+    product_data: Dict[str, Any],
+    personas: Optional[List[str]] = None,
+    tolerance: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run persona reviewers wave by wave (each wave concurrently) until they agree.
+    Returns the median scores in the calculate_authentic_prism_scores layout plus
+    the individual reviews and per-dimension spread.
+    """
+    tolerance = settings.ENSEMBLE_TOLERANCE if tolerance is None else tolerance
+    if personas:
+        unknown = [p for p in personas if p not in scorer.reviewer_persona]
+        if unknown:
+            raise ValueError(f"Unknown reviewer personas: {', '.join(unknown)}")
+    else:
+        personas = list(scorer.reviewer_persona)[:settings.ENSEMBLE_MAX_PERSONAS]
+
+    is1 = incident_data.get('system_name', 'Unknown System')
+    id1 = incident_data.get('description', '')
+    pd1 = product_data.get('description', '')
+
+    def review(persona: str) -> Optional[Dict[str, Any]]:
+        try:
+            output = scorer.reviewer_agent(persona, is1, id1, pd1)
+        except Exception as e:
+            logger.warning("Reviewer '%s' failed: %s", persona, e)
+            return None
+        parsed = parse_review(output) if output is not None else None
+        return {'persona': persona, **parsed} if parsed else None
+
+    reviews: List[Dict[str, Any]] = []
+    wave_size = max(settings.ENSEMBLE_WAVE_SIZE, 2)
+    agreed = False
+    with ThreadPoolExecutor(max_workers=wave_size) as executor:
+        for start in range(0, len(personas), wave_size):
+            wave = personas[start:start + wave_size]
+            # Worker threads inherit the request context so telemetry keeps the endpoint label
+            futures = [executor.submit(contextvars.copy_context().run, review, persona) for persona in wave]
+            reviews.extend(r for r in (f.result() for f in futures) if r is not None)
+            if len(reviews) >= 2 and max(score_spread(reviews).values()) <= tolerance:
+                agreed = True
+                break
+
+    if not reviews:
+        if llm_circuit_breaker.is_open:
+            return degraded_scoring.prism_result(incident_data, product_data)
+        raise ValueError("No reviewer produced a usable score")
+
+    scores = {
+        dimension: statistics.median(r['scores'][dimension] for r in reviews)
+        for dimension in SCORER_DIMENSIONS.values()
+    }
+    # Rationale of the reviewer closest to the median on each dimension
+    rationales = {
+        dimension: min(reviews, key=lambda r: abs(r['scores'][dimension] - scores[dimension]))['rationales'][dimension]
+        for dimension in SCORER_DIMENSIONS.values()
+    }
+    spread = score_spread(reviews)
+    logger.info(
+        "Ensemble: %d of %d reviewers used, max spread %.1f%s",
+        len(reviews), len(personas), max(spread.values()),
+        " (agreed early)" if agreed and len(reviews) < len(personas) else ""
+    )
+
+    return {
+        'prism_scores': scores,
+        'prism_rationales': rationales,
+        'transferability_score': scorer._calculate_transferability_score(scores),
+        'reviewers': [{'persona': r['persona'], 'scores': r['scores']} for r in reviews],
+        'agreement': spread,
+        'agreed': agreed,
+        'scoring_method': 'ensemble'
+    }
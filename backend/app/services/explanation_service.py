@@ -0,0 +1,215 @@
+"""
+Explanation Store
+LLM explanations for /api/incidents/explanation are kept in `pair_explanations`
+per (product, incident, mode), together with the product and incident versions
+(their updated_at) they were generated from. Repeat views are answered from
+the store; editing either record makes the stored text stale. A background
+precompute fills explanations for each product's top-N incidents after the
+product is scored.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.core import log
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.incident import Incident
+from app.models.product import Product
+from app.models.score import PairExplanation, PairScore
+from app.services import llm_gateway, telemetry, weight_profiles
+from app.services.circuit_breaker import llm_circuit_breaker
+from app.services.retrieval_service import (
+    EXPLANATION_ERROR,
+    explanation_request,
+    find_similar_incidents,
+    generate_explanation,
+)
+
+logger = log.get_logger(__name__)
+
+def version_of(record) -> str:
+    return record.updated_at.isoformat() if record.updated_at else "0"
+
+def precompute_modes() -> List[str]:
+    return [mode.strip() for mode in settings.EXPLANATION_PRECOMPUTE_MODES.split(",") if mode.strip()]
+
+def get_stored_explanation(db: Session, product: Product, incident: Incident, mode: str) -> Optional[str]:
+    """Stored explanation if it was generated from the current product and incident versions"""
+    row = db.query(PairExplanation).filter(
+        PairExplanation.product_id == product.id,
+        PairExplanation.incident_id == incident.id,
+        PairExplanation.mode == mode
+    ).first()
+    if row is None or row.product_version != version_of(product) or row.incident_version != version_of(incident):
+        return None
+    return row.explanation
+
+def store_explanation(db: Session, product: Product, incident: Incident, mode: str, explanation: str, source: str) -> None:
+    """Insert or replace the pair's explanation for a mode (caller commits)"""
+    row = {
+        'product_id': product.id,
+        'incident_id': incident.id,
+        'mode': mode,
+        'product_version': version_of(product),
+        'incident_version': version_of(incident),
+        'explanation': explanation,
+        'source': source,
+        'created_at': datetime.utcnow()
+    }
+    statement = insert(PairExplanation).values(row)
+    statement = statement.on_conflict_do_update(
+        index_elements=['product_id', 'incident_id', 'mode'],
+        set_={column: statement.excluded[column] for column in row if column not in ('product_id', 'incident_id', 'mode')}
+    )
+    db.execute(statement)
+
+async def get_explanation(db: Session, product: Product, incident: Incident, mode: str) -> Tuple[str, bool]:
+    """(explanation, served from the store); new explanations are stored, errors are not"""
+    if mode == "none":
+        return "", False
+    stored = get_stored_explanation(db, product, incident, mode)
+    if stored is not None:
+        return stored, True
+
+    explanation = await generate_explanation(product=product, incident=incident, mode=mode)
+    if explanation and explanation != EXPLANATION_ERROR:
+        store_explanation(db, product, incident, mode, explanation, source="request")
+        db.commit()
+    return explanation, False
+
+async def stream_explanation(product: Product, incident: Incident, mode: str, stored: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Explanation as events: {'delta': text} as tokens arrive, then {'done': True, 'cached': ...}
+    or {'error': ...}. A stored explanation is sent as one delta; a completed
+    stream is stored (with its own session, as the request's may already be closed).
+    """
+    if mode == "none" or stored is not None:
+        if stored:
+            yield {'delta': stored}
+        yield {'done': True, 'cached': stored is not None}
+        return
+
+    parts = []
+    try:
+        async for delta in llm_gateway.astream(agent="explanation", **explanation_request(product, incident, mode)):
+            parts.append(delta)
+            yield {'delta': delta}
+    except Exception as e:
+        logger.error("Error streaming explanation: %s", e)
+        yield {'error': EXPLANATION_ERROR}
+        return
+
+    explanation = "".join(parts)
+    if explanation:
+        db = SessionLocal()
+        try:
+            store_explanation(db, product, incident, mode, explanation, source="request")
+            db.commit()
+        finally:
+            db.close()
+    yield {'done': True, 'cached': False}
+
+def top_incident_ids(db: Session, product: Product, top_n: int) -> List[int]:
+    """Highest stored-score incidents of the product, topped up from retrieval ranking"""
+    weights = weight_profiles.get_active_profile(db)[1]
+    rows = db.query(PairScore.incident_id).filter(
+        PairScore.product_id == product.id,
+        PairScore.prism_scored_at.isnot(None)
+    ).order_by(weight_profiles.overall_expression(PairScore, weights).desc()).limit(top_n).all()
+    incident_ids = [row.incident_id for row in rows]
+    if len(incident_ids) < top_n:
+        # Worker threads have no running event loop, so drive the async retrieval directly
+        similar = asyncio.run(find_similar_incidents(product=product, db=db, limit=top_n))
+        incident_ids += [incident.id for incident in similar if incident.id not in incident_ids]
+    return incident_ids[:top_n]
+
+def precompute_product(product_id: int, top_n: Optional[int] = None, modes: Optional[List[str]] = None) -> int:
+    """Generate missing or stale explanations for a product's top-N incidents; returns how many were generated"""
+    top_n = settings.EXPLANATION_PRECOMPUTE_TOP_N if top_n is None else top_n
+    modes = modes or precompute_modes()
+    generated = 0
+    db = SessionLocal()
+    try:
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if product is None or top_n <= 0:
+            return 0
+        incident_ids = top_incident_ids(db, product, top_n)
+        incidents = db.query(Incident).filter(Incident.id.in_(incident_ids)).all()
+        for incident in incidents:
+            for mode in modes:
+                if get_stored_explanation(db, product, incident, mode) is not None:
+                    continue
+                if llm_circuit_breaker.is_open:
+                    logger.info("LLM circuit open, stopping explanation precompute for product %s", product_id)
+                    return generated
+                try:
+                    # Sync pooled client: the async one belongs to the server's event loop
+                    explanation, _ = llm_gateway.complete(agent="explanation", **explanation_request(product, incident, mode))
+                except Exception as e:
+                    logger.warning("Explanation precompute failed for product %s incident %s (%s): %s", product_id, incident.id, mode, e)
+                    continue
+                if explanation:
+                    store_explanation(db, product, incident, mode, explanation, source="precompute")
+                    db.commit()
+                    generated += 1
+        logger.info("Precomputed %d explanations for product %s", generated, product_id)
+        return generated
+    except Exception as e:
+        db.rollback()
+        logger.exception("Explanation precompute for product %s failed: %s", product_id, e)
+        return generated
+    finally:
+        db.close()
+
+class ExplanationPrecomputer:
+    """Background pool running precompute_product; a product already queued is not queued twice"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.EXPLANATION_PRECOMPUTE_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued: Set[int] = set()
+
+    def schedule(self, product_ids: Iterable[int], top_n: Optional[int] = None, modes: Optional[List[str]] = None) -> int:
+        if (settings.EXPLANATION_PRECOMPUTE_TOP_N if top_n is None else top_n) <= 0:
+            return 0
+        scheduled = 0
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="explanation-precompute")
+            for product_id in product_ids:
+                if product_id in self._queued:
+                    continue
+                self._queued.add(product_id)
+                self._executor.submit(self._run, product_id, top_n, modes)
+                scheduled += 1
+        return scheduled
+
+    def _run(self, product_id: int, top_n: Optional[int], modes: Optional[List[str]]) -> None:
+        log.set_trace_id(f"explain-product-{product_id}")
+        telemetry.set_endpoint("explanation_precompute")
+        try:
+            precompute_product(product_id, top_n, modes)
+        finally:
+            with self._lock:
+                self._queued.discard(product_id)
+
+    def shutdown(self, wait: bool = False, cancel_queued: Optional[bool] = None) -> None:
+        """
+        Stop the pool; with `wait`, running products are finished first. Queued
+        products are dropped unless waiting (or `cancel_queued` says otherwise).
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait if cancel_queued is None else cancel_queued)
+
+# Process-wide precompute pool (fed by scoring jobs and the precompute endpoint)
+explanation_precomputer = ExplanationPrecomputer()
@@ -0,0 +1,168 @@
+"""
+Index Classifier
+Predicts a product's technology and purpose tags from its name and description
+with one-vs-rest logistic regression over TF-IDF features, trained on the
+tags of the products already in the database. Predictions take milliseconds;
+callers fall back to the LLM when `confidence` is below
+PREDICT_INDICES_MIN_CONFIDENCE.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.preprocessing import MultiLabelBinarizer
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.json_fields import decode_list
+from app.core.log import get_logger
+from app.db.session import SessionLocal
+from app.models.product import Product
+
+logger = get_logger(__name__)
+
+FIELDS = {'technology': Product.technology, 'purpose': Product.purpose}
+
+def _tags(value: Any) -> List[str]:
+    return [str(tag).strip() for tag in decode_list(value) if str(tag).strip()]
+
+class _FieldModel:
+    """Classifier for one tag field"""
+
+    def __init__(self, binarizer: MultiLabelBinarizer, model: OneVsRestClassifier):
+        self.binarizer = binarizer
+        self.model = model
+
+    def predict(self, features) -> Tuple[List[str], float]:
+        """Tags above the label threshold (at least the best one) and the best tag's probability"""
+        probabilities = self.model.predict_proba(features)[0]
+        order = np.argsort(-probabilities)[:settings.PREDICT_INDICES_MAX_TAGS]
+        chosen = [i for i in order if probabilities[i] >= settings.PREDICT_INDICES_LABEL_THRESHOLD] or list(order[:1])
+        return [str(self.binarizer.classes_[i]) for i in chosen], float(probabilities[order[0]])
+
+class IndexClassifier:
+    """
+    Lazily trained, process-wide classifier. Retrained in the background when
+    the products table changes; until the first model is ready `predict`
+    returns None.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._training = False
+        self._version: Optional[Tuple[int, Any]] = None
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._fields: Dict[str, _FieldModel] = {}
+        self._checked_at = float("-inf")
+
+    @staticmethod
+    def _table_version(db: Session) -> Tuple[int, Any]:
+        return db.query(func.count(Product.id), func.max(Product.updated_at)).one()
+
+    @property
+    def ready(self) -> bool:
+        return self._vectorizer is not None
+
+    def train(self, db: Session) -> bool:
+        """Fit on every product's tags; False when there is too little data"""
+        version = self._table_version(db)
+        rows = db.query(Product.name, Product.description, Product.technology, Product.purpose).all()
+        texts = [f"{row.name or ''} {row.description or ''}" for row in rows]
+        if len(texts) < settings.PREDICT_INDICES_MIN_TRAINING_PRODUCTS:
+            logger.info("Index classifier: %d products, not enough to train", len(texts))
+            with self._lock:
+                self._version = version
+            return False
+
+        started = time.perf_counter()
+        vectorizer = TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2), min_df=2, max_features=50000, stop_words="english")
+        features = vectorizer.fit_transform(texts)
+        fields = {}
+        for field, column in FIELDS.items():
+            labels = [_tags(getattr(row, column.key)) for row in rows]
+            counts: Dict[str, int] = {}
+            for tags in labels:
+                for tag in set(tags):
+                    counts[tag] = counts.get(tag, 0) + 1
+            # Rare tags cannot be learned reliably; they stay LLM-only
+            classes = sorted(tag for tag, count in counts.items() if count >= settings.PREDICT_INDICES_MIN_TAG_SUPPORT)
+            if not classes:
+                continue
+            binarizer = MultiLabelBinarizer(classes=classes)
+            targets = binarizer.fit_transform([[tag for tag in tags if tag in counts and counts[tag] >= settings.PREDICT_INDICES_MIN_TAG_SUPPORT] for tags in labels])
+            model = OneVsRestClassifier(LogisticRegression(solver="liblinear", C=4.0))
+            model.fit(features, targets)
+            fields[field] = _FieldModel(binarizer, model)
+
+        with self._lock:
+            self._vectorizer, self._fields, self._version = vectorizer, fields, version
+        logger.info(
+            "Index classifier trained on %d products in %.1fs (%s)",
+            len(texts), time.perf_counter() - started,
+            ", ".join(f"{field}: {len(model.binarizer.classes_)} tags" for field, model in fields.items())
+        )
+        return True
+
+    def _train_in_background(self) -> None:
+        db = SessionLocal()
+        try:
+            self.train(db)
+        except Exception as e:
+            logger.exception("Index classifier training failed: %s", e)
+        finally:
+            db.close()
+            with self._lock:
+                self._training = False
+
+    def refresh(self, db: Optional[Session] = None) -> None:
+        """Start background (re)training if the products table changed; checked at most once a minute"""
+        now = time.monotonic()
+        with self._lock:
+            if self._training or now - self._checked_at < 60:
+                return
+            self._checked_at = now
+        close = db is None
+        db = db or SessionLocal()
+        try:
+            if self._table_version(db) == self._version:
+                return
+        finally:
+            if close:
+                db.close()
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+        threading.Thread(target=self._train_in_background, name="index-classifier-train", daemon=True).start()
+
+    def predict(self, text: str) -> Optional[Dict[str, Any]]:
+        """{'technology', 'purpose', 'confidence'} or None while no model is trained"""
+        with self._lock:
+            vectorizer, fields = self._vectorizer, self._fields
+        if vectorizer is None or not fields:
+            return None
+        features = vectorizer.transform([text])
+        if features.nnz == 0:
+            # No known vocabulary at all: nothing to base a prediction on
+            return {'technology': [], 'purpose': [], 'confidence': 0.0}
+        prediction: Dict[str, Any] = {}
+        confidences = []
+        for field in FIELDS:
+            if field not in fields:
+                prediction[field] = []
+                confidences.append(0.0)
+                continue
+            tags, confidence = fields[field].predict(features)
+            prediction[field] = tags
+            confidences.append(confidence)
+        prediction['confidence'] = round(min(confidences), 3)
+        return prediction
+
+# Process-wide classifier shared by the API
+index_classifier = IndexClassifier()
@@ -0,0 +1,345 @@
+"""
+Background Scoring Job Service
+Runs large product x incident scoring runs on a local worker pool.
+Every product is checkpointed to SQLite as soon as it is scored, so a job
+survives browser tabs closing and resumes where it stopped after a restart.
+Resuming also retries failed products until SCORING_JOB_MAX_ATTEMPTS.
+"""
+
+import asyncio
+import json
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import log
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import ScoringJob, ScoringJobItem, ScoringJobResult
+from app.models.product import Product
+from app.services.retrieval_service import find_similar_incidents
+from app.services import prism_service, score_store, telemetry
+from app.services.explanation_service import explanation_precomputer
+
+logger = log.get_logger(__name__)
+
+JOB_MODES = ("prism", "generic", "dual")
+
+RESULT_FIELDS = [
+    'confidence_score',
+    'logical_coherence',
+    'factual_accuracy',
+    'practical_implementability',
+    'contextual_relevance',
+    'impact',
+    'exploitability',
+    'overall_score',
+]
+
+class ScoringJobRunner:
+    """
+    Executes scoring jobs on a shared thread pool.
+    Each job item (one product) is scored with the bulk scorer and its results
+    are written in the same transaction that marks the item done.
+    """
+
+    def __init__(self, scorer=None, max_workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self._scorer = scorer
+        self.max_workers = max_workers or settings.SCORING_JOB_WORKERS
+        self.chunk_size = chunk_size or settings.SCORING_JOB_CHUNK_SIZE
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def scorer(self):
+        # Resolved on first use so importing the router does not build a scorer
+        if self._scorer is None:
+            self._scorer = prism_service.get_prism_scorer()
+        return self._scorer
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="scoring-job"
+                )
+            return self._executor
+
+    def create_job(
+        self,
+        db: Session,
+        mode: str = "prism",
+        top_k: int = 30,
+        context: str = "",
+        product_ids: Optional[List[int]] = None
+    ) -> ScoringJob:
+        """Persist a new job and one pending item per product"""
+        if product_ids is None:
+            item_product_ids = [row.id for row in db.query(Product.id).order_by(Product.id).all()]
+        else:
+            item_product_ids = list(dict.fromkeys(product_ids))  # Dedupe, keep order
+
+        job = ScoringJob(
+            status="queued" if item_product_ids else "completed",
+            mode=mode,
+            top_k=top_k,
+            context=context,
+            product_ids=json.dumps(product_ids) if product_ids is not None else None,
+            total_items=len(item_product_ids),
+            completed_items=0,
+            failed_items=0
+        )
+        db.add(job)
+        db.flush()
+
+        db.bulk_insert_mappings(ScoringJobItem, [
+            {'job_id': job.id, 'product_id': product_id, 'status': 'pending', 'attempts': 0}
+            for product_id in item_product_ids
+        ])
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def submit(self, job_id: int) -> None:
+        """Queue every pending item of a job on the worker pool"""
+        db = SessionLocal()
+        try:
+            item_ids = [
+                row.id for row in db.query(ScoringJobItem.id).filter(
+                    ScoringJobItem.job_id == job_id,
+                    ScoringJobItem.status == "pending"
+                ).order_by(ScoringJobItem.id).all()
+            ]
+            if not item_ids:
+                self._finalize_job(db, job_id)
+                return
+        finally:
+            db.close()
+
+        executor = self._get_executor()
+        for item_id in item_ids:
+            executor.submit(self._run_item, job_id, item_id)
+
+    def resume_pending_jobs(self) -> int:
+        """
+        Re-queue unfinished jobs after a restart.
+        Items that were mid-flight when the process died are scored again, and
+        failed items are retried while they have attempts left.
+        """
+        db = SessionLocal()
+        try:
+            job_ids = [
+                row.id for row in db.query(ScoringJob.id).filter(
+                    ScoringJob.status.in_(["queued", "running"])
+                ).all()
+            ]
+            self._requeue_items(db, job_ids)
+            db.commit()
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            self.submit(job_id)
+        return len(job_ids)
+
+    def resume_job(self, job_id: int) -> None:
+        """
+        Re-queue one job: items left mid-flight by a stopped process and failed
+        items with attempts left. A finished job with such items is reopened.
+        """
+        db = SessionLocal()
+        try:
+            self._requeue_items(db, [job_id])
+            db.commit()
+        finally:
+            db.close()
+        self.submit(job_id)
+
+    @staticmethod
+    def _requeue_items(db: Session, job_ids: List[int]) -> None:
+        """
+        Set the jobs' running items, and failed items with fewer than
+        SCORING_JOB_MAX_ATTEMPTS attempts, back to pending (caller commits).
+        Items that failed that many times are terminal.
+        """
+        if not job_ids:
+            return
+        db.query(ScoringJobItem).filter(
+            ScoringJobItem.job_id.in_(job_ids),
+            ScoringJobItem.status == "running"
+        ).update({ScoringJobItem.status: "pending"}, synchronize_session=False)
+
+        retryable = (
+            ScoringJobItem.job_id.in_(job_ids),
+            ScoringJobItem.status == "failed",
+            func.coalesce(ScoringJobItem.attempts, 0) < settings.SCORING_JOB_MAX_ATTEMPTS
+        )
+        retried = db.query(ScoringJobItem.job_id, func.count(ScoringJobItem.id)).filter(
+            *retryable
+        ).group_by(ScoringJobItem.job_id).all()
+        if not retried:
+            return
+        db.query(ScoringJobItem).filter(*retryable).update(
+            {ScoringJobItem.status: "pending"}, synchronize_session=False
+        )
+        for job_id, count in retried:
+            job = db.query(ScoringJob).filter(ScoringJob.id == job_id).first()
+            job.failed_items = max((job.failed_items or 0) - count, 0)
+            if job.status in ("completed", "failed"):
+                job.status = "running"
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the pool, dropping queued items; with `wait`, running items are finished first"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def _run_item(self, job_id: int, item_id: int) -> None:
+        telemetry.set_endpoint("scoring_job")
+        log.set_trace_id(f"job-{job_id}-item-{item_id}")
+        db = SessionLocal()
+        try:
+            item = db.query(ScoringJobItem).filter(ScoringJobItem.id == item_id).first()
+            job = db.query(ScoringJob).filter(ScoringJob.id == job_id).first()
+            if item is None or job is None or item.status != "pending":
+                return
+
+            item.status = "running"
+            item.attempts = (item.attempts or 0) + 1
+            if job.status == "queued":
+                job.status = "running"
+            db.commit()
+
+            try:
+                scores = self._score_product(db, job, item.product_id)
+            except Exception as e:
+                db.rollback()
+                logger.warning("Scoring job %s: product %s failed: %s", job_id, item.product_id, e)
+                item.status = "failed"
+                item.error = str(e)
+                self._increment(db, job_id, ScoringJob.failed_items)
+                db.commit()
+            else:
+                db.bulk_insert_mappings(ScoringJobResult, [
+                    self._result_row(job_id, item.product_id, score)
+                    for score in scores
+                ])
+                score_store.upsert_pair_scores(db, item.product_id, scores, source="job")
+                item.status = "done"
+                item.error = None
+                self._increment(db, job_id, ScoringJob.completed_items)
+                db.commit()
+                # Explanations for the newly ranked top incidents, off the job's workers
+                explanation_precomputer.schedule([item.product_id])
+
+            self._finalize_job(db, job_id)
+        except Exception as e:
+            db.rollback()
+            logger.exception("Error running scoring job %s item %s: %s", job_id, item_id, e)
+        finally:
+            db.close()
+
+    def _score_product(self, db: Session, job: ScoringJob, product_id: int) -> List[Dict[str, Any]]:
+        """Retrieve the product's top-K incidents and score them in bulk chunks"""
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if not product:
+            raise ValueError(f"Product {product_id} not found")
+
+        # Worker threads have no running event loop, so drive the async retrieval directly
+        similar_incidents = asyncio.run(find_similar_incidents(product=product, db=db, limit=job.top_k))
+        incidents = [
+            {
+                'id': incident.id,
+                'title': incident.title,
+                'description': incident.description,
+                'technologies': incident.technologies
+            }
+            for incident in similar_incidents
+        ]
+
+        product_data = {
+            'name': product.name,
+            'description': product.description
+        }
+
+        scores = []
+        for start in range(0, len(incidents), self.chunk_size):
+            chunk = incidents[start:start + self.chunk_size]
+            if job.mode == "generic":
+                scores.extend(self.scorer.bulk_calculate_generic_scores(chunk, product_data, job.context or ""))
+            elif job.mode == "dual":
+                scores.extend(self.scorer.bulk_calculate_dual_scores(chunk, product_data, job.context or ""))
+            else:
+                scores.extend(self.scorer.bulk_calculate_prism_scores(chunk, product_data, job.context or ""))
+        if any(score.get('degraded') for score in scores):
+            # Fail the item rather than persist similarity estimates; a later run rescores it
+            raise RuntimeError("LLM gateway unavailable (circuit open)")
+        placeholders = sum(1 for score in scores if score_store.is_placeholder(score))
+        if placeholders:
+            # Placeholder 50s are not scores: fail the item so a later run rescores it
+            raise RuntimeError(f"{placeholders} of {len(scores)} incidents got placeholder scores")
+        # Job results carry the same overall scores as the store
+        score_store.apply_active_profile(db, scores)
+        return scores
+
+    @staticmethod
+    def _result_row(job_id: int, product_id: int, score: Dict[str, Any]) -> Dict[str, Any]:
+        row = {
+            'job_id': job_id,
+            'product_id': product_id,
+            'incident_id': score['incident_id'],
+            'reasoning': score.get('reasoning', ''),
+            'created_at': datetime.utcnow()
+        }
+        for field in RESULT_FIELDS:
+            row[field] = score.get(field)
+        return row
+
+    @staticmethod
+    def _increment(db: Session, job_id: int, column) -> None:
+        db.query(ScoringJob).filter(ScoringJob.id == job_id).update(
+            {column: column + 1, ScoringJob.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+
+    @staticmethod
+    def _finalize_job(db: Session, job_id: int) -> None:
+        """Mark the job completed once no pending or running items remain"""
+        remaining = db.query(ScoringJobItem).filter(
+            ScoringJobItem.job_id == job_id,
+            ScoringJobItem.status.in_(["pending", "running"])
+        ).count()
+        if remaining:
+            return
+
+        job = db.query(ScoringJob).filter(ScoringJob.id == job_id).first()
+        if job and job.status not in ("completed", "failed"):
+            job.status = "failed" if job.total_items and job.failed_items == job.total_items else "completed"
+            db.commit()
+
+def get_job(db: Session, job_id: int) -> Optional[ScoringJob]:
+    return db.query(ScoringJob).filter(ScoringJob.id == job_id).first()
+
+def get_job_results(
+    db: Session,
+    job_id: int,
+    page: int = 1,
+    limit: int = 50,
+    product_id: Optional[int] = None
+) -> Tuple[List[ScoringJobResult], int, int]:
+    """Return one page of a job's results, the total count and the page count"""
+    query = db.query(ScoringJobResult).filter(ScoringJobResult.job_id == job_id)
+    if product_id is not None:
+        query = query.filter(ScoringJobResult.product_id == product_id)
+
+    total = query.count()
+    total_pages = math.ceil(total / limit)
+    results = query.order_by(ScoringJobResult.id).offset((page - 1) * limit).limit(limit).all()
+    return results, total, total_pages
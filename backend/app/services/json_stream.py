@@ -0,0 +1,88 @@
+"""
+Incremental JSON Array Extraction
+Pulls every complete element out of a named JSON array in LLM output that may
+be truncated (max_tokens) or still streaming, e.g. the `incident_scores` list
+of the bulk scoring prompts. Elements cut off mid-object are left out, so the
+caller can re-request only those.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+import json_repair
+
+class IncrementalArrayParser:
+    """
+    Feed text chunks with `feed()`; each call returns the array elements that
+    became complete. Tracks string/escape state and nesting depth only, so it
+    tolerates prose or code fences around the JSON.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._buffer = ""
+        self._pos = 0                 # Next character to scan
+        self._array_start: Optional[int] = None
+        self._element_start: Optional[int] = None
+        self._depth = 0               # Nesting depth inside the array
+        self._in_string = False
+        self._escaped = False
+        self.done = False             # Closing bracket of the array was seen
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        if self._array_start is None and not self._find_array():
+            return []
+
+        completed = []
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self.done:
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._element_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    self.done = True  # End of the array itself
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and char == "}" and self._element_start is not None:
+                        element = _load_object(buffer[self._element_start:self._pos + 1])
+                        if element is not None:
+                            completed.append(element)
+                        self._element_start = None
+            self._pos += 1
+        return completed
+
+    def _find_array(self) -> bool:
+        key_at = self._buffer.find(f'"{self.key}"')
+        if key_at == -1:
+            return False
+        bracket_at = self._buffer.find("[", key_at)
+        if bracket_at == -1:
+            return False
+        self._array_start = bracket_at
+        self._pos = bracket_at + 1
+        return True
+
+def _load_object(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = json.loads(text)
+    except ValueError:
+        # Complete but slightly malformed element (e.g. trailing comma)
+        value = json_repair.loads(text)
+    return value if isinstance(value, dict) else None
+
+def extract_array_objects(text: str, key: str) -> List[Dict[str, Any]]:
+    """Every complete object of the `key` array in a possibly truncated response"""
+    return IncrementalArrayParser(key).feed(text or "")
@@ -0,0 +1,104 @@
+"""
+Shared LLM Gateway Clients
+One lazily created, app-lifetime OpenAI client (sync and async) on top of a
+tuned httpx connection pool, so every scoring call reuses warm keep-alive
+connections instead of paying a new TLS handshake. HTTP/2 is used when the
+optional `h2` package is installed.
+"""
+
+import os
+import threading
+from typing import Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from app.core.config import settings
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_openai_client: Optional[OpenAI] = None
+_async_openai_client: Optional[AsyncOpenAI] = None
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def resolve_credentials() -> Tuple[Optional[str], str]:
+    """API key and base URL: settings (.env) first, then the process environment"""
+    api_key = settings.OPENAI_API_KEY or os.getenv('OPENAI_API_KEY')
+    base_url = settings.OPENAI_BASE_URL or os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+    return api_key, base_url
+
+def _pool_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_S
+        ),
+        "timeout": httpx.Timeout(settings.LLM_HTTP_TIMEOUT_S, connect=settings.LLM_HTTP_CONNECT_TIMEOUT_S),
+        "http2": http2_available(),
+    }
+
+def get_http_client() -> httpx.Client:
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(**_pool_options())
+        return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(**_pool_options())
+        return _async_http_client
+
+def get_openai_client() -> OpenAI:
+    """
+    Shared sync client used by PRISMScorer.
+    Built-in retries are disabled: llm_gateway retries through the shared rate limiter.
+    """
+    global _openai_client
+    http_client = get_http_client()
+    with _lock:
+        if _openai_client is None:
+            api_key, base_url = resolve_credentials()
+            _openai_client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client,
+                max_retries=0
+            )
+        return _openai_client
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Shared async client for the retrieval and product prediction services"""
+    global _async_openai_client
+    http_client = get_async_http_client()
+    with _lock:
+        if _async_openai_client is None:
+            api_key, base_url = resolve_credentials()
+            _async_openai_client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client
+            )
+        return _async_openai_client
+
+async def close_clients() -> None:
+    """Close the pooled connections on application shutdown"""
+    global _http_client, _async_http_client, _openai_client, _async_openai_client
+    with _lock:
+        http_client, async_http_client = _http_client, _async_http_client
+        _http_client = _async_http_client = None
+        _openai_client = _async_openai_client = None
+    if http_client is not None:
+        http_client.close()
+    if async_http_client is not None:
+        await async_http_client.aclose()
@@ -0,0 +1,295 @@
+"""
+Guarded LLM Gateway Calls
+Every chat completion the app makes goes through one of these helpers: the
+circuit breaker fails fast while the gateway is down, the shared rate limiter
+queues the call and is settled with its real token usage, failures are
+retried with backoff (429s wait out Retry-After in the limiter), the request
+deadline bounds all of it, and the call is recorded in the LLM telemetry.
+`complete` is for worker threads, `acomplete` and `astream` for the event loop.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import json_repair
+import openai
+from openai import AsyncOpenAI, OpenAI
+from tenacity import AsyncRetrying, Retrying, retry_if_not_exception_type, stop_after_attempt
+
+from app.core.config import settings
+from app.core.log import Payload, get_logger
+from app.services import deadline
+from app.services.circuit_breaker import CircuitOpenError, llm_circuit_breaker
+from app.services.llm_client import get_async_openai_client, get_openai_client
+from app.services.rate_limiter import RateLimitQueueTimeout, estimate_tokens, llm_rate_limiter, llm_retry_wait
+from app.services.telemetry import llm_telemetry
+
+logger = get_logger(__name__)
+
+# Retrying these cannot help: the queue, the deadline or the breaker already said no
+NOT_RETRIED = (RateLimitQueueTimeout, deadline.DeadlineExceeded, CircuitOpenError)
+
+def _retry_options() -> Dict[str, Any]:
+    return {
+        'wait': llm_retry_wait,
+        'stop': stop_after_attempt(settings.LLM_MAX_ATTEMPTS) | deadline.stop_at_deadline,
+        'retry': retry_if_not_exception_type(NOT_RETRIED),
+        'reraise': True,
+    }
+
+def _admit(estimated_tokens: int) -> Dict[str, Any]:
+    """
+    Gate one attempt: deadline, breaker and rate limiter (may block while queued).
+    Returns the request options bounding the HTTP call by the deadline.
+    """
+    deadline.check()
+    llm_circuit_breaker.before_call()
+    llm_rate_limiter.acquire(estimated_tokens, max_wait_s=deadline.remaining())
+    deadline.check()
+    time_left = deadline.remaining()
+    return {'timeout': time_left} if time_left is not None else {}
+
+def _note_failure(error: Exception) -> None:
+    """Breaker and limiter accounting for a failed gateway request"""
+    if isinstance(error, openai.RateLimitError):
+        llm_rate_limiter.note_rate_limited(error)
+    elif not deadline.expired():
+        # Timeouts forced by the caller's own deadline say nothing about the gateway
+        llm_circuit_breaker.record_failure(error)
+
+def _record(
+    agent: str,
+    model: str,
+    started: float,
+    attempts: int,
+    prompt_tokens: int,
+    completion_tokens: int,
+    error: Optional[str],
+    parse_ok: Optional[bool] = None
+) -> None:
+    llm_telemetry.record(
+        agent=agent,
+        model=model,
+        latency_s=time.perf_counter() - started,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        retries=max(attempts - 1, 0),
+        success=error is None,
+        parse_ok=parse_ok,
+        error=error
+    )
+
+def extract_content(response: Any) -> str:
+    """Get the message text from the gateway response"""
+    # Handle different response formats
+    if isinstance(response, str):
+        # Gateway returned a string directly
+        logger.debug("Gateway returned string response")
+        return response
+    elif hasattr(response, 'choices') and response.choices:
+        # Standard OpenAI response format
+        return response.choices[0].message.content
+    else:
+        # Unknown format, try to handle gracefully
+        logger.warning("Unknown response format: %s", Payload(response))
+        # If response is a dict, try to extract content
+        if isinstance(response, dict):
+            # Try common fields
+            content = response.get('content') or response.get('message') or response.get('text')
+            if content:
+                return content
+        # If all else fails, convert to string
+        return str(response)
+
+def complete(
+    messages: List[Dict],
+    agent: str,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: int = 600,
+    client: Optional[OpenAI] = None,
+    parse_json: bool = False
+) -> Tuple[str, Optional[Dict]]:
+    """
+    One chat completion on the sync client, with retries; returns the reply and,
+    with `parse_json`, the JSON object in it (None when parsing fails).
+    """
+    client = client or get_openai_client()
+    model = model or settings.OPENAI_MODEL
+    started = time.perf_counter()
+    attempts = 0
+    usage = None
+    parse_ok = None
+    error = None
+    estimated_tokens = estimate_tokens(messages, max_tokens)
+
+    # An open circuit fails fast, before any queueing or telemetry
+    llm_circuit_breaker.before_call()
+
+    try:
+        for attempt in Retrying(**_retry_options()):
+            with attempt:
+                attempts = attempt.retry_state.attempt_number
+                request_options = _admit(estimated_tokens)
+                try:
+                    response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **request_options
+                    )
+                except Exception as e:
+                    _note_failure(e)
+                    raise
+                llm_circuit_breaker.record_success()
+
+        usage = getattr(response, 'usage', None)
+        llm_rate_limiter.settle(estimated_tokens, getattr(usage, 'total_tokens', 0) or 0)
+        content = extract_content(response)
+
+        parsed = None
+        if parse_json:
+            try:
+                output = json_repair.loads(content)
+                parse_ok = isinstance(output, dict)
+                parsed = output if parse_ok else None
+            except Exception as e:
+                logger.warning("Error parsing %s output: %s", agent, e)
+                parse_ok = False
+        return content, parsed
+
+    except Exception as e:
+        error = str(e)
+        logger.error("Error calling OpenAI (%s): %s", agent, e)
+        raise
+    finally:
+        _record(
+            agent, model, started, attempts,
+            getattr(usage, 'prompt_tokens', 0) or 0,
+            getattr(usage, 'completion_tokens', 0) or 0,
+            error, parse_ok
+        )
+
+async def acomplete(
+    messages: List[Dict],
+    agent: str,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: int = 600,
+    client: Optional[AsyncOpenAI] = None
+) -> str:
+    """One chat completion on the async client, with retries; returns the reply"""
+    # The helper retries through the limiter, so the client's own retries are off
+    client = (client or get_async_openai_client()).with_options(max_retries=0)
+    model = model or settings.OPENAI_MODEL
+    started = time.perf_counter()
+    attempts = 0
+    usage = None
+    error = None
+    estimated_tokens = estimate_tokens(messages, max_tokens)
+
+    llm_circuit_breaker.before_call()
+
+    try:
+        async for attempt in AsyncRetrying(**_retry_options()):
+            with attempt:
+                attempts = attempt.retry_state.attempt_number
+                # Rate-limit queueing sleeps, so it waits off the event loop
+                request_options = await asyncio.to_thread(_admit, estimated_tokens)
+                try:
+                    response = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **request_options
+                    )
+                except Exception as e:
+                    _note_failure(e)
+                    raise
+                llm_circuit_breaker.record_success()
+
+        usage = getattr(response, 'usage', None)
+        llm_rate_limiter.settle(estimated_tokens, getattr(usage, 'total_tokens', 0) or 0)
+        return extract_content(response)
+
+    except Exception as e:
+        error = str(e)
+        logger.error("Error calling OpenAI (%s): %s", agent, e)
+        raise
+    finally:
+        _record(
+            agent, model, started, attempts,
+            getattr(usage, 'prompt_tokens', 0) or 0,
+            getattr(usage, 'completion_tokens', 0) or 0,
+            error
+        )
+
+async def astream(
+    messages: List[Dict],
+    agent: str,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: int = 600,
+    client: Optional[AsyncOpenAI] = None
+) -> AsyncIterator[str]:
+    """
+    Streamed chat completion on the async client, yielding text deltas. Opening
+    the stream is retried; once text has been sent it is not. Streams report no
+    usage, so tokens are estimated from the prompt and the streamed text.
+    """
+    # The helper retries through the limiter, so the client's own retries are off
+    client = (client or get_async_openai_client()).with_options(max_retries=0)
+    model = model or settings.OPENAI_MODEL
+    started = time.perf_counter()
+    attempts = 0
+    error = None
+    streamed_chars = 0
+    estimated_tokens = estimate_tokens(messages, max_tokens)
+    stream = None
+
+    llm_circuit_breaker.before_call()
+
+    try:
+        async for attempt in AsyncRetrying(**_retry_options()):
+            with attempt:
+                attempts = attempt.retry_state.attempt_number
+                request_options = await asyncio.to_thread(_admit, estimated_tokens)
+                try:
+                    stream = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        **request_options
+                    )
+                except Exception as e:
+                    _note_failure(e)
+                    raise
+
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    streamed_chars += len(delta)
+                    yield delta
+        except Exception as e:
+            _note_failure(e)
+            raise
+        llm_circuit_breaker.record_success()
+
+    except Exception as e:
+        error = str(e)
+        logger.error("Error streaming from OpenAI (%s): %s", agent, e)
+        raise
+    finally:
+        prompt_tokens = completion_tokens = 0
+        if stream is not None:
+            await stream.close()  # Also releases the connection when the client disconnects
+            prompt_tokens = estimated_tokens - max_tokens
+            completion_tokens = streamed_chars // 4
+            llm_rate_limiter.settle(estimated_tokens, prompt_tokens + completion_tokens)
+        _record(agent, model, started, attempts, prompt_tokens, completion_tokens, error)
@@ -1,13 +1,76 @@
-from typing import Dict, List
-import openai
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+import json_repair
+from app.services import llm_gateway
+from app.services.index_classifier import index_classifier
 from app.core.config import settings
+from app.core.log import get_logger
 
-async def predict_indices(description: str) -> Dict[str, List[str]]:
+logger = get_logger(__name__)
+
+# Predictions by description hash (most recently used last)
+_prediction_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _description_key(description: str) -> str:
+    normalized = " ".join(description.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _cache_get(key: str):
+    with _cache_lock:
+        prediction = _prediction_cache.get(key)
+        if prediction is not None:
+            _prediction_cache.move_to_end(key)
+        return prediction
+
+def _cache_put(key: str, prediction: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _prediction_cache[key] = prediction
+        _prediction_cache.move_to_end(key)
+        while len(_prediction_cache) > settings.PREDICT_INDICES_CACHE_SIZE:
+            _prediction_cache.popitem(last=False)
+
+async def predict_indices(description: str) -> Dict[str, Any]:
+    """
+    Predict technology, purpose, and ethical issues from a product description.
+    The local classifier answers when it is confident; otherwise the LLM is
+    asked. Results are cached by description hash and carry their `source`.
+    Only the LLM predicts ethical issues: `ethical_issues` is None (not
+    predicted, as opposed to none found) when the LLM did not answer.
+    """
+    key = _description_key(description)
+    cached = _cache_get(key)
+    if cached is not None:
+        return {**cached, 'source': "cache"}
+
+    index_classifier.refresh()
+    prediction = index_classifier.predict(description)
+    if prediction is not None and prediction['confidence'] >= settings.PREDICT_INDICES_MIN_CONFIDENCE:
+        # The products table has no ethical-issue tags to learn from
+        result = {'technology': prediction['technology'], 'purpose': prediction['purpose'], 'ethical_issues': None, 'source': "classifier", 'confidence': prediction['confidence']}
+        _cache_put(key, result)
+        return result
+
+    result = await _predict_indices_llm(description)
+    if result is not None:
+        result.update({'source': "llm", 'confidence': prediction['confidence'] if prediction else None})
+        _cache_put(key, result)
+        return result
+    if prediction is not None:
+        # LLM unavailable: a low-confidence guess beats nothing (not cached)
+        return {'technology': prediction['technology'], 'purpose': prediction['purpose'], 'ethical_issues': None, 'source': "classifier", 'confidence': prediction['confidence']}
+    return {'technology': [], 'purpose': [], 'ethical_issues': None, 'source': "none", 'confidence': None}
+
+async def _predict_indices_llm(description: str):
     """
     Use LLM to predict technology, purpose, and ethical issues from product description.
+    Returns None on failure.
     """
     try:
-        response = await openai.ChatCompletion.acreate(
+        content = await llm_gateway.acomplete(
+            agent="predict_indices",
             model="gpt-4",
             messages=[
                 {
@@ -18,7 +81,7 @@ async def predict_indices(description: str) -> Dict[str, List[str]]:
                     2. Purposes (e.g., Customer Service, Healthcare, Education)
                     3. Potential ethical issues (e.g., Privacy, Bias, Transparency)
                     
-                    Return the results in a structured format."""
+                    Respond with a JSON object: {"technology": [...], "purpose": [...], "ethical_issues": [...]}"""
                 },
                 {
                     "role": "user",
@@ -29,36 +92,14 @@ async def predict_indices(description: str) -> Dict[str, List[str]]:
             max_tokens=500
         )
 
-        # Parse the response and extract the predictions
-        content = response.choices[0].message.content
-        
-        # Simple parsing - in production, you'd want more robust parsing
-        lines = content.split('\n')
-        predictions = {
-            'technology': [],
-            'purpose': [],
-            'ethical_issues': []
+        output = json_repair.loads(content)
+        if not isinstance(output, dict):
+            raise ValueError("Response is not a JSON object")
+        return {
+            field: [str(tag).strip() for tag in output.get(field) or [] if str(tag).strip()]
+            for field in ('technology', 'purpose', 'ethical_issues')
         }
-        
-        current_section = None
-        for line in lines:
-            line = line.strip().lower()
-            if 'technolog' in line:
-                current_section = 'technology'
-            elif 'purpose' in line:
-                current_section = 'purpose'
-            elif 'ethic' in line:
-                current_section = 'ethical_issues'
-            elif line and current_section and not line.startswith(('1.', '2.', '3.')):
-                predictions[current_section].append(line.strip())
-
-        return predictions
 
     except Exception as e:
-        print(f"Error in predict_indices: {str(e)}")
-        # Return empty predictions in case of error
-        return {
-            'technology': [],
-            'purpose': [],
-            'ethical_issues': []
-        } 
\ No newline at end of file
+        logger.error("Error in predict_indices: %s", e)
+        return None
@@ -8,14 +8,22 @@ import numpy as np
 import pandas as pd
 from typing import List, Dict, Any, Optional, Tuple
 import json
+import logging
 import re
 from datetime import datetime
-import openai
 from openai import OpenAI
 import os
-from tenacity import retry, stop_after_attempt, wait_random_exponential
-import json_repair
+import threading
 from app.core.config import settings
+from app.core.log import Payload, get_logger, log_payload
+from app.services import deadline, degraded_scoring, llm_gateway, weight_profiles
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.single_flight import SingleFlight, coalesce
+from app.services.prompt_templates import CompiledPrompt, compile_prompt
+from app.services.json_stream import extract_array_objects
+from app.services.llm_client import get_openai_client, resolve_credentials
+
+logger = get_logger(__name__)
 
 class PRISMScorer:
     """
@@ -23,28 +31,18 @@ class PRISMScorer:
     Based on the agentic-score.ipynb implementation but with Impact as single dimension
     """
     
-    def __init__(self):
-        # Initialize OpenAI client - prioritize .env file over system environment
-        # Ensure we use the values from our .env file
-        api_key = settings.OPENAI_API_KEY
-        base_url = settings.OPENAI_BASE_URL
-        
-        # Fallback to environment only if settings are None
-        if not api_key:
-            api_key = os.getenv('OPENAI_API_KEY')
-        if not base_url:
-            base_url = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+    def __init__(self, client: Optional[OpenAI] = None):
+        # Reuse the app-wide pooled client unless one is injected
+        api_key, base_url = resolve_credentials()
             
-        print(f"PRISM Scorer Initialization:")
-        print(f"  API key: {api_key[:15] if api_key else 'None'}...")
-        print(f"  Base URL: {base_url}")
-        print(f"  Source: {'settings' if settings.OPENAI_API_KEY else 'env'}")
-        
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url=base_url
+        logger.info(
+            "PRISM scorer initialised: base_url=%s, api key %s from %s",
+            base_url, "set" if api_key else "missing", "settings" if settings.OPENAI_API_KEY else "env"
         )
         
+        self._client = client
+        self.model = settings.OPENAI_MODEL
+        
         # Load authentic prompts from research
         self.few_shot_prompt = self._load_few_shot_examples()
         self.scoring_logic_prompt = self._load_scoring_logic()
@@ -52,6 +50,17 @@ class PRISMScorer:
         self.phd_student_prompt = self._load_phd_student_prompt()
         self.reviewer_persona = self._load_reviewer_personas()
         
+        # Build every agent prompt once: static guidance first, request content last
+        self.prompts = self._compile_prompts()
+        
+        # Identical concurrent scoring requests share one LLM call
+        self._single_flight = SingleFlight()
+        
+    @property
+    def client(self) -> OpenAI:
+        # Looked up per call: the pooled client is replaced after close_clients()
+        return self._client or get_openai_client()
+
     def _load_few_shot_examples(self) -> str:
         """EXACT few-shot examples from research adapted for 6 dimensions"""
         return """
@@ -247,17 +256,6 @@ Below are some few-shot examples to guide your scoring decisions:
 
 </example>
 
-<inputs>
-- IS1 (Original Incident System Description): 
- {{IS1}}
-
-- ID1 (Incident Description):
-  {{ID1}}
-
-- PD1 (New Product Description):
-  {{PD1}}
-</inputs>
-
 While assigning scores, do ensure that every score assigned is completely based on the information provided in the inputs. Do not assume any additional information or context beyond what is provided in the inputs.
 
 Return the result as a JSON object in the following format:
@@ -274,6 +272,223 @@ Return the result as a JSON object in the following format:
 ```
 """
     
+    def _compile_prompts(self) -> Dict[str, CompiledPrompt]:
+        """
+        Compile agent prompts with a stable static prefix so provider-side
+        prompt caching applies; only the trailing inputs change per call.
+        """
+        scorer_notes = """
+IMPORTANT ANALYSIS NOTES:
+- Pay careful attention to the specific technologies mentioned
+- Consider the exact use case and application domain
+- Look for subtle but important differences between systems
+- Don't give similar scores to different incidents - each should be evaluated independently
+- Be critical about transferability - many incidents will have low transferability
+"""
+        
+        generic_guidance = """
+You are an AI safety expert analyzing incident transferability between AI systems.
+
+TASK: Rate how likely the incident given at the end is to occur with the given product on a scale of 1-5.
+
+SCORING GUIDELINES:
+- 5 = VERY HIGH likelihood (same/similar technology, same use case, incident very likely to happen)
+- 4 = HIGH likelihood (related technology, similar context, incident quite possible)
+- 3 = MODERATE likelihood (some shared elements, incident somewhat possible)
+- 2 = LOW likelihood (few shared elements, incident unlikely but theoretically possible)
+- 1 = VERY LOW likelihood (completely different technology/context, incident very unlikely)
+
+CRITICAL ANALYSIS FACTORS:
+1. Technology overlap: Do they use similar AI technologies?
+2. Use case similarity: Are the application domains related?
+3. User interaction patterns: Similar ways users interact with the systems?
+4. Risk surface area: Do they have similar potential failure modes?
+5. Context relevance: Would this incident make sense in the product's context?
+
+BE VERY DISCRIMINATING in your scoring. Consider these specific aspects:
+- If technologies are completely different (e.g., image generation vs text processing), score lower
+- If use cases are different (e.g., creative tools vs business applications), score lower  
+- If the incident involves specific features the product doesn't have, score lower
+- If the incident is about a specific implementation detail, check if the product has that detail
+- Consider the severity and specificity of the incident - generic issues transfer more than specific ones
+
+IMPORTANT: Each incident should get a unique score based on its specific characteristics. Don't default to middle scores.
+
+Provide your response in this JSON format:
+{
+  "confidence_score": <number 1-5>,
+  "reasoning": "<specific analysis mentioning technology overlap, use case similarity, and likelihood assessment>"
+}
+"""
+        
+        bulk_generic_guidance = """
+You are an AI safety expert analyzing incident transferability between AI systems.
+
+TASK: For each incident listed at the end, rate how likely it is to occur with the given product on a scale of 1-100.
+
+SCORING GUIDELINES (1-100 scale):
+- 90-100 = VERY HIGH likelihood (same/similar technology, same use case, incident very likely to happen)
+- 70-89 = HIGH likelihood (related technology, similar context, incident quite possible)
+- 50-69 = MODERATE likelihood (some shared elements, incident somewhat possible)
+- 30-49 = LOW likelihood (few shared elements, incident unlikely but theoretically possible)
+- 1-29 = VERY LOW likelihood (completely different technology/context, incident very unlikely)
+
+BE VERY DISCRIMINATING in your scoring. Consider these specific aspects:
+- If technologies are completely different (e.g., image generation vs text processing), score lower
+- If use cases are different (e.g., creative tools vs business applications), score lower  
+- If the incident involves specific features the product doesn't have, score lower
+- Consider the severity and specificity of the incident
+
+Provide your response in this JSON format:
+{
+  "incident_scores": [
+    {
+      "incident_id": <number>,
+      "confidence_score": <number 1-100>,
+      "reasoning": "<specific analysis for this incident>"
+    },
+    ...for each incident...
+  ]
+}
+"""
+        
+        bulk_prism_guidance = """
+You are an expert PhD student working in AI Ethics and risks, using the PRISM methodology.
+
+TASK: For each incident listed at the end, provide PRISM scores on 1-100 scale for all 6 dimensions:
+
+SCORING GUIDELINES (1-100 scale for each dimension):
+1. Logical Coherence: Does the incident logically fit the product's function?
+2. Factual Accuracy: Is the incident within scope of product's features/technology?
+3. Practical Implementability: How likely is the incident to occur in real-world?
+4. Contextual Relevance: Does this make sense in the product's application domain?
+5. Impact: How severe is the overall impact (individual/group/global)?
+6. Exploitability: Is the risk inherent to system or from user misuse?
+
+BE DISCRIMINATING - each incident should get unique scores based on specific characteristics.
+
+Provide your response in this JSON format:
+{
+  "incident_scores": [
+    {
+      "incident_id": <number>,
+      "logical_coherence": <number 1-100>,
+      "factual_accuracy": <number 1-100>,
+      "practical_implementability": <number 1-100>,
+      "contextual_relevance": <number 1-100>,
+      "impact": <number 1-100>,
+      "exploitability": <number 1-100>,
+      "reasoning": "<brief analysis for this incident>"
+    },
+    ...for each incident...
+  ]
+}
+"""
+        
+        bulk_dual_guidance = """
+You are an expert PhD student working in AI Ethics and risks, using the PRISM methodology.
+
+TASK: For each incident listed at the end, give BOTH a generic likelihood score and PRISM scores, all on a 1-100 scale:
+
+GENERIC LIKELIHOOD (confidence_score): How likely is the incident to occur with the given product?
+- 90-100 = VERY HIGH (same/similar technology and use case)
+- 70-89 = HIGH (related technology, similar context)
+- 50-69 = MODERATE (some shared elements)
+- 30-49 = LOW (few shared elements)
+- 1-29 = VERY LOW (completely different technology/context)
+
+PRISM DIMENSIONS:
+1. Logical Coherence: Does the incident logically fit the product's function?
+2. Factual Accuracy: Is the incident within scope of product's features/technology?
+3. Practical Implementability: How likely is the incident to occur in real-world?
+4. Contextual Relevance: Does this make sense in the product's application domain?
+5. Impact: How severe is the overall impact (individual/group/global)?
+6. Exploitability: Is the risk inherent to system or from user misuse?
+
+BE DISCRIMINATING - each incident should get unique scores based on specific characteristics.
+
+Provide your response in this JSON format:
+{
+  "incident_scores": [
+    {
+      "incident_id": <number>,
+      "confidence_score": <number 1-100>,
+      "logical_coherence": <number 1-100>,
+      "factual_accuracy": <number 1-100>,
+      "practical_implementability": <number 1-100>,
+      "contextual_relevance": <number 1-100>,
+      "impact": <number 1-100>,
+      "exploitability": <number 1-100>,
+      "reasoning": "<brief analysis for this incident>"
+    },
+    ...for each incident...
+  ]
+}
+"""
+        
+        bulk_inputs = """
+PRODUCT TO ANALYZE:
+Name: {product_name}
+Description: {product_description}
+
+CONTEXT: {context}
+
+INCIDENTS TO ANALYZE:
+{incidents_text}"""
+        
+        return {
+            "router": compile_prompt(
+                "You are the Router Agent.",
+                [self.router_prompt],
+                "\nIS1: {is1}\nID1: {id1}\nPD1: {pd1}\n"
+            ),
+            "scorer": compile_prompt(
+                "You are the Scorer Agent (PhD Student). Be thorough and discriminating in your analysis. Each incident should get unique scores based on its specific characteristics.",
+                [self.phd_student_prompt, scorer_notes],
+                """
+<inputs>
+- IS1 (Original Incident System Description): 
+ {is1}
+
+- ID1 (Incident Description):
+  {id1}
+
+- PD1 (New Product Description):
+  {pd1}
+</inputs>
+"""
+            ),
+            "generic": compile_prompt(
+                "You are an expert at assessing AI incident transferability for generic analysis.",
+                [generic_guidance],
+                """
+PRODUCT TO ANALYZE:
+Name: {product_name}
+Description: {product_description}
+
+INCIDENT TO EVALUATE:
+Description: {incident_description}
+
+ANALYSIS CONTEXT: {context}
+"""
+            ),
+            "bulk_generic": compile_prompt(
+                "You are an expert at assessing AI incident transferability. Provide varied, discriminating scores from 1-100.",
+                [bulk_generic_guidance],
+                bulk_inputs
+            ),
+            "bulk_prism": compile_prompt(
+                "You are a PRISM methodology expert. Provide varied, discriminating scores from 1-100 for each dimension.",
+                [bulk_prism_guidance],
+                bulk_inputs
+            ),
+            "bulk_dual": compile_prompt(
+                "You are a PRISM methodology expert. Provide varied, discriminating scores from 1-100 for the generic likelihood and each dimension.",
+                [bulk_dual_guidance],
+                bulk_inputs
+            ),
+        }
+    
     def _load_reviewer_personas(self) -> Dict[str, str]:
         """EXACT reviewer personas from research"""
         return {
@@ -345,100 +560,79 @@ Return the result as a JSON object in the following format:
             )
         }
     
-    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(3))
-    def _call_openai(self, messages: List[Dict], temperature: float = 0.2, max_tokens: int = 600) -> str:
+    def _call_openai(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.2,
+        max_tokens: int = 600,
+        agent: str = "generic"
+    ) -> str:
         """Call OpenAI API with retry logic"""
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            
-            # Debug: Print response type and structure
-            print(f"Response type: {type(response)}")
-            
-            # Handle different response formats
-            if isinstance(response, str):
-                # Gateway returned a string directly
-                print("Gateway returned string response")
-                print(f"String content (first 200 chars): {response[:200]}...")
-                return response
-            elif hasattr(response, 'choices') and response.choices:
-                # Standard OpenAI response format
-                content = response.choices[0].message.content
-                print(f"Standard OpenAI response content (first 200 chars): {content[:200]}...")
-                return content
-            else:
-                # Unknown format, try to handle gracefully
-                print(f"Unknown response format: {response}")
-                # If response is a dict, try to extract content
-                if isinstance(response, dict):
-                    # Try common fields
-                    content = response.get('content') or response.get('message') or response.get('text')
-                    if content:
-                        print(f"Extracted content from dict: {content[:200]}...")
-                        return content
-                # If all else fails, convert to string
-                return str(response)
-                
-        except Exception as e:
-            print(f"Error calling OpenAI: {e}")
-            print(f"Response object: {response if 'response' in locals() else 'No response'}")
-            raise e
+        content, _ = self._call_llm(messages, temperature, max_tokens, agent)
+        return content
+    
+    def _call_openai_json(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.2,
+        max_tokens: int = 600,
+        agent: str = "generic"
+    ) -> Tuple[str, Optional[Dict]]:
+        """Call OpenAI API and parse the JSON object in the reply (None when parsing fails)"""
+        return self._call_llm(messages, temperature, max_tokens, agent, parse_json=True)
+    
+    def _call_llm(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        agent: str,
+        parse_json: bool = False
+    ) -> Tuple[str, Optional[Dict]]:
+        """Run one LLM call with retries and record its telemetry"""
+        return llm_gateway.complete(
+            messages,
+            agent=agent,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            client=self.client,
+            parse_json=parse_json
+        )
     
     def router_agent(self, is1: str, id1: str, pd1: str) -> Dict:
         """Router agent to classify risk type"""
-        prompt = self.router_prompt + f"\nIS1: {is1}\nID1: {id1}\nPD1: {pd1}\n"
-        messages = [
-            {"role": "system", "content": "You are the Router Agent."},
-            {"role": "user", "content": prompt}
-        ]
-        response = self._call_openai(messages)
-        print(f"Router agent raw response: {response}")
-        try:
-            output = json_repair.loads(response)
-            print(f"Router agent parsed output: {output}")
-        except Exception as e:
-            print(f"Error parsing router output: {e}")
-            print(f"Raw response that failed to parse: {response}")
+        messages = self.prompts["router"].render(is1=is1, id1=id1, pd1=pd1)
+        response, output = self._call_openai_json(messages, agent="router")
+        log_payload(logger, "Router agent raw response", response)
+        if output is None:
+            logger.warning("Router agent response failed to parse: %s", Payload(response))
             output = {"risk_type": "Safety & Security", "justification": "Default due to parsing error"}
         return output
     
     def scorer_agent(self, is1: str, id1: str, pd1: str) -> Dict:
         """PhD student scorer agent"""
-        # Add some context variation to make each call more unique
-        variation_context = f"""
-        
-IMPORTANT ANALYSIS NOTES:
-- Pay careful attention to the specific technologies mentioned
-- Consider the exact use case and application domain
-- Look for subtle but important differences between systems
-- Don't give similar scores to different incidents - each should be evaluated independently
-- Be critical about transferability - many incidents will have low transferability
-        
-Original Incident Context: {is1}
-Specific Incident Details: {id1}
-Target Product Details: {pd1}
-        """
-        
-        prompt = self.phd_student_prompt.replace("{IS1}", is1).replace("{ID1}", id1).replace("{PD1}", pd1) + variation_context
-        messages = [
-            {"role": "system", "content": "You are the Scorer Agent (PhD Student). Be thorough and discriminating in your analysis. Each incident should get unique scores based on its specific characteristics."},
-            {"role": "user", "content": prompt}
-        ]
-        response = self._call_openai(messages, temperature=0.4, max_tokens=800)  # Increased temperature and tokens for more variation
-        print(f"Scorer agent raw response: {response}")
-        try:
-            output = json_repair.loads(response)
-            print(f"Scorer agent parsed output: {output}")
-        except Exception as e:
-            print(f"Error parsing scorer output: {e}")
-            print(f"Raw response that failed to parse: {response}")
+        messages = self.prompts["scorer"].render(is1=is1, id1=id1, pd1=pd1)
+        response, output = self._call_openai_json(messages, temperature=0.4, max_tokens=800, agent="scorer")  # Increased temperature and tokens for more variation
+        log_payload(logger, "Scorer agent raw response", response)
+        if output is None:
+            logger.warning("Scorer agent response failed to parse: %s", Payload(response))
             output = self._get_default_scores()
         return output
     
+    def reviewer_agent(self, persona: str, is1: str, id1: str, pd1: str) -> Optional[Dict]:
+        """Scorer prompt answered from one reviewer persona's perspective (None if unparseable)"""
+        # The persona follows the shared scorer guidance, so every reviewer reuses the cached prefix
+        note = (
+            f"<reviewer>\nYou are a Reviewer acting as the Scorer Agent. {self.reviewer_persona[persona]} "
+            "Score the pair independently from your own expert perspective.\n</reviewer>"
+        )
+        messages = self.prompts["scorer"].render(note, is1=is1, id1=id1, pd1=pd1)
+        response, output = self._call_openai_json(messages, temperature=0.4, max_tokens=800, agent="reviewer")
+        if output is None:
+            logger.warning("Reviewer '%s' response failed to parse: %s", persona, Payload(response))
+        return output
+    
     def _get_default_scores(self) -> Dict:
         """Default scores when parsing fails"""
         return {
@@ -451,6 +645,7 @@ Target Product Details: {pd1}
             "Application Domain": "General AI"
         }
     
+    @coalesce("authentic_prism")
     def calculate_authentic_prism_scores(
         self, 
         incident_data: Dict[str, Any], 
@@ -465,13 +660,15 @@ Target Product Details: {pd1}
         id1 = incident_data.get('description', '')
         pd1 = product_data.get('description', '')
         
-        print("Step 1: Running Router Agent...")
-        router_result = self.router_agent(is1, id1, pd1)
-        risk_type = router_result.get("risk_type", "Safety & Security")
-        print(f"Risk Type: {risk_type}")
-
-        print("Step 2: Running Scorer Agent...")
-        scorer_result = self.scorer_agent(is1, id1, pd1)
+        try:
+            router_result = self.router_agent(is1, id1, pd1)
+            risk_type = router_result.get("risk_type", "Safety & Security")
+            logger.debug("Router risk type: %s", risk_type)
+
+            scorer_result = self.scorer_agent(is1, id1, pd1)
+        except CircuitOpenError as e:
+            logger.warning("%s - serving degraded PRISM estimate", e)
+            return degraded_scoring.prism_result(incident_data, product_data)
         
         # Extract scores and rationales from the 6-dimension result
         scores = {}
@@ -516,14 +713,7 @@ Target Product Details: {pd1}
         """Calculate transferability score using research methodology"""
         
         # Weighted scoring based on research adapted for 6 dimensions
-        weights = {
-            'logical_coherence': 0.25,
-            'factual_accuracy': 0.25,
-            'practical_implementability': 0.20,
-            'contextual_relevance': 0.15,
-            'impact': 0.10,
-            'exploitability': 0.05
-        }
+        weights = weight_profiles.BUILTIN_PROFILES["authentic"]
         
         total_score = 0
         total_weight = 0
@@ -595,6 +785,7 @@ Target Product Details: {pd1}
         
         return explanation
 
+    @coalesce("generic_confidence")
     def calculate_generic_confidence_score(
         self, 
         incident_data: Dict[str, Any], 
@@ -610,71 +801,25 @@ Target Product Details: {pd1}
             incident_description = incident_data.get('description', '')
             context = incident_data.get('context', '')
             
-            # Create generic scoring prompt
-            prompt = f"""
-You are an AI safety expert analyzing incident transferability between AI systems.
-
-PRODUCT TO ANALYZE:
-Name: {product_name}
-Description: {product_description}
-
-INCIDENT TO EVALUATE:
-Description: {incident_description}
-
-ANALYSIS CONTEXT: {context}
-
-TASK: Rate how likely this incident is to occur with the given product on a scale of 1-5.
-
-SCORING GUIDELINES:
-- 5 = VERY HIGH likelihood (same/similar technology, same use case, incident very likely to happen)
-- 4 = HIGH likelihood (related technology, similar context, incident quite possible)
-- 3 = MODERATE likelihood (some shared elements, incident somewhat possible)
-- 2 = LOW likelihood (few shared elements, incident unlikely but theoretically possible)
-- 1 = VERY LOW likelihood (completely different technology/context, incident very unlikely)
-
-CRITICAL ANALYSIS FACTORS:
-1. Technology overlap: Do they use similar AI technologies?
-2. Use case similarity: Are the application domains related?
-3. User interaction patterns: Similar ways users interact with the systems?
-4. Risk surface area: Do they have similar potential failure modes?
-5. Context relevance: Would this incident make sense in the product's context?
-
-BE VERY DISCRIMINATING in your scoring. Consider these specific aspects:
-- If technologies are completely different (e.g., image generation vs text processing), score lower
-- If use cases are different (e.g., creative tools vs business applications), score lower  
-- If the incident involves specific features the product doesn't have, score lower
-- If the incident is about a specific implementation detail, check if the product has that detail
-- Consider the severity and specificity of the incident - generic issues transfer more than specific ones
-
-IMPORTANT: Each incident should get a unique score based on its specific characteristics. Don't default to middle scores.
-
-Provide your response in this JSON format:
-{{
-  "confidence_score": <number 1-5>,
-  "reasoning": "<specific analysis mentioning technology overlap, use case similarity, and likelihood assessment>"
-}}
-"""
-
-            messages = [
-                {"role": "system", "content": "You are an expert at assessing AI incident transferability for generic analysis."},
-                {"role": "user", "content": prompt}
-            ]
+            messages = self.prompts["generic"].render(
+                product_name=product_name,
+                product_description=product_description,
+                incident_description=incident_description,
+                context=context
+            )
             
-            response = self._call_openai(messages, temperature=0.3, max_tokens=300)
+            response, output = self._call_openai_json(messages, temperature=0.3, max_tokens=300, agent="generic")
             
-            print(f"Generic confidence raw response: {response}")
+            log_payload(logger, "Generic confidence raw response", response)
             try:
-                output = json_repair.loads(response)
-                print(f"Generic confidence parsed output: {output}")
+                if output is None:
+                    raise ValueError("Response is not a JSON object")
                 confidence_score = output.get('confidence_score', 3)
                 reasoning = output.get('reasoning', 'Generic confidence assessment')
-                
-                # Debug: Show the actual score being returned
-                print(f"Final confidence score: {confidence_score} (raw: {confidence_score}, type: {type(confidence_score)})")
+                logger.debug("Generic confidence score: %s", confidence_score)
                 
             except Exception as e:
-                print(f"Error parsing generic scoring output: {e}")
-                print(f"Raw response that failed to parse: {response}")
+                logger.warning("Error parsing generic scoring output: %s; response: %s", e, Payload(response))
                 confidence_score = 3
                 reasoning = "Default score due to parsing error"
             
@@ -688,8 +833,11 @@ Provide your response in this JSON format:
             
             return result
             
+        except CircuitOpenError as e:
+            logger.warning("%s - serving degraded generic estimate", e)
+            return degraded_scoring.generic_result(incident_data, product_data)
         except Exception as e:
-            print(f"Error in calculate_generic_confidence_score: {e}")
+            logger.error("Error in calculate_generic_confidence_score: %s", e)
             return {
                 'transferability_score': 3.0,
                 'confidence_score': 3.0,
@@ -706,7 +854,7 @@ Provide your response in this JSON format:
             
             # Try a simple completion request
             response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=self.model,
                 messages=[{"role": "user", "content": "Hello, this is a test. Please respond with just 'OK'."}],
                 max_tokens=10
             )
@@ -726,18 +874,12 @@ Provide your response in this JSON format:
             print(f"ERROR: Gateway test failed: {e}")
             return False
 
-    def bulk_calculate_generic_scores(self, incidents: list, product_data: dict, context: str) -> list:
-        """
-        Calculate generic confidence scores for ALL incidents in ONE API call.
-        Returns scores on 1-100 scale.
-        """
-        try:
-            print(f"Bulk processing {len(incidents)} incidents for generic scoring")
-            
-            # Create bulk prompt with all incidents
-            incidents_text = ""
-            for i, incident in enumerate(incidents, 1):
-                incidents_text += f"""
+    @staticmethod
+    def _format_incidents(incidents: list) -> str:
+        """Incident listing appended to the bulk prompts"""
+        incidents_text = ""
+        for i, incident in enumerate(incidents, 1):
+            incidents_text += f"""
 INCIDENT {i}:
 ID: {incident['id']}
 Title: {incident['title']}
@@ -745,64 +887,84 @@ Description: {incident['description']}
 Technologies: {', '.join(incident.get('technologies', []))}
 
 """
+        return incidents_text
+
+    def _bulk_score(
+        self,
+        agent: str,
+        incidents: list,
+        product_data: dict,
+        context: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Dict[str, Dict]:
+        """
+        Score incidents with a bulk prompt and return their entries keyed by incident id.
+        Complete entries are kept even when the response is truncated; incidents
+        missing from it are re-requested once in a smaller follow-up call.
+        """
+        scores: Dict[str, Dict] = {}
+        pending = list(incidents)
+        for call in range(2):
+            messages = self.prompts[agent].render(
+                product_name=product_data.get('name', 'Unknown Product'),
+                product_description=product_data.get('description', ''),
+                context=context,
+                incidents_text=self._format_incidents(pending)
+            )
+            
+            try:
+                response, _ = self._call_openai_json(messages, temperature=temperature, max_tokens=max_tokens, agent=agent)
+            except (deadline.DeadlineExceeded, CircuitOpenError) as e:
+                if call == 0:
+                    raise
+                # Keep the first response's scores rather than discarding them
+                logger.warning("Bulk %s: not re-requesting %d incidents: %s", agent, len(pending), e)
+                break
+            log_payload(logger, f"Bulk {agent} raw response", response)
+            
+            scores.update(self._match_incident_scores(pending, extract_array_objects(response, 'incident_scores')))
+            pending = [incident for incident in pending if str(incident['id']) not in scores]
+            if not pending:
+                break
+            if call == 0:
+                logger.info("Bulk %s: %d of %d incidents missing from response, re-requesting them", agent, len(pending), len(incidents))
+        return scores
+
+    @staticmethod
+    def _match_incident_scores(incidents: list, entries: List[Dict]) -> Dict[str, Dict]:
+        """Match response entries to incidents by incident_id (by position only if the id is absent)"""
+        requested = {str(incident['id']) for incident in incidents}
+        matched: Dict[str, Dict] = {}
+        for position, entry in enumerate(entries):
+            incident_id = entry.get('incident_id')
+            if incident_id is None:
+                if position >= len(incidents):
+                    continue
+                key = str(incidents[position]['id'])
+            else:
+                key = str(incident_id)
+            if key in requested:
+                matched.setdefault(key, entry)
+        return matched
 
-            prompt = f"""
-You are an AI safety expert analyzing incident transferability between AI systems.
-
-PRODUCT TO ANALYZE:
-Name: {product_data.get('name', 'Unknown Product')}
-Description: {product_data.get('description', '')}
-
-CONTEXT: {context}
-
-TASK: For each incident below, rate how likely it is to occur with the given product on a scale of 1-100.
-
-SCORING GUIDELINES (1-100 scale):
-- 90-100 = VERY HIGH likelihood (same/similar technology, same use case, incident very likely to happen)
-- 70-89 = HIGH likelihood (related technology, similar context, incident quite possible)
-- 50-69 = MODERATE likelihood (some shared elements, incident somewhat possible)
-- 30-49 = LOW likelihood (few shared elements, incident unlikely but theoretically possible)
-- 1-29 = VERY LOW likelihood (completely different technology/context, incident very unlikely)
-
-BE VERY DISCRIMINATING in your scoring. Consider these specific aspects:
-- If technologies are completely different (e.g., image generation vs text processing), score lower
-- If use cases are different (e.g., creative tools vs business applications), score lower  
-- If the incident involves specific features the product doesn't have, score lower
-- Consider the severity and specificity of the incident
-
-INCIDENTS TO ANALYZE:
-{incidents_text}
-
-Provide your response in this JSON format:
-{{
-  "incident_scores": [
-    {{
-      "incident_id": <number>,
-      "confidence_score": <number 1-100>,
-      "reasoning": "<specific analysis for this incident>"
-    }},
-    ...for each incident...
-  ]
-}}
-"""
-
-            messages = [
-                {"role": "system", "content": "You are an expert at assessing AI incident transferability. Provide varied, discriminating scores from 1-100."},
-                {"role": "user", "content": prompt}
-            ]
+    @coalesce("bulk_generic")
+    def bulk_calculate_generic_scores(self, incidents: list, product_data: dict, context: str) -> list:
+        """
+        Calculate generic confidence scores for ALL incidents in ONE API call.
+        Returns scores on 1-100 scale.
+        """
+        try:
+            logger.debug("Bulk processing %d incidents for generic scoring", len(incidents))
             
-            response = self._call_openai(messages, temperature=0.4, max_tokens=2000)
-            print(f"Bulk generic raw response: {response[:500]}...")
+            scores = self._bulk_score("bulk_generic", incidents, product_data, context, temperature=0.4, max_tokens=2000)
             
             try:
-                output = json_repair.loads(response)
-                scores = output.get('incident_scores', [])
-                
                 # Validate and format results
                 results = []
                 for i, incident in enumerate(incidents):
-                    if i < len(scores):
-                        score_data = scores[i]
+                    score_data = scores.get(str(incident['id']))
+                    if score_data is not None:
                         results.append({
                             'incident_id': incident['id'],
                             'confidence_score': score_data.get('confidence_score', 50),
@@ -816,109 +978,45 @@ Provide your response in this JSON format:
                             'reasoning': 'Default score - insufficient LLM response'
                         })
                 
-                print(f"Bulk generic results: {len(results)} scores, range {min(r['confidence_score'] for r in results)}-{max(r['confidence_score'] for r in results)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Bulk generic results: %d scores, range %s-%s", len(results), min(r['confidence_score'] for r in results), max(r['confidence_score'] for r in results))
                 return results
                 
             except Exception as e:
-                print(f"Error parsing bulk generic response: {e}")
+                logger.warning("Error parsing bulk generic response: %s", e)
                 # Return default varied scores
                 return [{'incident_id': inc['id'], 'confidence_score': 50 + (i * 5) % 40, 'reasoning': 'Parsing error'} 
                        for i, inc in enumerate(incidents)]
                 
+        except CircuitOpenError as e:
+            logger.warning("%s - serving degraded generic estimates", e)
+            return degraded_scoring.bulk_scores(incidents, product_data, "generic")
         except Exception as e:
-            print(f"Error in bulk_calculate_generic_scores: {e}")
+            logger.error("Error in bulk_calculate_generic_scores: %s", e)
             return [{'incident_id': inc['id'], 'confidence_score': 50, 'reasoning': 'Calculation error'} 
                    for inc in incidents]
 
+    @coalesce("bulk_prism")
     def bulk_calculate_prism_scores(self, incidents: list, product_data: dict, context: str) -> list:
         """
         Calculate PRISM scores for ALL incidents in ONE API call.
         Returns scores on 1-100 scale with proper weighting: [0.2, 0.2, 0.2, 0.2, 0.1, 0.1]
         """
         try:
-            print(f"Bulk processing {len(incidents)} incidents for PRISM scoring")
+            logger.debug("Bulk processing %d incidents for PRISM scoring", len(incidents))
             
-            # Create bulk prompt with all incidents
-            incidents_text = ""
-            for i, incident in enumerate(incidents, 1):
-                incidents_text += f"""
-INCIDENT {i}:
-ID: {incident['id']}
-Title: {incident['title']}
-Description: {incident['description']}
-Technologies: {', '.join(incident.get('technologies', []))}
-
-"""
-
-            prompt = f"""
-You are an expert PhD student working in AI Ethics and risks, using the PRISM methodology.
-
-PRODUCT TO ANALYZE:
-Name: {product_data.get('name', 'Unknown Product')}
-Description: {product_data.get('description', '')}
-
-CONTEXT: {context}
-
-TASK: For each incident below, provide PRISM scores on 1-100 scale for all 6 dimensions:
-
-SCORING GUIDELINES (1-100 scale for each dimension):
-1. Logical Coherence: Does the incident logically fit the product's function?
-2. Factual Accuracy: Is the incident within scope of product's features/technology?
-3. Practical Implementability: How likely is the incident to occur in real-world?
-4. Contextual Relevance: Does this make sense in the product's application domain?
-5. Impact: How severe is the overall impact (individual/group/global)?
-6. Exploitability: Is the risk inherent to system or from user misuse?
-
-BE DISCRIMINATING - each incident should get unique scores based on specific characteristics.
-
-INCIDENTS TO ANALYZE:
-{incidents_text}
-
-Provide your response in this JSON format:
-{{
-  "incident_scores": [
-    {{
-      "incident_id": <number>,
-      "logical_coherence": <number 1-100>,
-      "factual_accuracy": <number 1-100>,
-      "practical_implementability": <number 1-100>,
-      "contextual_relevance": <number 1-100>,
-      "impact": <number 1-100>,
-      "exploitability": <number 1-100>,
-      "reasoning": "<brief analysis for this incident>"
-    }},
-    ...for each incident...
-  ]
-}}
-"""
-
-            messages = [
-                {"role": "system", "content": "You are a PRISM methodology expert. Provide varied, discriminating scores from 1-100 for each dimension."},
-                {"role": "user", "content": prompt}
-            ]
-            
-            response = self._call_openai(messages, temperature=0.5, max_tokens=3000)
-            print(f"Bulk PRISM raw response: {response[:500]}...")
+            scores = self._bulk_score("bulk_prism", incidents, product_data, context, temperature=0.5, max_tokens=3000)
             
             try:
-                output = json_repair.loads(response)
-                scores = output.get('incident_scores', [])
-                
-                # Calculate weighted overall scores with new weights: [0.2, 0.2, 0.2, 0.2, 0.1, 0.1]
-                weights = {
-                    'logical_coherence': 0.2,
-                    'factual_accuracy': 0.2,
-                    'practical_implementability': 0.2,
-                    'contextual_relevance': 0.2,
-                    'impact': 0.1,
-                    'exploitability': 0.1
-                }
+
+                # Calculate weighted overall scores with the bulk profile: [0.2, 0.2, 0.2, 0.2, 0.1, 0.1]
+                weights = weight_profiles.BUILTIN_PROFILES["bulk"]
                 
                 # Validate and format results
                 results = []
                 for i, incident in enumerate(incidents):
-                    if i < len(scores):
-                        score_data = scores[i]
+                    score_data = scores.get(str(incident['id']))
+                    if score_data is not None:
                         
                         # Get individual dimension scores
                         dim_scores = {
@@ -958,31 +1056,90 @@ Provide your response in this JSON format:
                             'reasoning': 'Default score - insufficient LLM response'
                         })
                 
-                print(f"Bulk PRISM results: {len(results)} scores, overall range {min(r['overall_score'] for r in results):.1f}-{max(r['overall_score'] for r in results):.1f}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Bulk PRISM results: %d scores, overall range %.1f-%.1f", len(results), min(r['overall_score'] for r in results), max(r['overall_score'] for r in results))
                 return results
                 
             except Exception as e:
-                print(f"Error parsing bulk PRISM response: {e}")
+                logger.warning("Error parsing bulk PRISM response: %s", e)
                 # Return default varied scores
                 return [{'incident_id': inc['id'], 'logical_coherence': 50, 'factual_accuracy': 50, 
                         'practical_implementability': 50, 'contextual_relevance': 50, 'impact': 50, 
                         'exploitability': 50, 'overall_score': 50, 'reasoning': 'Parsing error'} 
                        for inc in incidents]
                 
+        except CircuitOpenError as e:
+            logger.warning("%s - serving degraded PRISM estimates", e)
+            return degraded_scoring.bulk_scores(incidents, product_data, "prism")
         except Exception as e:
-            print(f"Error in bulk_calculate_prism_scores: {e}")
+            logger.error("Error in bulk_calculate_prism_scores: %s", e)
             return [{'incident_id': inc['id'], 'logical_coherence': 50, 'factual_accuracy': 50, 
                     'practical_implementability': 50, 'contextual_relevance': 50, 'impact': 50, 
                     'exploitability': 50, 'overall_score': 50, 'reasoning': 'Calculation error'} 
                    for inc in incidents]
 
+    @coalesce("bulk_dual")
+    def bulk_calculate_dual_scores(self, incidents: list, product_data: dict, context: str) -> list:
+        """
+        Calculate generic confidence AND PRISM scores for ALL incidents in ONE API call.
+        Returns both score sets on 1-100 scale, sharing one reasoning per incident.
+        """
+        try:
+            logger.debug("Bulk processing %d incidents for dual (generic + PRISM) scoring", len(incidents))
+            
+            scores = self._bulk_score("bulk_dual", incidents, product_data, context, temperature=0.5, max_tokens=3500)
+            weights = weight_profiles.BUILTIN_PROFILES["bulk"]
+            
+            results = []
+            for incident in incidents:
+                score_data = scores.get(str(incident['id']))
+                if score_data is None:
+                    results.append(self._dual_fallback(incident, 'Default score - insufficient LLM response'))
+                    continue
+                dim_scores = {dim: score_data.get(dim, 50) for dim in weights}
+                results.append({
+                    'incident_id': incident['id'],
+                    'confidence_score': score_data.get('confidence_score', 50),
+                    **dim_scores,
+                    'overall_score': sum(dim_scores[dim] * weights[dim] for dim in dim_scores),
+                    'reasoning': score_data.get('reasoning', 'PRISM analysis')
+                })
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Bulk dual results: %d scores, overall range %.1f-%.1f", len(results), min(r['overall_score'] for r in results), max(r['overall_score'] for r in results))
+            return results
+                
+        except CircuitOpenError as e:
+            logger.warning("%s - serving degraded dual estimates", e)
+            return degraded_scoring.bulk_scores(incidents, product_data, "dual")
+        except Exception as e:
+            logger.error("Error in bulk_calculate_dual_scores: %s", e)
+            return [self._dual_fallback(incident, 'Calculation error') for incident in incidents]
+
+    @staticmethod
+    def _dual_fallback(incident: dict, reasoning: str) -> dict:
+        return {
+            'incident_id': incident['id'], 'confidence_score': 50, 'logical_coherence': 50, 'factual_accuracy': 50,
+            'practical_implementability': 50, 'contextual_relevance': 50, 'impact': 50,
+            'exploitability': 50, 'overall_score': 50, 'reasoning': reasoning
+        }
+
+_scorer: Optional[PRISMScorer] = None
+_scorer_lock = threading.Lock()
+
+def get_prism_scorer() -> PRISMScorer:
+    """App-lifetime scorer, created on first use"""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = PRISMScorer()
+        return _scorer
+
 # Legacy compatibility functions
 def calculate_prism_scores(incident_data: Dict, product_data: Dict) -> Dict:
     """Legacy function for backward compatibility"""
-    scorer = PRISMScorer()
-    return scorer.calculate_authentic_prism_scores(incident_data, product_data)
+    return get_prism_scorer().calculate_authentic_prism_scores(incident_data, product_data)
 
 def get_explanation(result: Dict, incident: Dict, product: Dict) -> str:
     """Legacy function for backward compatibility"""
-    scorer = PRISMScorer()
-    return scorer.get_explanation(result, incident, product) 
\ No newline at end of file
+    return get_prism_scorer().get_explanation(result, incident, product)
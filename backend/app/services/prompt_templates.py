@@ -0,0 +1,43 @@
+"""
+Precompiled Prompt Templates
+Each agent prompt is compiled once into a static prefix (instructions, rubric,
+few-shot examples, output format) followed by a small variable suffix holding
+the incident/product content. Keeping the prefix byte-identical across calls
+lets the provider's automatic prompt caching reuse it, so per-call variations
+(such as a reviewer persona) go after it, next to the request content.
+"""
+
+import string
+from typing import Dict, List, Optional
+
+class CompiledPrompt:
+    """A chat prompt split into a cacheable static prefix and a variable suffix"""
+
+    def __init__(self, system: str, static_prefix: str, variable_template: str):
+        self.system = system
+        self.static_prefix = static_prefix
+        self.variable_template = variable_template
+        self.fields = {
+            field for _, field, _, _ in string.Formatter().parse(variable_template) if field
+        }
+
+    def render_user(self, note: Optional[str] = None, **values: str) -> str:
+        """User message: static prefix first, then the per-call note (if any) and the request content"""
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Missing prompt fields: {', '.join(sorted(missing))}")
+        return self.static_prefix + (f"\n{note}\n" if note else "") + self.variable_template.format(**values)
+
+    def render(self, note: Optional[str] = None, **values: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.render_user(note, **values)}
+        ]
+
+def compile_prompt(system: str, static_parts: List[str], variable_template: str) -> CompiledPrompt:
+    """
+    Build a prompt once at construction.
+    `static_parts` are joined verbatim and must not contain per-request data;
+    `variable_template` uses str.format fields for the request content.
+    """
+    return CompiledPrompt(system, "".join(static_parts), variable_template)
@@ -0,0 +1,246 @@
+"""
+LLM Gateway Rate Limiter
+Token buckets for requests-per-minute and tokens-per-minute shared by every
+PRISMScorer in the process, and optionally by every worker process through a
+SQLite state file. Callers queue briefly for capacity instead of hitting the
+gateway, and a 429's Retry-After pauses all callers until the window passes.
+"""
+
+import email.utils
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import openai
+from tenacity import wait_random_exponential
+
+from app.core.config import settings
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+# (requests available, tokens available, last refill time, blocked until)
+BucketState = Tuple[float, float, float, float]
+
+class RateLimitQueueTimeout(Exception):
+    """Raised when capacity does not free up within the maximum queue wait"""
+
+class TokenBucketRateLimiter:
+    """
+    RPM/TPM token buckets refilled continuously at limit/60 per second.
+    A limit of 0 disables that bucket. With `state_path` set the bucket state
+    lives in a SQLite file and is updated under BEGIN IMMEDIATE, so uvicorn
+    workers sharing the file share the limit.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_wait_s: float = 30.0,
+        state_path: Optional[str] = None,
+        name: str = "default"
+    ):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.max_wait_s = max_wait_s
+        self.state_path = state_path
+        self.name = name
+        self._lock = threading.Lock()
+        self._state: BucketState = (float(self.rpm), float(self.tpm), time.time(), 0.0)
+        if state_path:
+            self._init_state_file()
+
+    @classmethod
+    def from_settings(cls) -> "TokenBucketRateLimiter":
+        return cls(
+            requests_per_minute=settings.LLM_RATE_LIMIT_RPM,
+            tokens_per_minute=settings.LLM_RATE_LIMIT_TPM,
+            max_wait_s=settings.LLM_RATE_LIMIT_MAX_WAIT_S,
+            state_path=settings.LLM_RATE_LIMIT_STATE_PATH
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm)
+
+    def acquire(self, tokens: int, max_wait_s: Optional[float] = None) -> float:
+        """
+        Block until one request and `tokens` tokens are available; returns seconds waited.
+        `max_wait_s` can shorten (never extend) the configured maximum queue wait.
+        """
+        if not self.enabled:
+            return 0.0
+
+        max_wait = self.max_wait_s if max_wait_s is None else min(self.max_wait_s, max_wait_s)
+        started = time.time()
+        deadline = started + max_wait
+        while True:
+            wait = self._update(lambda state, now: self._take(state, now, tokens))
+            if wait <= 0:
+                return time.time() - started
+            if time.time() + wait > deadline:
+                raise RateLimitQueueTimeout(
+                    f"LLM rate limit: no capacity within {max_wait:.0f}s (next slot in {wait:.1f}s)"
+                )
+            # Small jitter so queued callers do not wake in lockstep
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage of a call is known"""
+        if not self.tpm or not actual_tokens:
+            return
+
+        def apply(state: BucketState, now: float) -> Tuple[BucketState, float]:
+            requests, tokens, updated, blocked_until = self._refill(state, now)
+            tokens = min(tokens + estimated_tokens - actual_tokens, float(self.tpm))
+            return (requests, tokens, updated, blocked_until), 0.0
+
+        self._update(apply)
+
+    def penalize(self, seconds: float) -> None:
+        """Hold every caller until `seconds` from now (e.g. a 429 Retry-After)"""
+        if seconds <= 0:
+            return
+
+        def apply(state: BucketState, now: float) -> Tuple[BucketState, float]:
+            requests, tokens, updated, blocked_until = self._refill(state, now)
+            return (requests, tokens, updated, max(blocked_until, now + seconds)), 0.0
+
+        self._update(apply)
+
+    def note_rate_limited(self, error: Exception) -> float:
+        """Apply the Retry-After of a 429 response (or the default pause) to all callers"""
+        seconds = retry_after_seconds(error)
+        if seconds is None:
+            seconds = settings.LLM_RATE_LIMIT_DEFAULT_PAUSE_S
+        logger.warning("LLM gateway rate limited, pausing requests for %.1fs", seconds)
+        self.penalize(seconds)
+        return seconds
+
+    def _refill(self, state: BucketState, now: float) -> BucketState:
+        requests, tokens, updated, blocked_until = state
+        elapsed = max(now - updated, 0.0)
+        if self.rpm:
+            requests = min(float(self.rpm), requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            tokens = min(float(self.tpm), tokens + elapsed * self.tpm / 60)
+        return requests, tokens, now, blocked_until
+
+    def _take(self, state: BucketState, now: float, needed_tokens: int) -> Tuple[BucketState, float]:
+        """Reserve capacity if available; otherwise return the time until it will be"""
+        requests, tokens, updated, blocked_until = self._refill(state, now)
+        if now < blocked_until:
+            return (requests, tokens, updated, blocked_until), blocked_until - now
+
+        # A single call larger than the whole bucket waits for a full bucket
+        needed_tokens = min(needed_tokens, self.tpm) if self.tpm else 0
+        waits = []
+        if self.rpm and requests < 1:
+            waits.append((1 - requests) * 60 / self.rpm)
+        if self.tpm and tokens < needed_tokens:
+            waits.append((needed_tokens - tokens) * 60 / self.tpm)
+        if waits:
+            return (requests, tokens, updated, blocked_until), max(waits)
+
+        if self.rpm:
+            requests -= 1
+        if self.tpm:
+            tokens -= needed_tokens
+        return (requests, tokens, updated, blocked_until), 0.0
+
+    def _update(self, apply) -> float:
+        """Run `apply(state, now) -> (state, wait)` atomically against the shared state"""
+        if self.state_path:
+            return self._update_file(apply)
+        with self._lock:
+            self._state, wait = apply(self._state, time.time())
+            return wait
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.state_path, timeout=10, isolation_level=None)
+
+    def _init_state_file(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limiter_state ("
+                "name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated_at REAL, blocked_until REAL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO rate_limiter_state VALUES (?, ?, ?, ?, ?)",
+                (self.name,) + self._state
+            )
+        finally:
+            conn.close()
+
+    def _update_file(self, apply) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT requests, tokens, updated_at, blocked_until FROM rate_limiter_state WHERE name = ?",
+                (self.name,)
+            ).fetchone()
+            state = tuple(row) if row else self._state
+            new_state, wait = apply(state, time.time())
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limiter_state VALUES (?, ?, ?, ?, ?)",
+                (self.name,) + tuple(new_state)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: int) -> int:
+    """Rough request size: ~4 characters per prompt token plus the completion budget"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Seconds to wait from a 429's retry-after-ms / Retry-After headers, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                retry_at = email.utils.parsedate_to_datetime(retry_after)
+                return max(retry_at.timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+_backoff = wait_random_exponential(min=1, max=60)
+
+def llm_retry_wait(retry_state) -> float:
+    """
+    Tenacity wait: retry 429s immediately because the limiter already holds the
+    next attempt until Retry-After passes; back off exponentially otherwise.
+    """
+    error = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(error, openai.RateLimitError):
+        return 0.0
+    return _backoff(retry_state)
+
+# Process-wide limiter shared by every PRISMScorer instance
+llm_rate_limiter = TokenBucketRateLimiter.from_settings()
@@ -1,13 +1,20 @@
 from typing import List, Dict, Optional
-import openai
+from app.services import deadline, llm_gateway
 import json
 from app.core.config import settings
+from app.core.json_fields import decode_list
 from app.models.product import Product
 from app.models.incident import Incident
 from app.schemas.incident import IncidentWithScores
 from app.crud import incident as incident_crud
+from app.core.log import get_logger
 from sqlalchemy.orm import Session
 
+logger = get_logger(__name__)
+
+EXPLANATION_MODEL = "gpt-4"
+EXPLANATION_ERROR = "Error generating explanation"
+
 async def calculate_similarity_score(product: Product, incident: Incident) -> float:
     """
     Calculate similarity score between product and incident.
@@ -36,7 +43,8 @@ async def calculate_similarity_score(product: Product, incident: Incident) -> fl
         4. Domain similarity
         """
 
-        response = await openai.ChatCompletion.acreate(
+        content = await llm_gateway.acomplete(
+            agent="similarity",
             model="gpt-4",
             messages=[
                 {
@@ -53,11 +61,11 @@ async def calculate_similarity_score(product: Product, incident: Incident) -> fl
         )
 
         # Parse the response to get the similarity score
-        score = float(response.choices[0].message.content.strip())
+        score = float(content.strip())
         return min(max(score, 0.0), 1.0)  # Ensure score is between 0 and 1
 
     except Exception as e:
-        print(f"Error in calculate_similarity_score: {str(e)}")
+        logger.error("Error in calculate_similarity_score: %s", e)
         return 0.0
 
 async def calculate_risk_score(incident: Incident) -> float:
@@ -91,6 +99,40 @@ async def calculate_risk_score(incident: Incident) -> float:
     risk_level_factor = risk_level_map.get(incident.risk_level, 0.5)
     return score * risk_level_factor
 
+def calculate_text_similarity(product_text: str, incident_text: str) -> float:
+    """Simple text similarity using word overlap"""
+    try:
+        product_words = set(product_text.lower().split())
+        incident_words = set(incident_text.lower().split())
+        
+        if not product_words or not incident_words:
+            return 0.0
+            
+        intersection = product_words.intersection(incident_words)
+        union = product_words.union(incident_words)
+        
+        return len(intersection) / len(union) if union else 0.0
+    except Exception as e:
+        logger.debug("Error in calculate_text_similarity: %s", e)
+        return 0.0
+
+def calculate_technology_overlap(product_tech: list, incident_tech: list) -> float:
+    """Calculate technology overlap score"""
+    try:
+        if not product_tech or not incident_tech:
+            return 0.0
+            
+        product_tech_set = set([tech.lower() for tech in product_tech])
+        incident_tech_set = set([tech.lower() for tech in incident_tech])
+        
+        intersection = product_tech_set.intersection(incident_tech_set)
+        union = product_tech_set.union(incident_tech_set)
+        
+        return len(intersection) / len(union) if union else 0.0
+    except Exception as e:
+        logger.debug("Error in calculate_technology_overlap: %s", e)
+        return 0.0
+
 async def find_similar_incidents(
     product: Product,
     db: Session,
@@ -104,69 +146,29 @@ async def find_similar_incidents(
     Find and rank similar incidents based on various criteria using REAL database incidents.
     """
     try:
-        print(f"DEBUG: Starting find_similar_incidents for product: {product.name}")
-        print(f"DEBUG: Product technology type: {type(product.technology)}, value: {product.technology}")
-        print(f"DEBUG: Product purpose type: {type(product.purpose)}, value: {product.purpose}")
-        
         # Get all incidents from database
-        all_incidents = incident_crud.get_incidents(db, limit=1000)  # Get a large batch
-        print(f"DEBUG: Found {len(all_incidents)} incidents in database")
+        all_incidents = incident_crud.get_incidents(db, limit=1000, domain=risk_domain)  # Get a large batch
+        logger.debug("find_similar_incidents: product %s, %d incidents in database", product.id, len(all_incidents))
         
         if not all_incidents:
-            print("DEBUG: No incidents found in database")
             return []
         
-        # Create a basic similarity scoring function
-        def calculate_text_similarity(product_text: str, incident_text: str) -> float:
-            """Simple text similarity using word overlap"""
-            try:
-                product_words = set(product_text.lower().split())
-                incident_words = set(incident_text.lower().split())
-                
-                if not product_words or not incident_words:
-                    return 0.0
-                    
-                intersection = product_words.intersection(incident_words)
-                union = product_words.union(incident_words)
-                
-                return len(intersection) / len(union) if union else 0.0
-            except Exception as e:
-                print(f"DEBUG: Error in calculate_text_similarity: {e}")
-                return 0.0
-        
-        def calculate_technology_overlap(product_tech: list, incident_tech: list) -> float:
-            """Calculate technology overlap score"""
-            try:
-                if not product_tech or not incident_tech:
-                    return 0.0
-                    
-                product_tech_set = set([tech.lower() for tech in product_tech])
-                incident_tech_set = set([tech.lower() for tech in incident_tech])
-                
-                intersection = product_tech_set.intersection(incident_tech_set)
-                union = product_tech_set.union(incident_tech_set)
-                
-                return len(intersection) / len(union) if union else 0.0
-            except Exception as e:
-                print(f"DEBUG: Error in calculate_technology_overlap: {e}")
-                return 0.0
-        
         # Calculate similarity scores for each incident
         scored_incidents = []
         product_text = f"{product.name} {product.description}"
         
         # Parse product technology and purpose fields (they might be JSON strings)
-        try:
-            product_technologies = json.loads(product.technology) if isinstance(product.technology, str) else product.technology
-        except:
-            product_technologies = product.technology if product.technology else []
-            
-        try:
-            product_purposes = json.loads(product.purpose) if isinstance(product.purpose, str) else product.purpose
-        except:
-            product_purposes = product.purpose if product.purpose else []
+        product_technologies = decode_list(product.technology)
+        product_purposes = decode_list(product.purpose)
+        # Technology overlap per incident, from the incident_technology index
+        tech_overlaps = incident_crud.technology_overlaps(db, product_technologies)
         
         for incident in all_incidents:
+            if deadline.expired():
+                # Rank what has been scored so far instead of overrunning the caller's budget
+                deadline.mark_partial()
+                logger.info("Deadline reached after scoring %d of %d incidents", len(scored_incidents), len(all_incidents))
+                break
             try:
                 incident_text = f"{incident.title} {incident.description}"
                 
@@ -178,7 +180,7 @@ async def find_similar_incidents(
                 
                 # Calculate different similarity metrics
                 text_similarity = calculate_text_similarity(product_text, incident_text)
-                tech_similarity = calculate_technology_overlap(product_technologies, incident_technologies)
+                tech_similarity = tech_overlaps.get(incident.id, 0.0)
                 
                 # Combined similarity score (weighted)
                 similarity_score = (text_similarity * 0.4) + (tech_similarity * 0.6)
@@ -223,11 +225,10 @@ async def find_similar_incidents(
                     ))
                     
             except Exception as e:
-                print(f"DEBUG: Error processing incident {incident.id}: {e}")
+                logger.debug("Error processing incident %s: %s", incident.id, e)
                 continue
         
-        print(f"DEBUG: Scored {len(scored_incidents)} incidents")
-        
+
         # Sort based on criteria
         if sort_by == "similarity":
             scored_incidents.sort(key=lambda x: x.similarity_score, reverse=True)
@@ -237,13 +238,11 @@ async def find_similar_incidents(
             scored_incidents.sort(key=lambda x: x.relevance_score, reverse=True)
         
         result = scored_incidents[:limit]
-        print(f"DEBUG: Returning top {len(result)} incidents")
+        logger.debug("find_similar_incidents: scored %d, returning top %d", len(scored_incidents), len(result))
         return result
 
     except Exception as e:
-        print(f"Error in find_similar_incidents: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in find_similar_incidents: %s", e)
         return []
 
 async def optimize_retrieval(
@@ -275,7 +274,8 @@ async def optimize_retrieval(
         Suggest improvements to the retrieval process.
         """
 
-        response = await openai.ChatCompletion.acreate(
+        await llm_gateway.acomplete(
+            agent="retrieval_feedback",
             model="gpt-4",
             messages=[
                 {
@@ -296,71 +296,79 @@ async def optimize_retrieval(
         return await find_similar_incidents(product, db, limit)
 
     except Exception as e:
-        print(f"Error in optimize_retrieval: {str(e)}")
+        logger.error("Error in optimize_retrieval: %s", e)
         return []
 
-async def generate_explanation(
-    product: Product,
-    incident: Incident,
-    mode: str = "generic"
-) -> str:
-    """
-    Generate explanation for why an incident is relevant to a product.
-    """
-    try:
-        if mode == "none":
-            return ""
+def _json_field(value, default):
+    """Decode a JSON text column (lists/objects are stored as TEXT)"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return default
+    return value if value is not None else default
+
+def explanation_request(product: Product, incident: Incident, mode: str) -> Dict:
+    """Chat completion arguments for an explanation (shared by the async and background paths)"""
+    prism_scores = _json_field(incident.prism_scores, {})
+    prism_lines = "\n".join(
+        f"        - {dimension.replace('_', ' ').title()}: {score}"
+        for dimension, score in prism_scores.items()
+    ) if isinstance(prism_scores, dict) else ""
 
-        prompt = f"""Explain why this incident is relevant to this AI product:
+    prompt = f"""Explain why this incident is relevant to this AI product:
 
         Product:
         Name: {product.name}
         Description: {product.description}
-        Technologies: {', '.join(product.technology)}
-        Purposes: {', '.join(product.purpose)}
-        Ethical Issues: {', '.join(product.ethical_issues)}
+        Technologies: {', '.join(_json_field(product.technology, []))}
+        Purposes: {', '.join(_json_field(product.purpose, []))}
 
         Incident:
         Title: {incident.title}
         Description: {incident.description}
-        Domain: {incident.domain}
-        Impact: {incident.impact}
-        Technologies: {', '.join(incident.technologies)}
-        Purposes: {', '.join(incident.purposes)}
-        Ethical Issues: {', '.join(incident.ethical_issues)}
+        Technologies: {', '.join(_json_field(incident.technologies, []))}
         PRISM Scores:
-        - Logical Coherence: {incident.logical_coherence}
-        - Factual Accuracy: {incident.factual_accuracy}
-        - Practical Implementability: {incident.practical_implementability}
-        - Contextual Relevance: {incident.contextual_relevance}
-        - uniqueness: {incident.uniqueness}
-        - Impact Scale: {incident.impact_scale}
+{prism_lines}
+        Impact Scale: {incident.impact_scale}
         Risk Level: {incident.risk_level}
         Risk Domain: {incident.risk_domain}
 
         {'Provide a detailed explanation using the PRISM framework.' if mode == 'full_prism' else 'Provide a brief explanation of the key similarities.'}
         """
 
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert at explaining AI incident transferability.
-                    For a given product and incident, explain why the incident is relevant
-                    and what lessons can be learned."""
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=500
-        )
+    return {
+        'model': EXPLANATION_MODEL,
+        'messages': [
+            {
+                "role": "system",
+                "content": """You are an expert at explaining AI incident transferability.
+                For a given product and incident, explain why the incident is relevant
+                and what lessons can be learned."""
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        'temperature': 0.3,
+        'max_tokens': 500
+    }
+
+async def generate_explanation(
+    product: Product,
+    incident: Incident,
+    mode: str = "generic"
+) -> str:
+    """
+    Generate explanation for why an incident is relevant to a product.
+    """
+    try:
+        if mode == "none":
+            return ""
 
-        return response.choices[0].message.content
+        return await llm_gateway.acomplete(agent="explanation", **explanation_request(product, incident, mode))
 
     except Exception as e:
-        print(f"Error in generate_explanation: {str(e)}")
-        return "Error generating explanation" 
\ No newline at end of file
+        logger.error("Error in generate_explanation: %s", e)
+        return EXPLANATION_ERROR
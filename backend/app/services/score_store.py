@@ -0,0 +1,283 @@
+"""
+Pair Score Store
+Keeps the latest PRISM and generic scores of every scored product-incident
+pair in `pair_scores`. Overall scores are served under the active weight
+profile, computed from the stored dimensions when read. The PRISM dimensions
+are mirrored in memory as a compact float32 matrix so all pairs can be ranked
+under any weight profile with a single matrix-vector product, without LLM calls.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.models.score import PairScore
+from app.services.circuit_breaker import llm_circuit_breaker
+from app.services import weight_profiles
+from app.services.weight_profiles import DIMENSIONS, weights_vector
+
+logger = get_logger(__name__)
+
+# Reasons the bulk scorers give for placeholder scores; these are never stored
+FALLBACK_REASONS = {
+    'Calculation error',
+    'Parsing error',
+    'Default score - insufficient LLM response',
+}
+
+def is_placeholder(score: Dict[str, Any]) -> bool:
+    """Similarity estimate or placeholder score rather than a real LLM score"""
+    return bool(score.get('degraded')) or score.get('reasoning') in FALLBACK_REASONS
+
+def apply_active_profile(db: Session, scores: List[Dict[str, Any]]) -> str:
+    """Set the overall score of real PRISM results to the active profile's; returns its name"""
+    profile_name, weights = weight_profiles.get_active_profile(db)
+    for score in scores:
+        if not is_placeholder(score) and all(score.get(d) is not None for d in DIMENSIONS):
+            score['overall_score'] = weight_profiles.overall_score(score, weights)
+    return profile_name
+
+def upsert_pair_scores(
+    db: Session,
+    product_id: int,
+    scores: List[Dict[str, Any]],
+    source: str
+) -> int:
+    """
+    Insert or refresh stored pairs from 1-100 scale bulk results (caller commits).
+    PRISM entries update the dimensions, generic entries the confidence score and
+    dual entries both; the other mode's columns of an existing pair are left untouched.
+    Overall scores are stored under the active profile. Degraded and placeholder
+    scores are skipped.
+    """
+    now = datetime.utcnow()
+    profile_name, weights = weight_profiles.get_active_profile(db)
+    # Rows grouped by their column set, since one upsert statement needs uniform rows
+    grouped: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for score in scores:
+        if is_placeholder(score):
+            continue  # Local estimates and error placeholders are never stored as scores
+        row = {'product_id': product_id, 'incident_id': score['incident_id'], 'source': source, 'updated_at': now}
+        if all(score.get(d) is not None for d in DIMENSIONS):
+            row.update({
+                'overall_score': weight_profiles.overall_score(score, weights),
+                'weight_profile': profile_name,
+                'reasoning': score.get('reasoning', ''),
+                'prism_scored_at': now
+            })
+            row.update({d: float(score[d]) for d in DIMENSIONS})
+        if score.get('confidence_score') is not None:
+            row.update({
+                'confidence_score': float(score['confidence_score']),
+                'generic_reasoning': score.get('reasoning', ''),
+                'generic_scored_at': now
+            })
+        if 'prism_scored_at' in row or 'generic_scored_at' in row:
+            grouped.setdefault(tuple(row), []).append(row)
+
+    for columns, rows in grouped.items():
+        statement = insert(PairScore).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=['product_id', 'incident_id'],
+            set_={column: statement.excluded[column] for column in columns if column not in ('product_id', 'incident_id')}
+        )
+        db.execute(statement)
+    return sum(len(rows) for rows in grouped.values())
+
+def get_cached_scores(
+    db: Session,
+    product_id: int,
+    incident_ids: List[int],
+    mode: str,
+    max_age_hours: Optional[float] = None,
+    include_stale: bool = False
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Stored scores still fresh (or of any age with `include_stale`) for the given
+    mode, in the bulk endpoint's result shape. Dual mode needs both score sets.
+    Overall scores are recomputed under the active profile, which may have
+    changed since a pair was stored.
+    """
+    max_age_hours = settings.PAIR_SCORE_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    query = db.query(PairScore).filter(
+        PairScore.product_id == product_id,
+        PairScore.incident_id.in_(incident_ids)
+    )
+    for scored_at in _scored_at_columns(mode):
+        if include_stale:
+            query = query.filter(scored_at.isnot(None))
+        else:
+            query = query.filter(scored_at >= datetime.utcnow() - timedelta(hours=max_age_hours))
+    rows = query.all()
+    weights = weight_profiles.get_active_profile(db)[1] if mode != "generic" else None
+
+    cached = {}
+    for row in rows:
+        entry = {'incident_id': row.incident_id}
+        if mode != "generic":
+            entry.update({d: getattr(row, d) for d in DIMENSIONS})
+            entry.update({'overall_score': weight_profiles.overall_score(entry, weights), 'reasoning': row.reasoning or 'PRISM analysis'})
+        if mode in ("generic", "dual"):
+            entry['confidence_score'] = row.confidence_score
+            entry.setdefault('reasoning', row.generic_reasoning or 'Generic analysis')
+        cached[row.incident_id] = entry
+    return cached
+
+def fresh_pair_counts(db: Session, mode: str, max_age_hours: Optional[float] = None) -> Dict[int, int]:
+    """Number of fresh stored pairs per product for a mode"""
+    max_age_hours = settings.PAIR_SCORE_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    query = db.query(PairScore.product_id, func.count(PairScore.id))
+    for scored_at in _scored_at_columns(mode):
+        query = query.filter(scored_at >= cutoff)
+    rows = query.group_by(PairScore.product_id).all()
+    return {product_id: count for product_id, count in rows}
+
+def _scored_at_columns(mode: str) -> list:
+    """Timestamps that must be set (and fresh) for a pair to serve `mode`"""
+    if mode == "generic":
+        return [PairScore.generic_scored_at]
+    if mode == "dual":
+        return [PairScore.prism_scored_at, PairScore.generic_scored_at]
+    return [PairScore.prism_scored_at]
+
+def score_through_store(
+    db: Session,
+    product_id: int,
+    incidents: List[Dict[str, Any]],
+    mode: str,
+    score_fn: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Serve fresh stored scores and call `score_fn` only for the remaining
+    incidents; new real scores are stored for the next request.
+    """
+    cached = get_cached_scores(db, product_id, [incident['id'] for incident in incidents], mode)
+    misses = [incident for incident in incidents if incident['id'] not in cached]
+    logger.debug("Pair score store: %d cached, %d to score", len(cached), len(misses))
+
+    stale = {}
+    if misses and llm_circuit_breaker.is_open:
+        # Gateway down: an outdated stored score beats a similarity estimate
+        stale = get_cached_scores(db, product_id, [incident['id'] for incident in misses], mode, include_stale=True)
+        misses = [incident for incident in misses if incident['id'] not in stale]
+        logger.info("Pair score store: LLM circuit open, serving %d stale stored scores", len(stale))
+
+    fresh = {}
+    if misses:
+        scored = score_fn(misses)
+        apply_active_profile(db, scored)
+        fresh = {score['incident_id']: score for score in scored}
+        if upsert_pair_scores(db, product_id, scored, source="bulk"):
+            db.commit()
+
+    results = []
+    for incident in incidents:
+        if incident['id'] in cached:
+            results.append({**cached[incident['id']], 'status': "cached"})
+        elif incident['id'] in stale:
+            results.append({**stale[incident['id']], 'degraded': True})
+        else:
+            results.append(fresh[incident['id']])
+    return results
+
+class ScoreMatrix:
+    """
+    In-memory (pairs x 6) float32 view of the PRISM-scored pair_scores rows.
+    Reloaded only when the table's row count or latest update changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple[int, Any]] = None
+        self.row_ids = np.empty(0, dtype=np.int64)
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.incident_ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, len(DIMENSIONS)), dtype=np.float32)
+
+    @staticmethod
+    def _table_version(db: Session) -> Tuple[int, Any]:
+        count, latest = db.query(func.count(PairScore.id), func.max(PairScore.updated_at)).one()
+        return count, latest
+
+    def load(self, db: Session) -> None:
+        with self._lock:
+            version = self._table_version(db)
+            if version == self._version:
+                return
+            columns = [PairScore.id, PairScore.product_id, PairScore.incident_id] + [getattr(PairScore, d) for d in DIMENSIONS]
+            rows = db.query(*columns).filter(
+                PairScore.prism_scored_at.isnot(None)
+            ).order_by(PairScore.id).all()
+            data = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+            self.row_ids = data[:, 0].astype(np.int64)
+            self.product_ids = data[:, 1].astype(np.int64)
+            self.incident_ids = data[:, 2].astype(np.int64)
+            self.matrix = np.ascontiguousarray(data[:, 3:], dtype=np.float32)
+            self._version = version
+
+    def snapshot(self, db: Session) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Optional[Tuple[int, Any]]]:
+        """Current (row_ids, product_ids, incident_ids, matrix, version), taken together under the lock"""
+        self.load(db)
+        with self._lock:
+            return self.row_ids, self.product_ids, self.incident_ids, self.matrix, self._version
+
+    def recompute(self, db: Session, weights: Dict[str, float]) -> np.ndarray:
+        """Overall score of every stored pair under `weights`"""
+        matrix = self.snapshot(db)[3]
+        return matrix @ weights_vector(weights)
+
+    def apply_profile(
+        self,
+        db: Session,
+        profile_name: str,
+        weights: Dict[str, float],
+        activate: bool = False,
+        product_id: Optional[int] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Recompute all pairs and return the re-ranked top pairs; only a preview
+        unless `activate`, which makes the profile the active one, so stored and
+        newly scored pairs are all served under it. Stored rows are not rewritten.
+        """
+        started = time.perf_counter()
+        # A concurrent load may swap the arrays; work on one consistent set
+        _, product_ids, incident_ids, matrix, _ = self.snapshot(db)
+        overall = matrix @ weights_vector(weights)
+        compute_ms = (time.perf_counter() - started) * 1000
+
+        if activate:
+            weight_profiles.set_active_profile(db, profile_name)
+
+        indices = np.arange(len(overall))
+        if product_id is not None:
+            indices = indices[product_ids == product_id]
+        top = indices[np.argsort(-overall[indices], kind="stable")[:limit]]
+
+        return {
+            'profile': profile_name,
+            'active': weight_profiles.get_active_profile(db)[0] == profile_name,
+            'pairs': int(len(overall)),
+            'compute_ms': round(compute_ms, 3),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+            'results': [
+                {
+                    'product_id': int(product_ids[i]),
+                    'incident_id': int(incident_ids[i]),
+                    'overall_score': round(float(overall[i]), 2)
+                }
+                for i in top
+            ]
+        }
+
+# Process-wide matrix shared by the API
+score_matrix = ScoreMatrix()
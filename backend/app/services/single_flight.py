@@ -0,0 +1,116 @@
+"""
+Single-flight request coalescing
+Concurrent callers with the same canonical request key share one in-flight
+call instead of each issuing their own LLM request. The request deadline is
+not part of the key: a caller only joins a leader whose deadline will not cut
+the call shorter than its own would.
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.services import deadline
+
+def request_key(name: str, *parts: Any) -> str:
+    """Canonical key for a request: stable across dict key ordering (strings are compared exactly)"""
+    payload = json.dumps([name, parts], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class _InFlightCall:
+    def __init__(self, budget: Optional[deadline.Deadline]):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.budget = budget  # The leader's deadline
+
+    def can_join(self, budget: Optional[deadline.Deadline]) -> bool:
+        """A leader without a deadline, or with one no earlier than the caller's, serves the caller"""
+        if self.budget is None:
+            return True
+        return budget is not None and self.budget.expires_at >= budget.expires_at
+
+class SingleFlight:
+    """
+    Thread-safe call coalescer.
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it is running wait for the leader and receive a copy of its result.
+    A caller whose deadline is later than the leader's (or who has none) runs
+    its own call instead, so it never gets results cut short by another
+    request's deadline. The copy is taken before the leader returns, so nothing the leader's caller
+    does to its result reaches the followers. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        budget = deadline.current()
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall(budget)
+                self._calls[key] = call
+            elif call.can_join(budget):
+                call.followers += 1
+            else:
+                call = None
+
+        if call is None:
+            # The in-flight call may stop at an earlier deadline: not coalesced
+            return fn(*args, **kwargs)
+
+        if not is_leader:
+            # The caller's own deadline bounds the wait, even on a longer-lived leader
+            if not call.done.wait(timeout=deadline.remaining()):
+                deadline.mark_partial()
+                raise deadline.DeadlineExceeded(
+                    f"Deadline of {deadline.current().timeout_ms:.0f}ms exceeded waiting for an in-flight call"
+                )
+            if call.error is not None:
+                raise call.error
+            if call.budget is not None and call.budget.partial:
+                # Cut short by a deadline no later than this caller's own
+                deadline.mark_partial()
+            # Followers get their own copy so callers can't mutate each other's results
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # No new followers can join once the key is gone
+            with self._lock:
+                self._calls.pop(key, None)
+                followers = call.followers
+            if followers and call.error is None:
+                # Snapshot for the followers, taken before the leader's caller sees the result
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+def coalesce(name: str) -> Callable:
+    """
+    Decorator for scorer methods: identical concurrent calls on the same
+    instance are coalesced through the instance's `_single_flight`.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = request_key(name, args, kwargs)
+            return self._single_flight.do(key, method, self, *args, **kwargs)
+        return wrapper
+    return decorator
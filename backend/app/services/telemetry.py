@@ -0,0 +1,296 @@
+"""
+LLM Call Telemetry
+Records every LLM call (endpoint, agent, model, tokens, latency, retries,
+parse success and cost) into in-process Prometheus metrics and the local
+`llm_calls` table. Rows are queued and batch-inserted by a background writer
+thread, so an LLM call never waits on a database commit.
+"""
+
+import atexit
+import contextvars
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.session import SessionLocal
+from app.models.llm_call import LLMCall
+
+# Route (or job) on whose behalf the current LLM calls are made.
+# Set per request by deps.tag_llm_endpoint and inherited by threadpool calls.
+current_endpoint: contextvars.ContextVar[str] = contextvars.ContextVar("llm_endpoint", default="unknown")
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[str, str, str]  # (endpoint, agent, model)
+
+WRITE_BATCH_SIZE = 200  # Most llm_calls rows inserted per transaction
+
+logger = get_logger(__name__)
+
+def set_endpoint(endpoint: str) -> contextvars.Token:
+    return current_endpoint.set(endpoint)
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost from the configured per-1K-token prices"""
+    return (
+        (prompt_tokens or 0) / 1000 * settings.LLM_PROMPT_PRICE_PER_1K
+        + (completion_tokens or 0) / 1000 * settings.LLM_COMPLETION_PRICE_PER_1K
+    )
+
+class LLMTelemetry:
+    """Thread-safe in-memory aggregates for the /metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, str, str, str], int] = defaultdict(int)
+        self._tokens: Dict[Tuple[str, str, str, str], int] = defaultdict(int)
+        self._retries: Dict[LabelKey, int] = defaultdict(int)
+        self._parse_failures: Dict[LabelKey, int] = defaultdict(int)
+        self._cost: Dict[LabelKey, float] = defaultdict(float)
+        self._latency_buckets: Dict[LabelKey, List[int]] = {}
+        self._latency_sum: Dict[LabelKey, float] = defaultdict(float)
+        self._latency_count: Dict[LabelKey, int] = defaultdict(int)
+
+    def record(
+        self,
+        agent: str,
+        model: str,
+        latency_s: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        retries: int = 0,
+        success: bool = True,
+        parse_ok: Optional[bool] = None,
+        error: Optional[str] = None,
+        endpoint: Optional[str] = None
+    ) -> None:
+        endpoint = endpoint or current_endpoint.get()
+        cost = estimate_cost(prompt_tokens, completion_tokens)
+        key = (endpoint, agent, model)
+
+        with self._lock:
+            self._calls[key + ("ok" if success else "error",)] += 1
+            self._tokens[key + ("prompt",)] += prompt_tokens or 0
+            self._tokens[key + ("completion",)] += completion_tokens or 0
+            self._retries[key] += retries
+            if parse_ok is False:
+                self._parse_failures[key] += 1
+            self._cost[key] += cost
+
+            buckets = self._latency_buckets.setdefault(key, [0] * len(LATENCY_BUCKETS))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency_s <= bound:
+                    buckets[i] += 1
+            self._latency_sum[key] += latency_s
+            self._latency_count[key] += 1
+
+        call_writer.put(dict(
+            endpoint=endpoint,
+            agent=agent,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=latency_s * 1000,
+            retries=retries,
+            success=success,
+            parse_ok=parse_ok,
+            cost_usd=cost,
+            error=error,
+            created_at=datetime.utcnow()
+        ))
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            lines += [
+                "# HELP prism_llm_calls_total LLM calls by endpoint, agent, model and outcome.",
+                "# TYPE prism_llm_calls_total counter",
+            ]
+            for (endpoint, agent, model, status), value in sorted(self._calls.items()):
+                lines.append(f"prism_llm_calls_total{_labels(endpoint, agent, model, status=status)} {value}")
+
+            lines += [
+                "# HELP prism_llm_tokens_total Prompt and completion tokens.",
+                "# TYPE prism_llm_tokens_total counter",
+            ]
+            for (endpoint, agent, model, kind), value in sorted(self._tokens.items()):
+                lines.append(f"prism_llm_tokens_total{_labels(endpoint, agent, model, type=kind)} {value}")
+
+            lines += [
+                "# HELP prism_llm_cost_usd_total Estimated LLM spend in USD.",
+                "# TYPE prism_llm_cost_usd_total counter",
+            ]
+            for (endpoint, agent, model), value in sorted(self._cost.items()):
+                lines.append(f"prism_llm_cost_usd_total{_labels(endpoint, agent, model)} {value:.6f}")
+
+            lines += [
+                "# HELP prism_llm_retries_total Retried LLM attempts.",
+                "# TYPE prism_llm_retries_total counter",
+            ]
+            for (endpoint, agent, model), value in sorted(self._retries.items()):
+                lines.append(f"prism_llm_retries_total{_labels(endpoint, agent, model)} {value}")
+
+            lines += [
+                "# HELP prism_llm_parse_failures_total LLM responses that were not valid JSON objects.",
+                "# TYPE prism_llm_parse_failures_total counter",
+            ]
+            for (endpoint, agent, model), value in sorted(self._parse_failures.items()):
+                lines.append(f"prism_llm_parse_failures_total{_labels(endpoint, agent, model)} {value}")
+
+            lines += [
+                "# HELP prism_llm_latency_seconds LLM call latency including retries.",
+                "# TYPE prism_llm_latency_seconds histogram",
+            ]
+            for key in sorted(self._latency_buckets):
+                endpoint, agent, model = key
+                for bound, count in zip(LATENCY_BUCKETS, self._latency_buckets[key]):
+                    lines.append(f"prism_llm_latency_seconds_bucket{_labels(endpoint, agent, model, le=str(bound))} {count}")
+                lines.append(f"prism_llm_latency_seconds_bucket{_labels(endpoint, agent, model, le='+Inf')} {self._latency_count[key]}")
+                lines.append(f"prism_llm_latency_seconds_sum{_labels(endpoint, agent, model)} {self._latency_sum[key]:.6f}")
+                lines.append(f"prism_llm_latency_seconds_count{_labels(endpoint, agent, model)} {self._latency_count[key]}")
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(endpoint: str, agent: str, model: str, **extra: str) -> str:
+    labels = {"endpoint": endpoint, "agent": agent, "model": model, **extra}
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+class LLMCallWriter:
+    """
+    Background writer for `llm_calls` rows. Callers only enqueue; one daemon
+    thread drains the queue and inserts whatever has accumulated in a single
+    transaction, up to WRITE_BATCH_SIZE rows at a time.
+    """
+
+    _STOP = object()
+
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.stop)  # Write what is still queued on exit
+
+    def put(self, row: Dict[str, Any]) -> None:
+        self._ensure_started()
+        self._queue.put(row)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-call-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write the queued rows and stop the thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(self._STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    @staticmethod
+    def _write(batch: List[Dict[str, Any]]) -> None:
+        # Telemetry must never break a scoring call, nor stop the writer
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(LLMCall, batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Error recording %d LLM call telemetry rows: %s", len(batch), e)
+        finally:
+            db.close()
+
+# Process-wide telemetry sink and its database writer
+call_writer = LLMCallWriter()
+llm_telemetry = LLMTelemetry()
+
+def query_llm_calls(
+    db: Session,
+    endpoint: Optional[str] = None,
+    agent: Optional[str] = None,
+    since_hours: Optional[float] = None,
+    limit: int = 100
+) -> List[LLMCall]:
+    """Most recent recorded LLM calls, optionally filtered"""
+    query = db.query(LLMCall)
+    if endpoint:
+        query = query.filter(LLMCall.endpoint == endpoint)
+    if agent:
+        query = query.filter(LLMCall.agent == agent)
+    if since_hours:
+        query = query.filter(LLMCall.created_at >= datetime.utcnow() - timedelta(hours=since_hours))
+    return query.order_by(LLMCall.id.desc()).limit(limit).all()
+
+def summarize_llm_calls(db: Session, since_hours: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Per endpoint/agent/model aggregates of the recorded calls"""
+    query = db.query(
+        LLMCall.endpoint,
+        LLMCall.agent,
+        LLMCall.model,
+        func.count(LLMCall.id),
+        func.sum(case((LLMCall.success == False, 1), else_=0)),
+        func.sum(case((LLMCall.parse_ok == False, 1), else_=0)),
+        func.avg(LLMCall.latency_ms),
+        func.max(LLMCall.latency_ms),
+        func.sum(LLMCall.prompt_tokens),
+        func.sum(LLMCall.completion_tokens),
+        func.sum(LLMCall.retries),
+        func.sum(LLMCall.cost_usd)
+    )
+    if since_hours:
+        query = query.filter(LLMCall.created_at >= datetime.utcnow() - timedelta(hours=since_hours))
+
+    rows = query.group_by(LLMCall.endpoint, LLMCall.agent, LLMCall.model).all()
+    return [
+        {
+            "endpoint": endpoint,
+            "agent": agent,
+            "model": model,
+            "calls": calls,
+            "errors": errors or 0,
+            "parse_failures": parse_failures or 0,
+            "avg_latency_ms": round(avg_latency or 0.0, 1),
+            "max_latency_ms": round(max_latency or 0.0, 1),
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "retries": retries or 0,
+            "cost_usd": round(cost or 0.0, 6)
+        }
+        for (endpoint, agent, model, calls, errors, parse_failures, avg_latency,
+             max_latency, prompt_tokens, completion_tokens, retries, cost) in rows
+    ]
@@ -0,0 +1,124 @@
+"""
+Transferability Weight Profiles
+Named weightings of the six PRISM dimensions. The two built-in profiles are
+the weights the scorer has always used; analysts can store their own. One
+profile is active: stored and served overall scores are computed with it.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.score import ActiveWeightProfile, WeightProfile
+
+DIMENSIONS = [
+    'logical_coherence',
+    'factual_accuracy',
+    'practical_implementability',
+    'contextual_relevance',
+    'impact',
+    'exploitability',
+]
+
+BUILTIN_PROFILES: Dict[str, Dict[str, float]] = {
+    # Single-pair authentic PRISM scoring
+    "authentic": {
+        'logical_coherence': 0.25,
+        'factual_accuracy': 0.25,
+        'practical_implementability': 0.20,
+        'contextual_relevance': 0.15,
+        'impact': 0.10,
+        'exploitability': 0.05
+    },
+    # Bulk scoring (1-100 scale)
+    "bulk": {
+        'logical_coherence': 0.2,
+        'factual_accuracy': 0.2,
+        'practical_implementability': 0.2,
+        'contextual_relevance': 0.2,
+        'impact': 0.1,
+        'exploitability': 0.1
+    },
+}
+
+# Active until another profile is applied
+DEFAULT_PROFILE = "bulk"
+
+def validate_weights(weights: Dict[str, float]) -> Dict[str, float]:
+    """Every dimension present, non-negative, and not all zero"""
+    missing = [d for d in DIMENSIONS if d not in weights]
+    unknown = [d for d in weights if d not in DIMENSIONS]
+    if missing or unknown:
+        raise ValueError(f"Weights must cover exactly {', '.join(DIMENSIONS)}")
+    if any(float(weights[d]) < 0 for d in DIMENSIONS):
+        raise ValueError("Weights must be non-negative")
+    if sum(float(weights[d]) for d in DIMENSIONS) <= 0:
+        raise ValueError("At least one weight must be positive")
+    return {d: float(weights[d]) for d in DIMENSIONS}
+
+def weights_vector(weights: Dict[str, float]) -> np.ndarray:
+    """Weights in DIMENSIONS order, normalized to sum to 1"""
+    vector = np.array([weights[d] for d in DIMENSIONS], dtype=np.float32)
+    return vector / vector.sum()
+
+def overall_score(scores: Dict[str, Any], weights: Dict[str, float]) -> float:
+    """Overall score of one pair's dimension scores under `weights` (normalized like `weights_vector`)"""
+    return sum(float(scores[d]) * weights[d] for d in DIMENSIONS) / sum(weights[d] for d in DIMENSIONS)
+
+def overall_expression(columns: Any, weights: Dict[str, float]) -> Any:
+    """SQL expression for the overall score of `columns` (a model with the dimension columns) under `weights`"""
+    total = sum(weights[d] for d in DIMENSIONS)
+    return sum(getattr(columns, d) * (weights[d] / total) for d in DIMENSIONS)
+
+def get_profile(db: Session, name: str) -> Optional[Dict[str, float]]:
+    if name in BUILTIN_PROFILES:
+        return BUILTIN_PROFILES[name]
+    profile = db.query(WeightProfile).filter(WeightProfile.name == name).first()
+    return json.loads(profile.weights) if profile else None
+
+def get_active_profile(db: Session) -> Tuple[str, Dict[str, float]]:
+    """Name and weights of the active profile"""
+    active = db.query(ActiveWeightProfile).first()
+    weights = get_profile(db, active.name) if active else None
+    if weights is None:
+        return DEFAULT_PROFILE, BUILTIN_PROFILES[DEFAULT_PROFILE]
+    return active.name, weights
+
+def set_active_profile(db: Session, name: str) -> None:
+    """Make an existing profile the active one"""
+    active = db.query(ActiveWeightProfile).first()
+    if active is None:
+        active = ActiveWeightProfile(name=name)
+        db.add(active)
+    active.name = name
+    db.commit()
+
+def list_profiles(db: Session) -> List[Dict[str, Any]]:
+    active_name = get_active_profile(db)[0]
+    profiles = [
+        {"name": name, "weights": weights, "builtin": True, "active": name == active_name}
+        for name, weights in BUILTIN_PROFILES.items()
+    ]
+    for profile in db.query(WeightProfile).order_by(WeightProfile.name).all():
+        profiles.append({
+            "name": profile.name,
+            "weights": json.loads(profile.weights),
+            "builtin": False,
+            "active": profile.name == active_name
+        })
+    return profiles
+
+def save_profile(db: Session, name: str, weights: Dict[str, float]) -> Dict[str, float]:
+    """Create or replace a custom profile; built-in profiles are read-only"""
+    if name in BUILTIN_PROFILES:
+        raise ValueError(f"Built-in profile '{name}' cannot be changed")
+    weights = validate_weights(weights)
+    profile = db.query(WeightProfile).filter(WeightProfile.name == name).first()
+    if profile is None:
+        profile = WeightProfile(name=name)
+        db.add(profile)
+    profile.weights = json.dumps(weights)
+    db.commit()
+    return weights
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible LLM stub for load testing the scoring pipeline.
+
+Speaks POST /v1/chat/completions and returns deterministic, schema-valid JSON
+for the router, scorer, generic and bulk PRISM prompts, with configurable
+latency and error rates. No tokens are spent.
+
+Run the stub, then point the backend at it:
+    python llm_stub_server.py --port 9100 --latency-ms 800 --error-rate 0.02
+    OPENAI_BASE_URL=http://localhost:9100/v1 OPENAI_API_KEY=stub uvicorn app.main:app
+
+Every option can also be set through the STUB_* environment variables.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+RISK_TYPES = [
+    "Bias, Discrimination & Fairness",
+    "Accuracy, Reliability & Robustness",
+    "Privacy, Confidentiality & Surveillance",
+    "Safety & Security",
+    "Transparency, Explainability & Oversight",
+    "Misinformation & Information Integrity",
+    "Copyright, IP & Originality",
+    "Ethics, Values & Appropriateness",
+    "Freedom of Expression & Human Rights",
+    "Governance, Compliance & Legal",
+]
+
+SCORER_DIMENSIONS = [
+    "Logical Coherence",
+    "Factual Accuracy",
+    "Practical Implementability",
+    "Contextual Relevance",
+    "Impact",
+    "Exploitability",
+]
+
+BULK_DIMENSIONS = [
+    "logical_coherence",
+    "factual_accuracy",
+    "practical_implementability",
+    "contextual_relevance",
+    "impact",
+    "exploitability",
+]
+
+class StubConfig:
+    def __init__(self):
+        self.latency_dist = os.getenv("STUB_LATENCY_DIST", "lognormal")  # fixed/uniform/normal/lognormal
+        self.latency_ms = float(os.getenv("STUB_LATENCY_MS", "500"))     # Mean (median for lognormal)
+        self.latency_jitter_ms = float(os.getenv("STUB_LATENCY_JITTER_MS", "200"))
+        self.error_rate = float(os.getenv("STUB_ERROR_RATE", "0"))       # Fraction answered with HTTP 500
+        self.rate_limit_rate = float(os.getenv("STUB_RATE_LIMIT_RATE", "0"))  # Fraction answered with HTTP 429
+        self.retry_after_s = float(os.getenv("STUB_RETRY_AFTER_S", "1"))
+        self.seed = int(os.getenv("STUB_SEED", "0"))
+
+config = StubConfig()
+rng = random.Random(config.seed)
+app = FastAPI(title="PRISM LLM Stub")
+
+def sample_latency_s() -> float:
+    mean = config.latency_ms
+    jitter = config.latency_jitter_ms
+    if config.latency_dist == "fixed":
+        latency = mean
+    elif config.latency_dist == "uniform":
+        latency = rng.uniform(mean - jitter, mean + jitter)
+    elif config.latency_dist == "normal":
+        latency = rng.gauss(mean, jitter)
+    else:
+        # Long right tail like real LLM latency; jitter controls the spread
+        sigma = jitter / mean if mean > 0 else 0
+        latency = rng.lognormvariate(0, sigma) * mean
+    return max(latency, 0) / 1000
+
+def stable_int(seed: str, low: int, high: int) -> int:
+    """Deterministic integer in [low, high] for the given text"""
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    return low + int.from_bytes(digest[:8], "big") % (high - low + 1)
+
+def incident_ids(prompt: str) -> List[int]:
+    return [int(match) for match in re.findall(r"^ID: (\d+)", prompt, flags=re.MULTILINE)]
+
+def build_content(system: str, prompt: str) -> str:
+    """Pick the response schema from the prompt the scorer sent"""
+    key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    if "Router Agent" in system:
+        return json.dumps({
+            "risk_type": RISK_TYPES[stable_int(key, 0, len(RISK_TYPES) - 1)],
+            "justification": "Stub router classification."
+        })
+
+    if "Scorer Agent" in system:
+        # Reviewer personas share the scorer system message; each one's persona is in the prompt
+        key = hashlib.sha256((system + prompt).encode("utf-8")).hexdigest()
+        output: Dict[str, Any] = {
+            dimension: [stable_int(key + dimension, 1, 5), f"Stub rationale for {dimension.lower()}."]
+            for dimension in SCORER_DIMENSIONS
+        }
+        output["Application Domain"] = "General AI"
+        return json.dumps(output)
+
+    if '"ethical_issues"' in system:
+        return json.dumps({
+            "technology": ["LLM"],
+            "purpose": ["General AI"],
+            "ethical_issues": ["Privacy", "Transparency"]
+        })
+
+    if '"incident_scores"' in prompt:
+        scores = []
+        for incident_id in incident_ids(prompt):
+            item_key = f"{key}:{incident_id}"
+            score: Dict[str, Any] = {"incident_id": incident_id}
+            if '"confidence_score"' in prompt:
+                score["confidence_score"] = stable_int(item_key + "confidence", 1, 100)
+            if '"logical_coherence"' in prompt:
+                for dimension in BULK_DIMENSIONS:
+                    score[dimension] = stable_int(item_key + dimension, 1, 100)
+            score["reasoning"] = f"Stub analysis for incident {incident_id}."
+            scores.append(score)
+        return json.dumps({"incident_scores": scores})
+
+    if '"confidence_score"' in prompt:
+        return json.dumps({
+            "confidence_score": stable_int(key, 1, 5),
+            "reasoning": "Stub generic assessment."
+        })
+
+    return "OK" if len(prompt) < 100 else f"Stub explanation ({key[:8]}): this incident shares technology and context with the product."
+
+def usage_for(messages: List[Dict[str, Any]], content: str) -> Dict[str, int]:
+    # Rough 4-characters-per-token estimate keeps cost telemetry meaningful
+    prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages) // 4
+    completion_tokens = max(len(content) // 4, 1)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+def stream_chunks(completion_id: str, model: str, content: str):
+    created = int(time.time())
+    for start in range(0, len(content), 16):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[start:start + 16]}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    final = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    model = body.get("model", "stub-model")
+
+    await asyncio.sleep(sample_latency_s())
+
+    roll = rng.random()
+    if roll < config.rate_limit_rate:
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(config.retry_after_s)},
+            content={"error": {"message": "Stub rate limit", "type": "rate_limit_exceeded"}}
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"message": "Stub server error", "type": "server_error"}}
+        )
+
+    system = " ".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    prompt = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") != "system")
+    content = build_content(system, prompt)
+    completion_id = "chatcmpl-stub-" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(completion_id, model, content), media_type="text/event-stream")
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": usage_for(messages, content),
+    }
+
+@app.get("/v1/models")
+def list_models():
+    return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "stub"}]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal"], default=config.latency_dist)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--latency-jitter-ms", type=float, default=config.latency_jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=config.rate_limit_rate)
+    parser.add_argument("--retry-after-s", type=float, default=config.retry_after_s)
+    parser.add_argument("--seed", type=int, default=config.seed)
+    args = parser.parse_args()
+
+    config.latency_dist = args.latency_dist
+    config.latency_ms = args.latency_ms
+    config.latency_jitter_ms = args.latency_jitter_ms
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+    config.retry_after_s = args.retry_after_s
+    config.seed = args.seed
+    rng.seed(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Nightly pre-scoring warmup.
+
+Walks all products and scores each product's top-K retrieved incidents with
+the bulk PRISM and generic paths, storing the results in `pair_scores` so
+`/api/prism/score/bulk` (with `product_id`) answers from the store instead of
+the LLM. Runs as background scoring jobs: every product is checkpointed, and
+re-running the command resumes an interrupted warmup where it stopped.
+
+    python prescore.py --dry-run                 # Cost estimate only
+    python prescore.py --workers 8 --top-k 15    # Score everything not fresh in the store
+
+Example crontab entry (02:00 every night):
+    0 2 * * * cd /path/to/backend && python prescore.py >> prescore.log 2>&1
+"""
+
+import argparse
+import math
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.core import log
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.models.incident import Incident
+from app.models.job import ScoringJob
+from app.models.product import Product
+from app.services import job_service, score_store, telemetry
+from app.services.explanation_service import explanation_precomputer
+from app.services.job_service import ScoringJobRunner
+from app.services.prism_service import get_prism_scorer
+
+MODE_AGENTS = {"prism": "bulk_prism", "generic": "bulk_generic", "dual": "bulk_dual"}
+
+# Typical completion tokens per incident in the bulk replies
+COMPLETION_TOKENS_PER_INCIDENT = {"prism": 90, "generic": 45, "dual": 100}
+
+def select_products(db, mode: str, top_k: int, product_ids: Optional[List[int]], force: bool) -> List[int]:
+    """Products whose top-K pairs are not all fresh in the store"""
+    query = db.query(Product.id).order_by(Product.id)
+    if product_ids:
+        query = query.filter(Product.id.in_(product_ids))
+    candidates = [row.id for row in query.all()]
+    if force:
+        return candidates
+
+    expected = min(top_k, db.query(Incident.id).count())
+    fresh = score_store.fresh_pair_counts(db, mode)
+    return [product_id for product_id in candidates if fresh.get(product_id, 0) < expected]
+
+def find_unfinished_job(db, mode: str, top_k: int, context: str) -> Optional[ScoringJob]:
+    return db.query(ScoringJob).filter(
+        ScoringJob.mode == mode,
+        ScoringJob.top_k == top_k,
+        ScoringJob.context == context,
+        ScoringJob.status.in_(["queued", "running"])
+    ).order_by(ScoringJob.id.desc()).first()
+
+def estimate_cost(db, mode: str, product_count: int, top_k: int, chunk_size: int) -> Dict[str, float]:
+    """Token and cost estimate from the real prompt sizes, ~4 characters per token"""
+    scorer = get_prism_scorer()
+    prompt = scorer.prompts[MODE_AGENTS[mode]]
+    prefix_tokens = (len(prompt.system) + len(prompt.static_prefix) + len(prompt.variable_template)) // 4
+
+    incidents = db.query(Incident.title, Incident.description).limit(200).all()
+    incident_tokens = (
+        sum(len(title or "") + len(description or "") + 60 for title, description in incidents) / len(incidents) / 4
+        if incidents else 100
+    )
+    products = db.query(Product.name, Product.description).limit(200).all()
+    product_tokens = (
+        sum(len(name or "") + len(description or "") for name, description in products) / len(products) / 4
+        if products else 50
+    )
+
+    calls = product_count * math.ceil(top_k / chunk_size)
+    pairs = product_count * top_k
+    prompt_tokens = int(calls * (prefix_tokens + product_tokens) + pairs * incident_tokens)
+    completion_tokens = pairs * COMPLETION_TOKENS_PER_INCIDENT[mode]
+    return {
+        "calls": calls,
+        "pairs": pairs,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": telemetry.estimate_cost(prompt_tokens, completion_tokens),
+    }
+
+def wait_for_job(job_id: int, poll_seconds: float) -> ScoringJob:
+    while True:
+        db = SessionLocal()
+        try:
+            job = job_service.get_job(db, job_id)
+            done = (job.completed_items or 0) + (job.failed_items or 0)
+            print(f"  job {job_id} [{job.mode}]: {done}/{job.total_items} products "
+                  f"({job.failed_items or 0} failed) - {job.status}", flush=True)
+            if job.status in ("completed", "failed"):
+                return job
+        finally:
+            db.close()
+        time.sleep(poll_seconds)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pre-score every product's top-K incidents into the pair score store")
+    parser.add_argument("--modes", default="prism,generic", help="Comma-separated: prism, generic, dual (both in one call)")
+    parser.add_argument("--top-k", type=int, default=15, help="Retrieved incidents scored per product")
+    parser.add_argument("--workers", type=int, default=settings.SCORING_JOB_WORKERS, help="Products scored concurrently")
+    parser.add_argument("--chunk-size", type=int, default=settings.SCORING_JOB_CHUNK_SIZE, help="Incidents per bulk LLM call")
+    parser.add_argument("--product-ids", type=lambda v: [int(x) for x in v.split(",")], default=None)
+    parser.add_argument("--context", default="")
+    parser.add_argument("--force", action="store_true", help="Re-score products that are already fresh in the store")
+    parser.add_argument("--dry-run", action="store_true", help="Print the cost estimate and exit")
+    parser.add_argument("--poll-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    log.setup_logging()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODE_AGENTS]
+    if unknown:
+        parser.error(f"Unsupported modes: {', '.join(unknown)}")
+
+    init_db()
+    telemetry.set_endpoint("prescore")
+    runner = ScoringJobRunner(max_workers=args.workers, chunk_size=args.chunk_size)
+
+    db = SessionLocal()
+    try:
+        plan = []
+        for mode in modes:
+            job = find_unfinished_job(db, mode, args.top_k, args.context)
+            if job is not None:
+                remaining = job.total_items - (job.completed_items or 0) - (job.failed_items or 0)
+                plan.append((mode, job.id, remaining))
+            else:
+                product_ids = select_products(db, mode, args.top_k, args.product_ids, args.force)
+                plan.append((mode, None, product_ids))
+
+        total_cost = 0.0
+        for mode, job_id, work in plan:
+            product_count = work if job_id is not None else len(work)
+            estimate = estimate_cost(db, mode, product_count, args.top_k, args.chunk_size)
+            total_cost += estimate["cost_usd"]
+            source = f"resuming job {job_id}" if job_id is not None else "new job"
+            print(f"[{mode}] {product_count} products ({source}): ~{estimate['calls']} calls, "
+                  f"~{estimate['prompt_tokens']:,} prompt + ~{estimate['completion_tokens']:,} completion tokens, "
+                  f"~${estimate['cost_usd']:.4f}")
+        print(f"Estimated total: ~${total_cost:.4f} with {settings.OPENAI_MODEL}")
+        if args.dry_run:
+            return 0
+
+        job_ids = []
+        for mode, job_id, work in plan:
+            if job_id is not None:
+                runner.resume_job(job_id)
+                job_ids.append(job_id)
+            elif work:
+                job = runner.create_job(db, mode=mode, top_k=args.top_k, context=args.context, product_ids=work)
+                runner.submit(job.id)
+                job_ids.append(job.id)
+            else:
+                print(f"[{mode}] every product is already fresh in the store")
+    finally:
+        db.close()
+
+    started = time.time()
+    failed = 0
+    try:
+        for job_id in job_ids:
+            job = wait_for_job(job_id, args.poll_seconds)
+            failed += job.failed_items or 0
+    except KeyboardInterrupt:
+        print("Interrupted - re-run the same command to resume")
+        runner.shutdown()
+        return 130
+    runner.shutdown(wait=True)
+    # Scored products queue explanation precomputes; let them finish before exiting
+    explanation_precomputer.shutdown(wait=True)
+
+    print(f"Warmup finished in {time.time() - started:.0f}s with {failed} failed products")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
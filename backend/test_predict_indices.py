@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Index prediction checks: the classifier trains on product tags and predicts
+them, predict_indices only asks the LLM below PREDICT_INDICES_MIN_CONFIDENCE,
+classifier answers leave ethical issues unpredicted, and predictions are
+cached by normalized description. The LLM is replaced by a recording fake.
+Run directly or with pytest.
+"""
+
+import asyncio
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.base_class import Base
+from app.db.migrations import run_migrations
+from app.models import incident, models  # noqa: F401 (tables the migrations touch)
+from app.models.product import Product
+from app.services import llm_service
+from app.services.index_classifier import IndexClassifier
+
+VISION = "camera image recognition detects objects in video frames using computer vision"
+LANGUAGE = "chatbot answers customer questions in natural language text conversations"
+HOSPITAL = "for hospital patients and doctors diagnosing medical conditions"
+SHOP = "for online shop retail customers browsing store products"
+
+def make_session() -> Session:
+    """Session on a fresh database seeded with products in two technologies and two purposes"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(60):
+        vision, hospital = i % 2 == 0, i % 3 == 0
+        session.add(Product(
+            name=f"Product {i}",
+            description=f"{VISION if vision else LANGUAGE} {HOSPITAL if hospital else SHOP}",
+            technology=json.dumps(["Computer Vision" if vision else "NLP"]),
+            purpose=json.dumps(["Healthcare" if hospital else "Retail"])
+        ))
+    session.commit()
+    return session
+
+def trained_classifier() -> IndexClassifier:
+    classifier = IndexClassifier()
+    assert classifier.train(make_session()), "classifier should train on 60 products"
+    # Tests train explicitly; no background retraining against the app database
+    classifier.refresh = lambda db=None: None
+    return classifier
+
+class FakeLLM:
+    """Stands in for _predict_indices_llm, recording the descriptions it is asked about"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def __call__(self, description):
+        self.calls.append(description)
+        return dict(self.result) if self.result is not None else None
+
+def run_predict(description, classifier, llm) -> dict:
+    original = llm_service.index_classifier, llm_service._predict_indices_llm
+    llm_service.index_classifier, llm_service._predict_indices_llm = classifier, llm
+    try:
+        return asyncio.run(llm_service.predict_indices(description))
+    finally:
+        llm_service.index_classifier, llm_service._predict_indices_llm = original
+
+LLM_ANSWER = {'technology': ["LLM"], 'purpose': ["Support"], 'ethical_issues': ["Privacy"]}
+
+def test_classifier_predicts_trained_tags():
+    classifier = trained_classifier()
+    prediction = classifier.predict(f"{VISION} {HOSPITAL}")
+    assert prediction['technology'][0] == "Computer Vision", prediction
+    assert prediction['purpose'][0] == "Healthcare", prediction
+    assert prediction['confidence'] >= settings.PREDICT_INDICES_MIN_CONFIDENCE, prediction
+
+def test_classifier_needs_enough_products():
+    session = make_session()
+    session.query(Product).filter(Product.id > settings.PREDICT_INDICES_MIN_TRAINING_PRODUCTS - 10).delete()
+    session.commit()
+    classifier = IndexClassifier()
+    assert not classifier.train(session)
+    assert classifier.predict(VISION) is None
+
+def test_confident_classifier_skips_llm_and_leaves_ethical_issues_unpredicted():
+    llm_service._prediction_cache.clear()
+    llm = FakeLLM(LLM_ANSWER)
+    result = run_predict(f"{LANGUAGE} {SHOP}", trained_classifier(), llm)
+    assert llm.calls == [], "a confident classifier should not call the LLM"
+    assert result['source'] == "classifier" and result['technology'][0] == "NLP", result
+    assert result['ethical_issues'] is None, "ethical issues are not predicted by the classifier"
+
+def test_unsure_classifier_asks_llm():
+    llm_service._prediction_cache.clear()
+    llm = FakeLLM(LLM_ANSWER)
+    result = run_predict("quantum blockchain oracle", trained_classifier(), llm)
+    assert len(llm.calls) == 1
+    assert result['source'] == "llm" and result['ethical_issues'] == ["Privacy"], result
+    assert result['confidence'] < settings.PREDICT_INDICES_MIN_CONFIDENCE
+
+def test_threshold_decides_between_classifier_and_llm():
+    classifier = trained_classifier()
+    description = f"{VISION} {SHOP}"
+    confidence = classifier.predict(description)['confidence']
+    original = settings.PREDICT_INDICES_MIN_CONFIDENCE
+    try:
+        for threshold, source in ((confidence, "classifier"), (min(confidence + 0.01, 1.01), "llm")):
+            llm_service._prediction_cache.clear()
+            settings.PREDICT_INDICES_MIN_CONFIDENCE = threshold
+            result = run_predict(description, classifier, FakeLLM(LLM_ANSWER))
+            assert result['source'] == source, f"threshold {threshold} for confidence {confidence}: {result['source']}"
+    finally:
+        settings.PREDICT_INDICES_MIN_CONFIDENCE = original
+
+def test_llm_failure_falls_back_uncached():
+    llm_service._prediction_cache.clear()
+    classifier = trained_classifier()
+    result = run_predict("quantum blockchain oracle", classifier, FakeLLM(None))
+    assert result['source'] == "classifier" and result['ethical_issues'] is None, result
+    llm = FakeLLM(LLM_ANSWER)
+    assert run_predict("quantum blockchain oracle", classifier, llm)['source'] == "llm"
+    assert len(llm.calls) == 1, "a failed LLM prediction must not be cached"
+
+def test_predictions_are_cached_by_normalized_description():
+    llm_service._prediction_cache.clear()
+    classifier = trained_classifier()
+    llm = FakeLLM(LLM_ANSWER)
+    first = run_predict("Quantum  blockchain oracle", classifier, llm)
+    again = run_predict("quantum blockchain\noracle ", classifier, llm)
+    assert len(llm.calls) == 1, "the second request should be served from the cache"
+    assert again['source'] == "cache"
+    assert {k: v for k, v in again.items() if k != 'source'} == {k: v for k, v in first.items() if k != 'source'}
+
+def test_cache_evicts_least_recently_used():
+    llm_service._prediction_cache.clear()
+    classifier = trained_classifier()
+    original = settings.PREDICT_INDICES_CACHE_SIZE
+    settings.PREDICT_INDICES_CACHE_SIZE = 2
+    try:
+        llm = FakeLLM(LLM_ANSWER)
+        for description in ("oracle one", "oracle two", "oracle one", "oracle three"):
+            run_predict(description, classifier, llm)
+        assert len(llm.calls) == 3
+        assert run_predict("oracle one", classifier, llm)['source'] == "cache"
+        run_predict("oracle two", classifier, llm)
+        assert len(llm.calls) == 4, "the least recently used entry should have been evicted"
+    finally:
+        settings.PREDICT_INDICES_CACHE_SIZE = original
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Product listing checks: walking pages with next_cursor (keyset on id, or on
+bm25 rank and id when searching) returns the same rows in the same order as
+offset pages, without gaps or repeats, and listing totals are served from the
+count cache until the products table version changes. Run directly or with pytest.
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.crud import product as product_crud
+from app.db.base_class import Base
+from app.db.migrations import run_migrations
+from app.models import incident, models  # noqa: F401 (tables the migrations touch)
+from app.models.product import Product
+
+PRODUCTS = 60
+
+def make_session() -> Session:
+    """Fresh database with products of varying relevance to "camera" and two technologies"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(PRODUCTS):
+        if i % 5 == 0:
+            name, description = f"Camera {i}", "Smart camera with object detection"
+        elif i % 3 == 0:
+            name, description = f"Tool {i}", "Uses a camera"
+        else:
+            name, description = f"Tool {i}", "Text assistant"
+        session.add(Product(name=name, description=description, technology=json.dumps(["Vision" if i % 2 else "NLP"]), purpose="[]"))
+    session.commit()
+    return session
+
+def walk(db: Session, limit: int, **filters) -> list:
+    """Ids of every page fetched with the previous page's cursor"""
+    ids, after = [], None
+    while True:
+        page, after = product_crud.list_products(db, limit=limit, after=after, **filters)
+        ids.extend(product.id for product in page)
+        if after is None:
+            return ids
+        assert len(ids) <= PRODUCTS, "cursor walk does not terminate"
+
+def offset_pages(db: Session, limit: int, **filters) -> list:
+    ids, skip = [], 0
+    while True:
+        page, _ = product_crud.list_products(db, skip=skip, limit=limit, **filters)
+        ids.extend(product.id for product in page)
+        if len(page) < limit:
+            return ids
+        skip += limit
+
+def test_keyset_on_id_matches_offset_pages():
+    db = make_session()
+    ids = walk(db, limit=7)
+    assert ids == sorted(ids) and len(set(ids)) == PRODUCTS, ids
+    assert ids == offset_pages(db, limit=7)
+
+def test_keyset_on_id_with_tag_filter():
+    db = make_session()
+    ids = walk(db, limit=4, technology=["vision"])
+    assert ids == offset_pages(db, limit=4, technology=["vision"])
+    assert len(ids) == PRODUCTS // 2 and ids == sorted(ids), ids
+
+def test_keyset_on_rank_matches_offset_pages():
+    db = make_session()
+    ranked, _ = product_crud.list_products(db, search="camera", limit=PRODUCTS)
+    expected = [product.id for product in ranked]
+    # Name matches first; many rows tie on score and are ordered by id
+    assert all(product.name.startswith("Camera") for product in ranked[:PRODUCTS // 5]), [p.name for p in ranked]
+    for limit in (1, 3, 5):
+        assert walk(db, limit=limit, search="camera") == expected, f"limit {limit}"
+        assert offset_pages(db, limit=limit, search="camera") == expected, f"limit {limit}"
+
+def test_last_page_has_no_cursor():
+    db = make_session()
+    page, after = product_crud.list_products(db, skip=PRODUCTS - 5, limit=5)
+    assert len(page) == 5 and after is None
+    page, after = product_crud.list_products(db, search="camera", limit=PRODUCTS)
+    assert after is None
+
+def test_malformed_cursor_raises_value_error():
+    db = make_session()
+    for after, search in (("abc", None), ("1.5", "camera"), ("x:y", "camera")):
+        try:
+            product_crud.list_products(db, search=search, after=after)
+            raise AssertionError(f"cursor {after!r} should be rejected")
+        except ValueError:
+            pass
+
+def test_count_cache_invalidated_by_table_version():
+    db = make_session()
+    product_crud._count_cache.clear()
+    assert product_crud.count_products(db, "camera") == PRODUCTS // 5 + PRODUCTS // 3 - PRODUCTS // 15
+    (key,) = product_crud._count_cache
+
+    # Served from the cache while the table is unchanged
+    product_crud._count_cache[key] = -1
+    assert product_crud.count_products(db, "camera") == -1
+
+    version = product_crud.table_version(db, "products")
+    db.add(Product(name="Camera new", description="", technology="[]", purpose="[]"))
+    db.commit()
+    assert product_crud.table_version(db, "products") > version
+    assert product_crud.count_products(db, "camera") == PRODUCTS // 5 + PRODUCTS // 3 - PRODUCTS // 15 + 1
+
+    db.query(Product).filter(Product.name == "Camera new").delete()
+    db.commit()
+    assert product_crud.count_products(db, "camera") == PRODUCTS // 5 + PRODUCTS // 3 - PRODUCTS // 15
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Query plan checks for incident_product_mappings.
+Builds a scratch SQLite database with the app's tables and migrations, runs
+the mapping queries of each endpoint and the common lookups, and asserts that
+EXPLAIN QUERY PLAN reaches the table through an index. Also checks that the
+trigger-maintained /api/stats counters match a recount. Run directly or with pytest.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.endpoints.stats import get_system_stats
+from app.db.base_class import Base
+from app.db.migrations import run_migrations
+from app.models.models import IncidentProductMapping
+
+TABLE = "incident_product_mappings"
+MAPPINGS = 3000  # More than the 2,081 rows of the imported dataset
+
+def make_session() -> Session:
+    """Session on a fresh database with the app schema, all migrations and seeded mappings"""
+    engine = create_engine("sqlite://")  # In-memory, one connection per thread
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"INSERT INTO {TABLE} (incident_id, product_id, mapping_confidence, transferability_score, is_human_validated, created_at) "
+            "VALUES (?, ?, ?, ?, ?, '2025-01-01T00:00:00')",
+            [(i % 150, i % 400, 0.5, (i % 97) / 97, i % 10 == 0) for i in range(MAPPINGS)]
+        )
+    return sessionmaker(bind=engine)()
+
+def capture_mapping_queries(session: Session, run) -> list:
+    """(sql, params) of every statement touching the mappings table while `run()` executes"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if TABLE in statement and not statement.startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+def query_plan(session: Session, statement: str, parameters=()) -> list:
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+def assert_index_backed(session: Session, statement: str, parameters=(), index: str = None) -> list:
+    """Every plan step on the mappings table uses an index (`index`, if given); returns the plan"""
+    plan = query_plan(session, statement, parameters)
+    steps = [step for step in plan if TABLE in step]
+    assert steps, f"mappings table not in plan {plan} for:\n{statement}"
+    for step in steps:
+        assert "INDEX" in step or "PRIMARY KEY" in step, f"full table scan: {step!r} for:\n{statement}"
+        if index:
+            assert index in step, f"expected {index}, got {step!r} for:\n{statement}"
+    return plan
+
+def test_stats_endpoint_mapping_counts():
+    """/api/stats reads stored counters; its ?fresh=true recount never scans the mapping rows"""
+    session = make_session()
+    try:
+        stats = {}
+        statements = capture_mapping_queries(session, lambda: stats.update(get_system_stats(db=session, fresh=False)))
+        assert statements == [], statements
+        assert stats["total_mappings"] == MAPPINGS
+        assert stats["human_validated_mappings"] == MAPPINGS // 10
+
+        statements = capture_mapping_queries(session, lambda: stats.update(get_system_stats(db=session, fresh=True)))
+        assert len(statements) == 2, statements
+        for statement, parameters in statements:
+            assert_index_backed(session, statement, parameters)
+        # The validated count is a range lookup, not an index scan
+        assert_index_backed(session, *statements[1], index="ix_mappings_validated")
+        assert stats["human_validated_mappings"] == MAPPINGS // 10
+    finally:
+        session.close()
+
+def test_stats_counters_follow_writes():
+    """Trigger-maintained counters equal a full recount after inserts, updates and deletes"""
+    session = make_session()
+    try:
+        conn = session.connection()
+        conn.exec_driver_sql(
+            "INSERT INTO products (name, image_urls) VALUES ('a', '[]'), ('b', '[\"x.png\"]'), ('c', NULL), ('d', '')"
+        )
+        conn.exec_driver_sql("UPDATE products SET image_urls = '[\"y.png\"]' WHERE name IN ('a', 'c')")
+        conn.exec_driver_sql("DELETE FROM products WHERE name = 'b'")
+        conn.exec_driver_sql("INSERT INTO incidents (title, description) VALUES ('i', 'd')")
+        conn.exec_driver_sql(f"UPDATE {TABLE} SET is_human_validated = 1 WHERE id <= 5")
+        conn.exec_driver_sql(f"DELETE FROM {TABLE} WHERE id > {MAPPINGS - 7}")
+        session.commit()
+
+        stored = get_system_stats(db=session, fresh=False)
+        assert stored == get_system_stats(db=session, fresh=True), stored
+        assert stored["products_with_images"] == 2
+        assert stored["total_mappings"] == MAPPINGS - 7
+    finally:
+        session.close()
+
+def test_product_mappings_lookup():
+    """A product's mapped incidents, best first: covering index, no sort step"""
+    session = make_session()
+    try:
+        query = session.query(IncidentProductMapping.incident_id, IncidentProductMapping.transferability_score).filter(
+            IncidentProductMapping.product_id == 7
+        ).order_by(IncidentProductMapping.transferability_score.desc()).limit(10)
+        statements = capture_mapping_queries(session, query.all)
+        plan = assert_index_backed(session, *statements[0], index="COVERING INDEX ix_mappings_product_score")
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+    finally:
+        session.close()
+
+def test_incident_mappings_lookup():
+    """An incident's mapped products: covering index"""
+    session = make_session()
+    try:
+        query = session.query(IncidentProductMapping.product_id).filter(IncidentProductMapping.incident_id == 3)
+        statements = capture_mapping_queries(session, query.all)
+        assert_index_backed(session, *statements[0], index="COVERING INDEX ix_mappings_incident_product")
+    finally:
+        session.close()
+
+def test_pair_mapping_lookup():
+    """One product-incident pair"""
+    session = make_session()
+    try:
+        query = session.query(IncidentProductMapping).filter(
+            IncidentProductMapping.product_id == 7,
+            IncidentProductMapping.incident_id == 7
+        )
+        statements = capture_mapping_queries(session, query.all)
+        assert_index_backed(session, *statements[0])
+    finally:
+        session.close()
+
+def test_validated_mappings_of_product():
+    """Human-validated mappings of a product (as listed by check_mappings.py)"""
+    session = make_session()
+    try:
+        query = session.query(IncidentProductMapping.id).filter(
+            IncidentProductMapping.is_human_validated == True,
+            IncidentProductMapping.product_id == 10
+        )
+        statements = capture_mapping_queries(session, query.all)
+        assert_index_backed(session, *statements[0])
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
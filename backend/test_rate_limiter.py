@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Token bucket rate limiter checks: buckets refill at limit/60 per second,
+callers block until capacity frees up and give up after the maximum queue
+wait, 429 pauses and usage corrections apply to every caller, and a state
+file shares the buckets between limiters. Also checks that the async client
+is only used through llm_gateway. Run directly or with pytest.
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.rate_limiter import RateLimitQueueTimeout, TokenBucketRateLimiter
+
+def drain_requests(limiter: TokenBucketRateLimiter) -> None:
+    for _ in range(limiter.rpm):
+        limiter.acquire(0, max_wait_s=0)
+
+def assert_times_out(limiter: TokenBucketRateLimiter, tokens: int) -> None:
+    try:
+        limiter.acquire(tokens, max_wait_s=0)
+    except RateLimitQueueTimeout:
+        return
+    raise AssertionError("acquire should have timed out on an empty bucket")
+
+def test_full_bucket_admits_without_waiting():
+    limiter = TokenBucketRateLimiter(requests_per_minute=120, tokens_per_minute=0)
+    waits = [limiter.acquire(0) for _ in range(120)]
+    assert max(waits) < 0.05, f"a full bucket should not queue: waited {max(waits):.2f}s"
+
+def test_empty_request_bucket_blocks_until_refilled():
+    limiter = TokenBucketRateLimiter(requests_per_minute=120, tokens_per_minute=0)  # 2 per second
+    drain_requests(limiter)
+    assert_times_out(limiter, 0)
+    waited = limiter.acquire(0)
+    assert 0.4 <= waited <= 1.0, f"one request refills in 0.5s, waited {waited:.2f}s"
+
+def test_bucket_refills_over_time():
+    limiter = TokenBucketRateLimiter(requests_per_minute=600, tokens_per_minute=0)  # 10 per second
+    drain_requests(limiter)
+    time.sleep(0.35)
+    for _ in range(3):
+        assert limiter.acquire(0, max_wait_s=0) < 0.05
+    assert_times_out(limiter, 0)
+
+def test_token_bucket_blocks_large_calls():
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=600)  # 10 tokens per second
+    limiter.acquire(600)
+    assert_times_out(limiter, 100)
+    waited = limiter.acquire(5)
+    assert 0.4 <= waited <= 1.0, f"5 tokens refill in 0.5s, waited {waited:.2f}s"
+
+def test_oversized_call_waits_for_full_bucket_only():
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=60000)
+    assert limiter.acquire(10 ** 6, max_wait_s=0) < 0.05, "a call larger than the bucket takes the full bucket"
+    assert_times_out(limiter, 1000)
+
+def test_queue_wait_is_bounded():
+    limiter = TokenBucketRateLimiter(requests_per_minute=1, tokens_per_minute=0, max_wait_s=0.2)
+    limiter.acquire(0)
+    started = time.time()
+    try:
+        limiter.acquire(0, max_wait_s=5)  # Cannot extend the configured maximum
+        raise AssertionError("acquire should have timed out")
+    except RateLimitQueueTimeout:
+        pass
+    assert time.time() - started < 0.1, "a wait past the maximum is refused up front"
+
+def test_settle_returns_unused_tokens():
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=600)
+    limiter.acquire(600)
+    limiter.settle(estimated_tokens=600, actual_tokens=300)
+    assert limiter.acquire(250, max_wait_s=0) < 0.05, "unused estimate should be back in the bucket"
+
+def test_penalize_holds_every_caller():
+    limiter = TokenBucketRateLimiter(requests_per_minute=600, tokens_per_minute=0)
+    limiter.penalize(0.3)
+    assert_times_out(limiter, 0)
+    waited = limiter.acquire(0)
+    assert 0.25 <= waited <= 0.8, f"penalty of 0.3s, waited {waited:.2f}s"
+
+def test_state_file_shares_buckets():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "limiter.db")
+        first = TokenBucketRateLimiter(requests_per_minute=60, tokens_per_minute=0, state_path=path)
+        second = TokenBucketRateLimiter(requests_per_minute=60, tokens_per_minute=0, state_path=path)
+        for _ in range(30):
+            first.acquire(0, max_wait_s=0)
+            second.acquire(0, max_wait_s=0)
+        assert_times_out(first, 0)
+        assert_times_out(second, 0)
+
+def test_async_client_only_used_by_gateway():
+    app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+    offenders = []
+    for root, _, files in os.walk(app_dir):
+        for name in files:
+            if not name.endswith(".py") or name in ("llm_client.py", "llm_gateway.py"):
+                continue
+            path = os.path.join(root, name)
+            with open(path, encoding="utf-8") as f:
+                if "get_async_openai_client" in f.read():
+                    offenders.append(os.path.relpath(path, app_dir))
+    assert not offenders, f"call the LLM through llm_gateway instead: {offenders}"
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Scoring job checks: items are checkpointed with their results, failed
+products are recorded without stopping the job, resuming after a restart
+finishes interrupted and pending items and retries failed ones until
+SCORING_JOB_MAX_ATTEMPTS. Runs on a scratch SQLite file with a fake scorer
+and retrieval in place of the LLM. Run directly or with pytest.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base_class import Base
+from app.db.migrations import run_migrations
+from app.models import incident, models  # noqa: F401 (tables the migrations touch)
+from app.models.job import ScoringJob, ScoringJobItem, ScoringJobResult
+from app.models.product import Product
+from app.services import job_service
+from app.services.weight_profiles import DIMENSIONS
+
+INCIDENTS = [SimpleNamespace(id=i, title=f"Incident {i}", description="", technologies="[]") for i in (1, 2, 3)]
+
+class FakeScorer:
+    """Bulk PRISM scorer failing for the products in `failing`; records the products it scored"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.scored = []
+        self._lock = threading.Lock()
+
+    def bulk_calculate_prism_scores(self, incidents, product_data, context):
+        product_id = int(product_data['name'].split()[-1])
+        with self._lock:
+            self.scored.append(product_id)
+        if product_id in self.failing:
+            raise RuntimeError("gateway down")
+        return [{'incident_id': i['id'], **{d: 60.0 for d in DIMENSIONS}, 'overall_score': 60.0, 'reasoning': "ok"} for i in incidents]
+
+class ScratchDatabase:
+    """Temporary database the job service runs against for the duration of a test"""
+
+    def __enter__(self):
+        self.directory = tempfile.TemporaryDirectory()
+        engine = create_engine(f"sqlite:///{os.path.join(self.directory.name, 'jobs.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine)
+        self.patched = {
+            'SessionLocal': self.Session,
+            'find_similar_incidents': self._find_similar_incidents,
+            'explanation_precomputer': SimpleNamespace(schedule=lambda product_ids: 0),
+        }
+        self.original = {name: getattr(job_service, name) for name in self.patched}
+        for name, value in self.patched.items():
+            setattr(job_service, name, value)
+        db = self.Session()
+        db.add_all([Product(id=product_id, name=f"Product {product_id}") for product_id in range(1, 6)])
+        db.commit()
+        db.close()
+        return self
+
+    def __exit__(self, *exc):
+        for name, value in self.original.items():
+            setattr(job_service, name, value)
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    @staticmethod
+    async def _find_similar_incidents(product, db, limit):
+        return INCIDENTS[:limit]
+
+    def job(self, job_id):
+        db = self.Session()
+        try:
+            job = db.query(ScoringJob).filter(ScoringJob.id == job_id).first()
+            items = {item.product_id: (item.status, item.attempts) for item in db.query(ScoringJobItem).filter(ScoringJobItem.job_id == job_id)}
+            results = db.query(ScoringJobResult).filter(ScoringJobResult.job_id == job_id).count()
+            return job, items, results
+        finally:
+            db.close()
+
+    def wait_for(self, job_id, timeout=10.0):
+        """The job once it is completed or failed"""
+        stop = time.time() + timeout
+        while time.time() < stop:
+            job, items, results = self.job(job_id)
+            if job.status in ("completed", "failed"):
+                return job, items, results
+            time.sleep(0.02)
+        raise AssertionError(f"job {job_id} still {job.status} after {timeout}s: {items}")
+
+def new_job(database, product_ids, scorer):
+    runner = job_service.ScoringJobRunner(scorer=scorer, max_workers=2)
+    db = database.Session()
+    try:
+        job_id = runner.create_job(db, mode="prism", top_k=3, product_ids=product_ids).id
+    finally:
+        db.close()
+    return runner, job_id
+
+def test_job_checkpoints_every_product():
+    with ScratchDatabase() as database:
+        scorer = FakeScorer()
+        runner, job_id = new_job(database, [1, 2, 3], scorer)
+        runner.submit(job_id)
+        job, items, results = database.wait_for(job_id)
+        runner.shutdown()
+        assert job.status == "completed" and job.completed_items == 3 and job.failed_items == 0
+        assert set(items.values()) == {("done", 1)}, items
+        assert results == 3 * len(INCIDENTS)
+
+def test_failed_product_does_not_stop_job():
+    with ScratchDatabase() as database:
+        runner, job_id = new_job(database, [1, 2, 3], FakeScorer(failing={2}))
+        runner.submit(job_id)
+        job, items, results = database.wait_for(job_id)
+        runner.shutdown()
+        assert job.status == "completed" and job.completed_items == 2 and job.failed_items == 1
+        assert items[2] == ("failed", 1), items
+        assert results == 2 * len(INCIDENTS)
+
+def test_resume_retries_failed_items():
+    with ScratchDatabase() as database:
+        runner, job_id = new_job(database, [1, 2], FakeScorer(failing={2}))
+        runner.submit(job_id)
+        database.wait_for(job_id)
+        runner.shutdown()
+
+        # The gateway is back: resuming the finished job retries the failed product
+        retry = job_service.ScoringJobRunner(scorer=FakeScorer(), max_workers=2)
+        retry.resume_job(job_id)
+        job, items, results = database.wait_for(job_id)
+        retry.shutdown()
+        assert job.status == "completed" and job.completed_items == 2 and job.failed_items == 0, (job.completed_items, job.failed_items)
+        assert items[2] == ("done", 2), items
+        assert retry.scorer.scored == [2], "only the failed product should be rescored"
+
+def test_failed_items_are_terminal_after_max_attempts():
+    with ScratchDatabase() as database:
+        scorer = FakeScorer(failing={1})
+        runner, job_id = new_job(database, [1], scorer)
+        runner.submit(job_id)
+        database.wait_for(job_id)
+        for _ in range(settings.SCORING_JOB_MAX_ATTEMPTS + 1):
+            runner.resume_job(job_id)
+            job, items, _ = database.wait_for(job_id)
+        runner.shutdown()
+        assert items[1] == ("failed", settings.SCORING_JOB_MAX_ATTEMPTS), items
+        assert job.status == "failed" and job.failed_items == 1
+        assert len(scorer.scored) == settings.SCORING_JOB_MAX_ATTEMPTS
+
+def test_interrupted_job_resumes_after_restart():
+    with ScratchDatabase() as database:
+        _, job_id = new_job(database, [1, 2, 3, 4, 5], FakeScorer())
+
+        # State left by a process killed mid-job: one product done, one mid-flight,
+        # one failed with attempts left, one failed for good, one never started
+        db = database.Session()
+        states = {1: ("done", 1), 2: ("running", 1), 3: ("failed", 1), 4: ("failed", settings.SCORING_JOB_MAX_ATTEMPTS), 5: ("pending", 0)}
+        for item in db.query(ScoringJobItem).filter(ScoringJobItem.job_id == job_id):
+            item.status, item.attempts = states[item.product_id]
+        job = db.query(ScoringJob).filter(ScoringJob.id == job_id).first()
+        job.status, job.completed_items, job.failed_items = "running", 1, 2
+        db.commit()
+        db.close()
+
+        scorer = FakeScorer()
+        restarted = job_service.ScoringJobRunner(scorer=scorer, max_workers=2)
+        assert restarted.resume_pending_jobs() == 1
+        job, items, results = database.wait_for(job_id)
+        restarted.shutdown()
+        assert sorted(scorer.scored) == [2, 3, 5], scorer.scored
+        assert job.status == "completed" and job.completed_items == 4 and job.failed_items == 1, (job.completed_items, job.failed_items)
+        assert items == {1: ("done", 1), 2: ("done", 2), 3: ("done", 2), 4: ("failed", settings.SCORING_JOB_MAX_ATTEMPTS), 5: ("done", 1)}, items
+        assert results == 3 * len(INCIDENTS)
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
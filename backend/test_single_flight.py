@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing: followers share the leader's result or error, get
+their own copies, only join leaders whose deadline covers their own, and
+stop waiting at their own deadline.
+Run directly or with pytest.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import deadline
+from app.services.single_flight import SingleFlight
+
+def _run_concurrently(flight, key, fn, budgets_ms):
+    """Start one leader, then followers once it is in flight; returns (results, errors)"""
+    results = [None] * len(budgets_ms)
+    errors = [None] * len(budgets_ms)
+
+    def caller(i, budget_ms):
+        if budget_ms is not None:
+            deadline.start(budget_ms)
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=caller, args=(i, ms)) for i, ms in enumerate(budgets_ms)]
+    threads[0].start()
+    while not flight.in_flight():
+        time.sleep(0.001)
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    return results, errors
+
+def _slow(result, delay=0.2, calls=None):
+    def fn():
+        if calls is not None:
+            calls.append(1)
+        time.sleep(delay)
+        return result() if callable(result) else result
+    return fn
+
+def test_followers_share_one_call():
+    calls = []
+    results, errors = _run_concurrently(SingleFlight(), "k", _slow({"score": 1}, calls=calls), [None] * 4)
+    assert errors == [None] * 4, errors
+    assert len(calls) == 1, f"expected one call, got {len(calls)}"
+    assert all(r == {"score": 1} for r in results), results
+
+def test_leader_error_reaches_followers():
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("gateway down")
+
+    results, errors = _run_concurrently(SingleFlight(), "k", fail, [None] * 3)
+    assert all(isinstance(e, ValueError) for e in errors), errors
+    assert results == [None] * 3
+
+def test_followers_get_independent_copies():
+    results, errors = _run_concurrently(SingleFlight(), "k", _slow({"items": [1, 2]}), [None] * 3)
+    assert errors == [None] * 3, errors
+    results[1]["items"].append(3)
+    assert results[0]["items"] == [1, 2] and results[2]["items"] == [1, 2], results
+    assert results[1] is not results[2]
+
+def test_caller_without_deadline_does_not_join_deadline_leader():
+    calls = []
+    results, errors = _run_concurrently(SingleFlight(), "k", _slow("ok", calls=calls), [2000, None])
+    assert errors == [None, None], errors
+    assert len(calls) == 2, "a caller without a deadline must not share a deadline-limited call"
+
+def test_longer_deadline_does_not_join_shorter_leader():
+    calls = []
+    _run_concurrently(SingleFlight(), "k", _slow("ok", calls=calls), [1000, 3000])
+    assert len(calls) == 2, "a later deadline must not share a call that stops earlier"
+
+def test_shorter_deadline_joins_longer_leader():
+    calls = []
+    results, errors = _run_concurrently(SingleFlight(), "k", _slow("ok", calls=calls), [3000, 1000])
+    assert errors == [None, None], errors
+    assert len(calls) == 1 and results == ["ok", "ok"]
+
+def test_follower_wait_is_bounded_by_its_deadline():
+    flight = SingleFlight()
+    outcome = {}
+
+    def follower():
+        deadline.start(200)
+        started = time.monotonic()
+        try:
+            flight.do("k", lambda: "unused")
+        except deadline.DeadlineExceeded:
+            outcome["raised"] = True
+        outcome["waited"] = time.monotonic() - started
+        outcome["partial"] = deadline.current().partial
+
+    leader = threading.Thread(target=lambda: flight.do("k", _slow("ok", delay=1.5)))
+    leader.start()
+    while not flight.in_flight():
+        time.sleep(0.001)
+    waiter = threading.Thread(target=follower)
+    waiter.start()
+    waiter.join(timeout=5)
+    leader.join(timeout=5)
+    assert outcome.get("raised"), "follower should give up at its deadline"
+    assert outcome["waited"] < 1.0, f"follower waited {outcome['waited']:.2f}s on a 200ms budget"
+    assert outcome["partial"]
+
+def test_partial_leader_marks_followers_partial():
+    partial = {}
+
+    def leader_cut_short():
+        time.sleep(0.2)
+        deadline.mark_partial()
+        return "placeholders"
+
+    flight = SingleFlight()
+
+    def caller(name, budget_ms):
+        deadline.start(budget_ms)
+        flight.do("k", leader_cut_short)
+        partial[name] = deadline.current().partial
+
+    leader = threading.Thread(target=caller, args=("leader", 3000))
+    follower = threading.Thread(target=caller, args=("follower", 1000))
+    leader.start()
+    while not flight.in_flight():
+        time.sleep(0.001)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert partial == {"leader": True, "follower": True}, partial
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
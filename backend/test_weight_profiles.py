@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Weight profile checks: overall scores recomputed from stored pairs match the
+weighted sum PRISMScorer computes for the same dimension scores, applying a
+profile only previews it unless activated, and activating one changes the
+overall scores stored pairs are served with. The bulk LLM call is replaced by
+fixed dimension scores. Run directly or with pytest.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base_class import Base
+from app.db.migrations import run_migrations
+from app.models import incident, models  # noqa: F401 (tables the migrations touch)
+from app.services import score_store, weight_profiles
+from app.services.prism_service import PRISMScorer
+from app.services.weight_profiles import BUILTIN_PROFILES, DIMENSIONS
+
+PRODUCT_ID = 7
+DIMENSION_SCORES = {
+    101: [90, 80, 70, 60, 50, 40],
+    102: [20, 35, 50, 65, 80, 95],
+    103: [55, 55, 55, 55, 55, 55],
+    104: [100, 1, 100, 1, 100, 1],
+}
+
+def make_session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    return sessionmaker(bind=engine)()
+
+def scorer_results() -> list:
+    """Bulk PRISM results computed by PRISMScorer for DIMENSION_SCORES"""
+    scorer = PRISMScorer()
+    scorer._bulk_score = lambda agent, incidents, *args, **kwargs: {
+        str(incident['id']): {**dict(zip(DIMENSIONS, DIMENSION_SCORES[incident['id']])), 'reasoning': "fixed"}
+        for incident in incidents
+    }
+    incidents = [{'id': incident_id, 'title': f"Incident {incident_id}"} for incident_id in DIMENSION_SCORES]
+    return scorer.bulk_calculate_prism_scores(incidents, {'name': "Product"}, "")
+
+def stored_session(results: list) -> Session:
+    db = make_session()
+    score_store.upsert_pair_scores(db, PRODUCT_ID, results, "test")
+    db.commit()
+    return db
+
+def test_recomputed_overall_matches_scorer():
+    results = scorer_results()
+    db = stored_session(results)
+    expected = {result['incident_id']: result['overall_score'] for result in results}
+
+    applied = score_store.ScoreMatrix().apply_profile(db, "bulk", BUILTIN_PROFILES["bulk"], product_id=PRODUCT_ID)
+    assert applied['pairs'] == len(DIMENSION_SCORES)
+    for entry in applied['results']:
+        assert abs(entry['overall_score'] - expected[entry['incident_id']]) < 0.01, (entry, expected)
+
+    recomputed = score_store.ScoreMatrix().recompute(db, BUILTIN_PROFILES["bulk"])
+    assert sorted(round(float(score), 2) for score in recomputed) == sorted(round(score, 2) for score in expected.values())
+
+def test_served_overall_matches_scorer():
+    results = scorer_results()
+    db = stored_session(results)
+    cached = score_store.get_cached_scores(db, PRODUCT_ID, list(DIMENSION_SCORES), "prism")
+    for result in results:
+        assert abs(cached[result['incident_id']]['overall_score'] - result['overall_score']) < 1e-6, result
+
+def test_apply_previews_by_default():
+    db = stored_session(scorer_results())
+    applied = score_store.ScoreMatrix().apply_profile(db, "authentic", BUILTIN_PROFILES["authentic"])
+    assert not applied['active']
+    assert weight_profiles.get_active_profile(db)[0] == weight_profiles.DEFAULT_PROFILE
+
+    # Ranked by the previewed weights, not the active ones
+    authentic = BUILTIN_PROFILES["authentic"]
+    expected = {
+        incident_id: sum(score * authentic[d] for d, score in zip(DIMENSIONS, scores))
+        for incident_id, scores in DIMENSION_SCORES.items()
+    }
+    assert [entry['incident_id'] for entry in applied['results']] == sorted(expected, key=lambda i: -expected[i])
+    for entry in applied['results']:
+        assert abs(entry['overall_score'] - expected[entry['incident_id']]) < 0.01, entry
+
+def test_activate_switches_served_scores():
+    db = stored_session(scorer_results())
+    applied = score_store.ScoreMatrix().apply_profile(db, "authentic", BUILTIN_PROFILES["authentic"], activate=True)
+    assert applied['active']
+    cached = score_store.get_cached_scores(db, PRODUCT_ID, list(DIMENSION_SCORES), "prism")
+    for incident_id, scores in DIMENSION_SCORES.items():
+        expected = weight_profiles.overall_score(dict(zip(DIMENSIONS, scores)), BUILTIN_PROFILES["authentic"])
+        assert abs(cached[incident_id]['overall_score'] - expected) < 1e-6, (incident_id, cached[incident_id])
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
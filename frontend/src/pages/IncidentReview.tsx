@@ -23,6 +23,9 @@ import { VisualFeedbackLoop } from '../components/VisualFeedbackLoop';
 import { FeedbackLoopIndicator } from '../components/FeedbackLoopIndicator';
 import { FeedbackLoopService } from '../services/feedbackLoopService';
 
+// Upper bound on the bulk scoring call; incidents not scored in time keep their similarity ranking
+const BULK_SCORE_DEADLINE_MS = 20000;
+
 const PRISM_SCORES = [
   { key: 'logical_coherence', label: 'Logical Coherence' },
   { key: 'factual_accuracy', label: 'Factual Accuracy' },
@@ -119,19 +122,15 @@ export const IncidentReview: React.FC = () => {
                     // Process for both modes and cache results
                     setProcessingMode(true);
                     try {
-                        const [genericIncidents, prismIncidents] = await Promise.all([
-                            processIncidentsForMode(productData, incidentsData, 'generic'),
-                            processIncidentsForMode(productData, incidentsData, 'prism')
-                        ]);
+                        const processed = await processIncidentsForModes(productData, incidentsData);
                         
                         processedIncidentsRef.current = {
-                            generic: genericIncidents,
-                            prism: prismIncidents,
+                            ...processed,
                             productId: currentProductId
                         };
                         
                         // Set initial incidents based on current mode
-                        setIncidents(explanationMode === 'generic' ? genericIncidents : prismIncidents);
+                        setIncidents(processed[explanationMode]);
                     } finally {
                         setProcessingMode(false);
                     }
@@ -157,7 +156,7 @@ export const IncidentReview: React.FC = () => {
         }
     }, [explanationMode, processedIncidentsRef, productId]);
 
-    const processIncidentsForMode = async (product: Product, allIncidents: Incident[], mode: ExplanationMode): Promise<Incident[]> => {
+    const processIncidentsForModes = async (product: Product, allIncidents: Incident[]): Promise<Record<ExplanationMode, Incident[]>> => {
         // Step 1: Use cosine similarity to filter to top 15 most similar incidents
         const similarityScores = allIncidents.map(incident => ({
             ...incident,
@@ -169,9 +168,15 @@ export const IncidentReview: React.FC = () => {
             .sort((a, b) => b.similarity_score - a.similarity_score)
             .slice(0, 15);
 
-        // Step 2: Process ALL 15 incidents in ONE API call
+        const bySimilarity = () => top15Similar.map(incident => ({
+            ...incident,
+            confidence_score: incident.similarity_score || 0.5
+        }));
+        const byConfidence = (list: Incident[]) => list.sort((a, b) => (b.confidence_score || 0) - (a.confidence_score || 0));
+
+        // Step 2: Score ALL 15 incidents for BOTH modes in ONE API call
         try {
-            console.log(`Processing ${top15Similar.length} incidents in ${mode} mode with single bulk API call`);
+            console.log(`Processing ${top15Similar.length} incidents in dual (generic + prism) mode with single bulk API call`);
             
             // Prepare single bulk request with all incidents
             const bulkRequest = {
@@ -183,70 +188,65 @@ export const IncidentReview: React.FC = () => {
                     description: incident.description,
                     technologies: incident.technologies
                 })),
-                context: mode === 'prism' 
-                    ? `Technologies: ${product.technology.join(', ')}. Purposes: ${product.purpose?.join(', ') || 'General AI'}`
-                    : `Generic analysis for: ${product.technology.join(', ')}`,
-                mode: mode
+                context: `Technologies: ${product.technology.join(', ')}. Purposes: ${product.purpose?.join(', ') || 'General AI'}`,
+                mode: 'dual',
+                product_id: product.id
             };
 
             // Make single bulk API call
-            const bulkResponse = await apiService.bulkCalculatePRISMScore(bulkRequest);
+            const bulkResponse = await apiService.bulkCalculatePRISMScore(bulkRequest, BULK_SCORE_DEADLINE_MS);
             
             console.log(`=== BULK API RESPONSE ===`);
-            console.log(`Mode: ${mode}`);
             console.log(`Response structure:`, bulkResponse);
             console.log(`Number of incident_scores:`, bulkResponse.incident_scores?.length || 0);
             console.log(`First score sample:`, bulkResponse.incident_scores?.[0]);
             
-            // Process response - expecting array of scores for each incident
-            const processedIncidents = top15Similar.map((incident, index) => {
+            // Process response - one entry per incident carrying both score sets
+            const genericIncidents: Incident[] = [];
+            const prismIncidents: Incident[] = [];
+            top15Similar.forEach((incident, index) => {
                 const scoreData = bulkResponse.incident_scores[index];
                 
-                if (mode === 'prism') {
-                    const processed = {
-                        ...incident,
-                        prism_scores: {
-                            logical_coherence: (scoreData.logical_coherence || 50) / 100, // Convert from 1-100 to 0-1
-                            factual_accuracy: (scoreData.factual_accuracy || 50) / 100,
-                            practical_implementability: (scoreData.practical_implementability || 50) / 100,
-                            contextual_relevance: (scoreData.contextual_relevance || 50) / 100,
-                            impact: (scoreData.impact || 50) / 100,
-                            exploitability: (scoreData.exploitability || 50) / 100
-                        },
-                        confidence_score: (scoreData.overall_score || 50) / 100, // Convert from 1-100 to 0-1
-                        prism_reasoning: scoreData.reasoning || 'PRISM analysis'
-                    };
-                    
-                    console.log(`PRISM processed incident ${incident.id}: confidence=${processed.confidence_score}, overall_raw=${scoreData.overall_score || 'undefined'}`);
-                    return processed;
-                } else {
-                    const processed = {
-                        ...incident,
-                        confidence_score: (scoreData.confidence_score || 50) / 100, // Convert from 1-100 to 0-1
-                        generic_reasoning: scoreData.reasoning || 'Generic analysis'
-                    };
-                    
-                    console.log(`Generic processed incident ${incident.id}: confidence=${processed.confidence_score}, confidence_raw=${scoreData.confidence_score || 'undefined'}`);
-                    return processed;
+                if (scoreData.status === 'timeout' || scoreData.status === 'error') {
+                    const fallback = { ...incident, confidence_score: incident.similarity_score || 0.5 };
+                    genericIncidents.push(fallback);
+                    prismIncidents.push({ ...fallback });
+                    return;
                 }
+                
+                genericIncidents.push({
+                    ...incident,
+                    confidence_score: (scoreData.confidence_score || 50) / 100, // Convert from 1-100 to 0-1
+                    generic_reasoning: scoreData.reasoning || 'Generic analysis'
+                });
+                prismIncidents.push({
+                    ...incident,
+                    prism_scores: {
+                        logical_coherence: (scoreData.logical_coherence || 50) / 100, // Convert from 1-100 to 0-1
+                        factual_accuracy: (scoreData.factual_accuracy || 50) / 100,
+                        practical_implementability: (scoreData.practical_implementability || 50) / 100,
+                        contextual_relevance: (scoreData.contextual_relevance || 50) / 100,
+                        impact: (scoreData.impact || 50) / 100,
+                        exploitability: (scoreData.exploitability || 50) / 100
+                    },
+                    confidence_score: (scoreData.overall_score || 50) / 100, // Convert from 1-100 to 0-1
+                    prism_reasoning: scoreData.reasoning || 'PRISM analysis'
+                });
             });
 
             console.log(`Bulk processing complete. Score range:`, {
-                min: Math.min(...processedIncidents.map(i => i.confidence_score || 0)),
-                max: Math.max(...processedIncidents.map(i => i.confidence_score || 0)),
-                count: processedIncidents.length
+                min: Math.min(...prismIncidents.map(i => i.confidence_score || 0)),
+                max: Math.max(...prismIncidents.map(i => i.confidence_score || 0)),
+                count: prismIncidents.length
             });
 
-            // Return sorted by confidence score
-            return processedIncidents.sort((a, b) => (b.confidence_score || 0) - (a.confidence_score || 0));
+            // Return each mode sorted by confidence score
+            return { generic: byConfidence(genericIncidents), prism: byConfidence(prismIncidents) };
             
         } catch (error) {
-            console.error(`Error in bulk ${mode} processing:`, error);
+            console.error(`Error in bulk dual processing:`, error);
             // Fallback to similarity scores
-            return top15Similar.map(incident => ({
-                ...incident,
-                confidence_score: incident.similarity_score || 0.5
-            }));
+            return { generic: bySimilarity(), prism: bySimilarity() };
         }
     };
 
@@ -328,9 +328,13 @@ export const IncidentReview: React.FC = () => {
             ]);
             setProduct(productData);
             
-            // Reprocess incidents for current mode
-            const processedIncidents = await processIncidentsForMode(productData, updatedIncidents, explanationMode);
-            setIncidents(processedIncidents);
+            // Reprocess incidents for both modes
+            const processed = await processIncidentsForModes(productData, updatedIncidents);
+            processedIncidentsRef.current = {
+                ...processed,
+                productId: productData.id
+            };
+            setIncidents(processed[explanationMode]);
             
             // Clear feedback history since it's been applied
             setFeedbackHistory([]);
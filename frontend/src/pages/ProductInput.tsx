@@ -25,6 +25,8 @@ export const ProductInput: React.FC = () => {
     const [totalPages, setTotalPages] = useState(1);
     const [totalProducts, setTotalProducts] = useState(0);
     const [isLoadingProducts, setIsLoadingProducts] = useState(false);
+    // Keyset cursors of the pages reached so far, per search
+    const pageCursorsRef = useRef<{ search: string; cursors: Record<number, string> }>({ search: '', cursors: {} });
     
     // Suggestions state
     const [techSuggestions, setTechSuggestions] = useState<string[]>([]);
@@ -40,6 +42,7 @@ export const ProductInput: React.FC = () => {
     } | null>(null);
 
     const PRODUCTS_PER_PAGE = 12;
+    const MIN_PREDICTION_DESCRIPTION_LENGTH = 30;
 
     // Load system stats
     useEffect(() => {
@@ -83,13 +86,21 @@ export const ProductInput: React.FC = () => {
     // Load products with search and pagination
     const loadProducts = useCallback(async (params: ProductSearchParams = {}) => {
         setIsLoadingProducts(true);
+        if (pageCursorsRef.current.search !== searchQuery) {
+            pageCursorsRef.current = { search: searchQuery, cursors: {} };
+        }
+        const cursors = pageCursorsRef.current.cursors;
         try {
             const response = await apiService.getProducts({
                 page: currentPage,
                 limit: PRODUCTS_PER_PAGE,
                 search: searchQuery || undefined,
+                after: cursors[currentPage],
                 ...params
             });
+            if (response.next_cursor) {
+                cursors[currentPage + 1] = response.next_cursor;
+            }
             
             setExistingProducts(response.items);
             setTotalPages(response.total_pages);
@@ -117,6 +128,31 @@ export const ProductInput: React.FC = () => {
         return () => clearTimeout(delayedSearch);
     }, [searchQuery]);
 
+    // Prefill empty technology/purpose tags from the description (debounced)
+    useEffect(() => {
+        const description = product.description?.trim() || '';
+        if (selectedProduct || description.length < MIN_PREDICTION_DESCRIPTION_LENGTH) return;
+        let stale = false;
+        const delayedPrediction = setTimeout(async () => {
+            try {
+                const prediction = await apiService.predictIndices(description);
+                if (stale) return;
+                setProduct(prev => ({
+                    ...prev,
+                    technology: prev.technology?.length ? prev.technology : prediction.technology,
+                    purpose: prev.purpose?.length ? prev.purpose : prediction.purpose
+                }));
+            } catch (error) {
+                console.error('Error predicting product tags:', error);
+            }
+        }, 400);
+
+        return () => {
+            stale = true;
+            clearTimeout(delayedPrediction);
+        };
+    }, [product.description, selectedProduct]);
+
     const handleProductSelect = (selectedProduct: ApiProduct) => {
         setSelectedProduct(selectedProduct);
         setProduct({
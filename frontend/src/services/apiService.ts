@@ -69,6 +69,14 @@ export interface PRISMScoreResponse {
     reasoning: string;
 }
 
+export interface IndexPrediction {
+    technology: string[];
+    purpose: string[];
+    ethical_issues: string[] | null;  // null when not predicted (classifier answers)
+    source: 'classifier' | 'llm' | 'cache' | 'none';
+    confidence?: number | null;
+}
+
 export interface BulkPRISMScoreRequest {
     product_name: string;
     product_description: string;
@@ -79,14 +87,15 @@ export interface BulkPRISMScoreRequest {
         technologies: string[];
     }>;
     context?: string;
-    mode: string;
+    mode: string; // 'prism', 'generic', 'dual' (both in one call) or 'cascade'
+    product_id?: number;
 }
 
 export interface BulkPRISMScoreResponse {
     incident_scores: Array<{
         incident_id: number;
-        confidence_score?: number; // For generic mode
-        logical_coherence?: number; // For PRISM mode
+        confidence_score?: number; // For generic and dual modes
+        logical_coherence?: number; // For PRISM and dual modes
         factual_accuracy?: number;
         practical_implementability?: number;
         contextual_relevance?: number;
@@ -94,13 +103,16 @@ export interface BulkPRISMScoreResponse {
         exploitability?: number;
         overall_score?: number;
         reasoning: string;
+        status?: 'scored' | 'cached' | 'degraded' | 'error' | 'timeout';
     }>;
+    partial?: boolean; // Deadline reached before every incident was scored
 }
 
 export interface ProductSearchParams {
     search?: string;
     page?: number;
     limit?: number;
+    after?: string;  // next_cursor of the previous page (keyset pagination)
     technology?: string[];
     purpose?: string[];
 }
@@ -111,6 +123,7 @@ export interface PaginatedResponse<T> {
     page: number;
     limit: number;
     total_pages: number;
+    next_cursor?: string | null;
 }
 
 class ApiService {
@@ -149,6 +162,7 @@ class ApiService {
         if (params.search) searchParams.append('search', params.search);
         if (params.page) searchParams.append('page', params.page.toString());
         if (params.limit) searchParams.append('limit', params.limit.toString());
+        if (params.after) searchParams.append('after', params.after);
         if (params.technology) {
             params.technology.forEach(tech => searchParams.append('technology', tech));
         }
@@ -278,10 +292,15 @@ class ApiService {
         });
     }
 
-    async bulkCalculatePRISMScore(request: BulkPRISMScoreRequest): Promise<BulkPRISMScoreResponse> {
+    async bulkCalculatePRISMScore(request: BulkPRISMScoreRequest, deadlineMs?: number): Promise<BulkPRISMScoreResponse> {
         return this.request<BulkPRISMScoreResponse>('/api/prism/score/bulk', {
             method: 'POST',
             body: JSON.stringify(request),
+            headers: {
+                'Content-Type': 'application/json',
+                // The backend returns whatever is scored by the deadline
+                ...(deadlineMs ? { 'X-Deadline-Ms': deadlineMs.toString() } : {}),
+            },
         });
     }
 
@@ -305,6 +324,14 @@ class ApiService {
         return this.request<string[]>('/api/suggestions/purposes');
     }
 
+    // Technology/purpose tags predicted from a product description
+    async predictIndices(description: string): Promise<IndexPrediction> {
+        return this.request<IndexPrediction>('/api/products/predict-indices', {
+            method: 'POST',
+            body: JSON.stringify({ description }),
+        });
+    }
+
     // Search suggestions
     async getSearchSuggestions(query: string, type: 'products' | 'incidents' = 'products'): Promise<string[]> {
         return this.request<string[]>(`/api/search/suggestions?q=${encodeURIComponent(query)}&type=${type}`);